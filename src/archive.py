@@ -0,0 +1,264 @@
+# Offline page archive (WARC-style): capture raw responses, replay them later
+# A capture appends every fetched response to segment files, as WARC/1.1
+# "response" records, each one compressed as its own gzip member (the
+# .warc.gz layout other WARC tools read). An SQLite index maps every URL to
+# (segment, offset, length), so a page is read back with a single slice of
+# the memory-mapped segment and one decompression: no scan, no network.
+# Re-extracting pages from an archive is in replay.py.
+import gzip
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from config import ARCHIVE_INDEX_BATCH, ARCHIVE_SEGMENT_BYTES
+from http_cache import TRANSFER_HEADERS # Not true of the decoded body stored
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    url         TEXT PRIMARY KEY,
+    segment     INTEGER NOT NULL,
+    offset      INTEGER NOT NULL,
+    length      INTEGER NOT NULL,
+    status      INTEGER NOT NULL,
+    captured_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+INDEX_FILE = 'index.sqlite3'
+SEGMENT_NAME = 'segment-{:05d}.warc.gz'
+
+# (segment, offset, length) of a record
+Location = Tuple[int, int, int]
+
+
+class ArchiveMiss(LookupError):
+    """Raised on replay when a URL was never captured."""
+
+
+class ArchivedResponse:
+    """
+    Response read back from an archive, exposing the attributes the
+    scraping stage reads from a requests.Response (like CachedResponse).
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = True # Not downloaded
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return requests.utils.get_encoding_from_headers(self.headers)
+
+    def raise_for_status(self):
+        pass # Only successful responses are captured
+
+    def close(self):
+        pass
+
+
+def encode_record(url: str, status_code: int, reason: str, headers: Dict[str, str], content: bytes) -> bytes:
+    """One WARC response record (HTTP status line, headers and body), as a gzip member."""
+    http = [f"HTTP/1.1 {status_code} {reason or ''}".rstrip()]
+    http += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in TRANSFER_HEADERS]
+    http.append(f"Content-Length: {len(content)}")
+    payload = ("\r\n".join(http) + "\r\n\r\n").encode('latin-1', 'replace') + content
+    warc = (
+        "WARC/1.1\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n"
+    ).encode('utf-8')
+    # Level 6: archives are written once and read many times, mostly CPU-bound
+    return gzip.compress(warc + payload + b"\r\n\r\n", compresslevel=6, mtime=0)
+
+
+def decode_record(data: bytes) -> ArchivedResponse:
+    """ArchivedResponse from one gzip member written by encode_record."""
+    record = zlib.decompress(data, wbits=31) # 31: gzip header and trailer
+    warc_end = record.index(b"\r\n\r\n")
+    warc_headers = _parse_headers(record[:warc_end].decode('utf-8').split("\r\n")[1:])
+    payload_start = warc_end + 4
+    payload_end = payload_start + int(warc_headers['content-length'])
+
+    http_end = record.index(b"\r\n\r\n", payload_start)
+    lines = record[payload_start:http_end].decode('latin-1').split("\r\n")
+    status_code = int(lines[0].split(" ", 2)[1])
+    headers = dict(_header_items(lines[1:]))
+    return ArchivedResponse(warc_headers['warc-target-uri'], status_code, headers,
+                            record[http_end + 4:payload_end])
+
+
+def _header_items(lines: List[str]) -> Iterator[Tuple[str, str]]:
+    for line in lines:
+        name, _, value = line.partition(":")
+        yield name.strip(), value.strip()
+
+
+def _parse_headers(lines: List[str]) -> Dict[str, str]:
+    return {name.lower(): value for name, value in _header_items(lines)}
+
+
+class ArchiveWriter:
+    """
+    Capture side: appends records to the current segment and starts a new one
+    past `segment_bytes`. Index entries are committed every `batch_size`
+    records (or on flush()), after the segment data is flushed, so the index
+    never points past what is on disk. A URL captured again points to its
+    latest record. Safe to share between the worker threads of a batch (one
+    writing process per archive directory).
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = ARCHIVE_SEGMENT_BYTES,
+                 batch_size: int = ARCHIVE_INDEX_BATCH):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+
+        # Appending to the last segment of an earlier capture
+        self._segment = max(_segment_numbers(directory), default=0)
+        self._file = open(os.path.join(directory, SEGMENT_NAME.format(self._segment)), 'ab')
+        self._offset = self._file.tell()
+
+    def record(self, url: str, response) -> Location:
+        """
+        Append a fetched response (requests.Response or a cached one), stored
+        under the URL it was requested with; returns its location.
+        """
+        data = encode_record(response.url, response.status_code, getattr(response, 'reason', '') or '',
+                             dict(response.headers), response.content)
+        with self._lock:
+            if self._offset and self._offset + len(data) > self.segment_bytes:
+                self._next_segment()
+            location = (self._segment, self._offset, len(data))
+            self._file.write(data)
+            self._offset += len(data)
+            self._pending.append((url,) + location + (response.status_code, time.time()))
+            due = len(self._pending) >= self.batch_size
+        if due:
+            self.flush()
+        return location
+
+    def _next_segment(self):
+        self._file.close()
+        self._segment += 1
+        self._file = open(os.path.join(self.directory, SEGMENT_NAME.format(self._segment)), 'ab')
+        self._offset = 0
+
+    def flush(self):
+        with self._lock, self._connection:
+            self._file.flush()
+            if self._pending:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+                self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArchiveReader:
+    """
+    Replay side: reads records straight from memory-mapped segments (the OS
+    page cache does the I/O, nothing is read twice). Segments are mapped on
+    first use. Safe to share between threads; every process opens its own.
+    """
+
+    def __init__(self, directory: str):
+        path = os.path.join(directory, INDEX_FILE)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No archive in {directory} (missing {INDEX_FILE})")
+        self.directory = directory
+        self._index_path = path
+        self._connection = None
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    def _query(self, sql: str, *params):
+        with self._lock:
+            if self._connection is None: # Opened lazily: replay workers only need the segments
+                self._connection = sqlite3.connect(f"file:{self._index_path}?mode=ro", uri=True,
+                                                   check_same_thread=False)
+            return self._connection.execute(sql, params).fetchall()
+
+    def _map(self, segment: int) -> mmap.mmap:
+        segment_map = self._maps.get(segment)
+        if segment_map is None:
+            with self._lock:
+                segment_map = self._maps.get(segment)
+                if segment_map is None:
+                    with open(os.path.join(self.directory, SEGMENT_NAME.format(segment)), 'rb') as f:
+                        segment_map = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return segment_map
+
+    def locate(self, url: str) -> Location:
+        found = self._query("SELECT segment, offset, length FROM records WHERE url = ?", url)
+        if not found:
+            raise ArchiveMiss(f"Not in the archive: {url}")
+        return found[0]
+
+    def locations(self) -> List[Tuple[str, int, int, int]]:
+        """(url, segment, offset, length) of every record, in file order (sequential reads)."""
+        return self._query("SELECT url, segment, offset, length FROM records ORDER BY segment, offset")
+
+    def read(self, location: Location) -> ArchivedResponse:
+        segment, offset, length = location
+        return decode_record(self._map(segment)[offset:offset + length])
+
+    def get(self, url: str) -> ArchivedResponse:
+        """The captured response of a URL; ArchiveMiss if it was never captured."""
+        return self.read(self.locate(url))
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM records")[0][0]
+
+    def __contains__(self, url: str) -> bool:
+        return bool(self._query("SELECT 1 FROM records WHERE url = ?", url))
+
+    def close(self):
+        with self._lock:
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _segment_numbers(directory: str) -> List[int]:
+    prefix, suffix = SEGMENT_NAME.split('{')[0], '.warc.gz'
+    return [int(name[len(prefix):-len(suffix)]) for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(suffix) and name[len(prefix):-len(suffix)].isdigit()]
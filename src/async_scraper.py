@@ -0,0 +1,326 @@
+# asyncio alternative to scraper_logic.fetch_page / execute_scraping
+# Keeps thousands of requests in flight on a single event loop using only the
+# standard library (asyncio streams), so no extra dependency is required.
+import asyncio
+import ssl
+import zlib
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+from queue import Queue
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from class_selectors import AbstractSelector, GUIRef, PageResult, BatchSummary
+from config import (ASYNC_MAX_IN_FLIGHT, DEFAULT_PARSE_WORKERS, DEFAULT_PER_HOST_LIMIT,
+                    PARSE_QUEUE_SIZE, REQUEST_TIMEOUT)
+from concurrent.futures import ProcessPoolExecutor
+from scraper_logic import parse_rows
+
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+USER_AGENT = "web-scraper/async"
+
+
+class AsyncResponse:
+    """
+    Minimal response object, exposing the attributes the parsing
+    stage reads from a requests.Response (url, status_code, headers, content).
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+@lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """One context for every HTTPS connection: loading the CA certificates is slow."""
+    return ssl.create_default_context()
+
+
+async def _close(writer: asyncio.StreamWriter):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, ssl.SSLError):
+        pass # Already reset by the server: closed either way
+
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections of one run, per (scheme, host, port).
+    A connection goes back to the pool only once its response was read
+    to the end and the server did not say it was the last one.
+    The per-host limit of the run bounds the connections per host.
+    """
+
+    def __init__(self):
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+
+    async def acquire(self, key: Tuple[str, str, int]):
+        """An idle connection to `key`, or None."""
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            await _close(writer)
+        return None
+
+    def release(self, key: Tuple[str, str, int], connection: Tuple[asyncio.StreamReader, asyncio.StreamWriter]):
+        self._idle.setdefault(key, []).append(connection)
+
+    async def close(self):
+        connections = [connection for idle in self._idle.values() for connection in idle]
+        self._idle.clear()
+        await asyncio.gather(*(_close(writer) for _, writer in connections))
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    """Read the body according to the transfer headers."""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # Skip optional trailers up to the final empty line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline() # CRLF after each chunk
+        return b''.join(chunks)
+
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length']))
+
+    # Connection: close -> the body ends with the stream
+    return await reader.read()
+
+
+def _decode_body(body: bytes, headers: Dict[str, str]) -> bytes:
+    encoding = headers.get('content-encoding', '').lower()
+    if encoding == 'gzip':
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return zlib.decompress(body)
+    return body
+
+
+async def _exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: bytes,
+                    url: str) -> Tuple[int, Dict[str, str], bytes, bool]:
+    """Send the request, read the response: (status, headers, body, connection reusable)."""
+    writer.write(request)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError(f"Empty response from {url}")
+    version, status = status_line.split()[:2]
+    status = int(status)
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    no_body = status in (204, 304) or 100 <= status < 200
+    body = b'' if no_body else await _read_body(reader, headers)
+    connection = headers.get('connection', '').lower()
+    reusable = (
+        (no_body or 'content-length' in headers or 'transfer-encoding' in headers) # Not ended by a close
+        and 'close' not in connection
+        and (version == b'HTTP/1.1' or 'keep-alive' in connection)
+    )
+    return status, headers, _decode_body(body, headers), reusable
+
+
+async def _request(url: str, pool: Optional[ConnectionPool] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Send a single GET request and return (status, headers, body).
+    With a pool the connection is kept alive and reused for the next request to the same host.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+
+    https = parts.scheme == 'https'
+    host = parts.hostname
+    port = parts.port or (443 if https else 80)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"User-Agent: {USER_AGENT}\r\n"
+        "Accept-Encoding: gzip, deflate\r\n"
+        f"Connection: {'keep-alive' if pool is not None else 'close'}\r\n\r\n"
+    ).encode('latin-1')
+    key = (parts.scheme, host, port)
+
+    while True:
+        connection = await pool.acquire(key) if pool is not None else None
+        reused = connection is not None
+        if connection is None:
+            connection = await asyncio.open_connection(host, port, ssl=_ssl_context() if https else None)
+        reader, writer = connection
+        try:
+            status, headers, body, reusable = await _exchange(reader, writer, request, url)
+        except asyncio.CancelledError:
+            writer.close() # Timed out: the connection is dropped without waiting
+            raise
+        except Exception as e:
+            await _close(writer)
+            if reused and isinstance(e, ConnectionError):
+                continue # The server closed the idle connection meanwhile: once more on a new one
+            raise
+        if reusable and pool is not None:
+            pool.release(key, connection)
+        else:
+            await _close(writer)
+        return status, headers, body
+
+
+async def fetch_page_async(url: str, timeout: float = REQUEST_TIMEOUT,
+                           pool: Optional[ConnectionPool] = None) -> AsyncResponse:
+    """
+    asyncio counterpart of scraper_logic.fetch_page.
+    Follows redirects and raises on HTTP errors, like requests does.
+    pool: keep-alive connections to reuse (see ConnectionPool); without one,
+    every request opens its own connection.
+    """
+    async def follow() -> AsyncResponse:
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await _request(current, pool)
+            if status in REDIRECT_CODES and 'location' in headers:
+                current = urljoin(current, headers['location'])
+                continue
+            return AsyncResponse(current, status, headers, body)
+        raise requests.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects for {url}")
+
+    response = await asyncio.wait_for(follow(), timeout)
+    response.raise_for_status()
+    return response
+
+
+async def scrape_urls_async(urls: Iterable[str],
+                            column_jobs: List[AbstractSelector],
+                            result_queue: Queue,
+                            max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+                            per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                            timeout: float = REQUEST_TIMEOUT,
+                            parse_queue_size: int = PARSE_QUEUE_SIZE,
+                            parse_workers: int = DEFAULT_PARSE_WORKERS,
+                            parser: Optional[str] = None,
+                            record_selector: Optional[AbstractSelector] = None) -> BatchSummary:
+    """
+    Fetch URLs on the running event loop and parse them off-loop.
+
+    Same queue contract as scraper_logic.execute_batch_scraping: one PageResult
+    per URL, then a BatchSummary. Fetched pages wait in a bounded queue for the
+    parser; when it is full, fetchers stop pulling new URLs (backpressure).
+    With parse_workers > 0 parsing runs in a process pool instead of a thread,
+    up to parse_workers pages at once.
+    """
+    if max_in_flight < 1 or per_host_limit < 1:
+        raise ValueError("max_in_flight and per_host_limit must be at least 1.")
+
+    loop = asyncio.get_running_loop()
+    url_iter = iter(urls)
+    host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=parse_queue_size)
+    counts = {'total': 0, 'failed': 0}
+    # None -> the loop's default thread executor
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+    connections = ConnectionPool() # Pages of the same host reuse their connections
+
+    def report(page: PageResult):
+        counts['total'] += 1
+        if not page.ok:
+            counts['failed'] += 1
+        result_queue.put(page)
+
+    async def fetcher():
+        # Every fetcher pulls from the shared iterator: there is no await
+        # between the check and next(), so this is safe on one loop
+        for url in url_iter:
+            host = urlsplit(url).netloc.lower()
+            semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(per_host_limit))
+            try:
+                async with semaphore:
+                    response = await fetch_page_async(url, timeout, connections)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError(f"Timed out after {timeout}s: {url}")
+                report(PageResult(url, error=e))
+                continue
+            await parse_queue.put((url, response))
+
+    async def parse_consumer():
+        while True:
+            item = await parse_queue.get()
+            if item is None:
+                break
+            url, response = item
+            try:
+                # BeautifulSoup is blocking: run it off the event loop
+                rows = await loop.run_in_executor(
+                    parse_pool, parse_rows, response.content, column_jobs, response.url, parser,
+                    record_selector
+                )
+                report(PageResult(url, rows))
+            except Exception as e:
+                report(PageResult(url, error=e))
+
+    # One consumer per worker process, so that the pool parses that many pages at once
+    consumers = [asyncio.ensure_future(parse_consumer()) for _ in range(max(parse_workers, 1))]
+    try:
+        await asyncio.gather(*(fetcher() for _ in range(max_in_flight)))
+    finally:
+        for _ in consumers:
+            await parse_queue.put(None)
+        await asyncio.gather(*consumers)
+        await connections.close()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    summary = BatchSummary(counts['total'], counts['failed'])
+    result_queue.put(summary)
+    return summary
+
+
+def execute_async_batch_scraping(urls: Iterable[str],
+                                 column_jobs: List[AbstractSelector],
+                                 result_queue: Queue,
+                                 **options) -> BatchSummary:
+    """
+    Blocking wrapper around scrape_urls_async,
+    meant to be the target of a worker thread (like execute_scraping).
+    """
+    return asyncio.run(scrape_urls_async(urls, column_jobs, result_queue, **options))
+
+
+def execute_scraping_async(gui_data: GUIRef, result_queue: Queue):
+    """
+    Drop-in alternative to scraper_logic.execute_scraping:
+    puts the list of rows, or the Exception, on the queue.
+    """
+    try:
+        response = asyncio.run(fetch_page_async(gui_data.url))
+        result_queue.put(parse_rows(response.content, gui_data.selectors, response.url, gui_data.parser,
+                                    gui_data.record_selector))
+    except Exception as e:
+        result_queue.put(e)
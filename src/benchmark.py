@@ -0,0 +1,439 @@
+# Benchmarks for the scraping pipeline, run from src/:
+#   python benchmark.py parse --pages 16 --records 2000 --workers 4
+#   python benchmark.py columns --records 1000 --columns 15
+#   python benchmark.py pipeline --records 5000 --nesting 4 --filler 200
+#   python benchmark.py fetch --pages 200 --records 100 --workers 8
+#   python benchmark.py replay --pages 200 --page-records 100 --workers 8
+#   python benchmark.py memory --rows 200000        # list of lists vs ResultTable
+#   python benchmark.py suite --report bench.json   # pipeline + fetch + replay + memory, JSON report
+#   python benchmark.py compare old.json new.json   # exit code 1 on regressions
+#
+# Pages are generated (no randomness), so runs on the same machine are comparable
+# across commits. Reports hold flat metrics: "*.seconds" / "*.peak_mb" (lower is
+# better) and "*.per_s" (higher is better).
+import argparse
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from class_selectors import AbstractSelector, TagSelector, AttributeSelector
+from data_handler import save_data
+from result_table import ResultTable
+from scraper_logic import format_results, parse_rows, select_elements, soupify
+
+BASE_URL = "http://bench.local/catalogue/"
+REGRESSION_THRESHOLD = 0.10 # compare: flag metrics more than 10% worse
+
+
+def synthetic_page(records: int, nesting: int = 0, filler: int = 0) -> bytes:
+    """
+    Product listing page with `records` repeated product cards.
+    `nesting` wraps every card in that many extra <div>s (deeper trees),
+    `filler` adds that many characters of description text per card (bigger pages).
+    """
+    open_wrap = '<div class="wrap">' * nesting
+    close_wrap = '</div>' * nesting
+    text = ("lorem ipsum dolor sit amet " * (filler // 27 + 1))[:filler]
+    description = f'<p class="description">{text}</p>' if filler else ''
+    cards = []
+    for n in range(records):
+        cards.append(
+            f'{open_wrap}<article class="product_pod">'
+            f'<h3><a href="item_{n}.html" title="Product {n}">Product {n}</a></h3>'
+            f'<p class="price_color">£{n % 97}.{n % 100:02d}</p>'
+            f'<p class="availability">In stock</p>{description}'
+            f'</article>{close_wrap}'
+        )
+    return ("<html><body><section><ol>" + "".join(cards) + "</ol></section></body></html>").encode("utf-8")
+
+
+def product_selectors() -> List[AbstractSelector]:
+    return [
+        TagSelector("article.product_pod h3 a"),
+        TagSelector("article.product_pod p.price_color"),
+        AttributeSelector("href", "article.product_pod h3 a"),
+    ]
+
+
+def _timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def _measure(function: Callable[[], Any], repeat: int) -> Tuple[Any, float, float]:
+    """
+    (result, best time in s, peak memory in MB) of a stage.
+    The peak comes from one extra run under tracemalloc, so tracing does not
+    slow down the timed runs; it only sees memory allocated through Python
+    (not the C trees of lxml/selectolax).
+    """
+    result = None
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, best, peak / 1e6
+
+
+def bench_parse(pages: int, records: int, workers: int):
+    """Compare parsing in threads (current path) against the process pool."""
+    page = synthetic_page(records)
+    selectors = product_selectors()
+
+    def in_thread():
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda _: parse_rows(page, selectors, BASE_URL), range(pages)))
+
+    def in_processes():
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(parse_rows, [page] * pages, [selectors] * pages, [BASE_URL] * pages))
+
+    print(f"parse: {pages} pages x {len(page) / 1e6:.2f} MB, {workers} workers")
+    for name, function in (("threads", in_thread), ("processes", in_processes)):
+        elapsed = _timed(function)
+        print(f"  {name:<10} {elapsed:8.3f} s  {pages / elapsed:8.2f} pages/s")
+
+
+def synthetic_wide_page(records: int, fields: int) -> bytes:
+    """Listing page where every record carries `fields` distinct columns."""
+    rows = []
+    for n in range(records):
+        cells = "".join(f'<td class="f{i}">v{n}-{i}</td>' for i in range(fields))
+        rows.append(f'<tr class="record">{cells}<td class="noise">x</td></tr>')
+    return ("<html><body><table>" + "".join(rows) + "</table></body></html>").encode("utf-8")
+
+
+def bench_columns(records: int, max_columns: int, repeat: int):
+    """Per-column scans against the single-pass select_elements as columns grow."""
+    soup = soupify(synthetic_wide_page(records, max_columns))
+
+    print(f"columns: {records} records, best of {repeat}")
+    print(f"  {'cols':>4} {'per-column':>12} {'single-pass':>12} {'speedup':>8}")
+    for count in sorted({1, 2, 4, 8, max_columns}):
+        if count > max_columns:
+            continue
+        # Every column has a fallback that never matches, like real configs
+        jobs = [TagSelector(f"td.f{i}-old", f"tr.record td.f{i}") for i in range(count)]
+
+        per_column = min(_timed(lambda: [job.find_elements(soup) for job in jobs]) for _ in range(repeat))
+        single_pass = min(_timed(lambda: select_elements(soup, jobs)) for _ in range(repeat))
+        print(f"  {count:>4} {per_column:>10.4f} s {single_pass:>10.4f} s {per_column / single_pass:>7.2f}x")
+
+
+def bench_pipeline(records: int, nesting: int = 0, filler: int = 0, parser: str = 'html.parser',
+                   save_format: str = 'csv', repeat: int = 3) -> Dict[str, float]:
+    """Time and memory peak of every stage: soupify, select_elements, format_results, save_data."""
+    page = synthetic_page(records, nesting, filler)
+    selectors = product_selectors()
+    columns = [selector.name for selector in selectors]
+    metrics: Dict[str, float] = {'pipeline.page_mb': len(page) / 1e6}
+
+    soup, seconds, peak = _measure(lambda: soupify(page, parser), repeat)
+    metrics['pipeline.soupify.seconds'], metrics['pipeline.soupify.peak_mb'] = seconds, peak
+
+    tag_lists, seconds, peak = _measure(lambda: select_elements(soup, selectors), repeat)
+    metrics['pipeline.select_elements.seconds'], metrics['pipeline.select_elements.peak_mb'] = seconds, peak
+
+    rows, seconds, peak = _measure(lambda: format_results(tag_lists, selectors, BASE_URL), repeat)
+    metrics['pipeline.format_results.seconds'], metrics['pipeline.format_results.peak_mb'] = seconds, peak
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"bench.{save_format}")
+        _, seconds, peak = _measure(lambda: save_data(rows, save_format, path, columns), repeat)
+    metrics['pipeline.save_data.seconds'], metrics['pipeline.save_data.peak_mb'] = seconds, peak
+
+    stages = ('soupify', 'select_elements', 'format_results', 'save_data')
+    total = sum(metrics[f'pipeline.{stage}.seconds'] for stage in stages)
+    metrics['pipeline.total.seconds'] = total
+    metrics['pipeline.records.per_s'] = len(rows) / total
+
+    print(f"pipeline: {records} records, nesting {nesting}, {len(page) / 1e6:.2f} MB, "
+          f"{parser}, {save_format}, best of {repeat}")
+    for stage in stages:
+        print(f"  {stage:<16} {metrics[f'pipeline.{stage}.seconds']:8.4f} s "
+              f"{metrics[f'pipeline.{stage}.peak_mb']:9.2f} MB peak")
+    print(f"  {'total':<16} {total:8.4f} s {metrics['pipeline.records.per_s']:9.0f} records/s")
+    return metrics
+
+
+def bench_fetch(pages: int, records: int, workers: int) -> Dict[str, float]:
+    """Fetch + parse throughput against a local HTTP server: thread pool and asyncio."""
+    # Imported here: only this benchmark needs a server and the fetch stack
+    from async_scraper import execute_async_batch_scraping
+    from scheduler import HostScheduler
+    from scraper_logic import execute_batch_scraping
+    from stub_server import StubServer
+
+    page = synthetic_page(records)
+    routes = {f"/page/{n}": (lambda _handler: (200, {"Content-Type": "text/html; charset=utf-8"}, page))
+              for n in range(pages)}
+    selectors = product_selectors()
+    metrics: Dict[str, float] = {}
+
+    with StubServer(routes) as server:
+        urls = [f"{server.base_url}/page/{n}" for n in range(pages)]
+        # Politeness limits would measure the rate limiter, not the pipeline
+        runs = {
+            'threads': lambda q: execute_batch_scraping(
+                urls, selectors, q, max_workers=workers, per_host_limit=workers,
+                scheduler=HostScheduler(workers, rate=1e9, max_rate=1e9, burst=pages)),
+            'async': lambda q: execute_async_batch_scraping(
+                urls, selectors, q, max_in_flight=workers, per_host_limit=workers),
+        }
+        print(f"fetch: {pages} pages x {len(page) / 1e6:.2f} MB, {workers} workers, local server")
+        for name, run in runs.items():
+            start = time.perf_counter()
+            summary = run(queue.Queue())
+            elapsed = time.perf_counter() - start
+            if summary.failed:
+                raise RuntimeError(f"fetch/{name}: {summary.failed} pages failed")
+            metrics[f'fetch.{name}.seconds'] = elapsed
+            metrics[f'fetch.{name}.pages_per_s'] = pages / elapsed
+            metrics[f'fetch.{name}.mb_per_s'] = pages * len(page) / 1e6 / elapsed
+            print(f"  {name:<10} {elapsed:8.3f} s {pages / elapsed:8.1f} pages/s "
+                  f"{metrics[f'fetch.{name}.mb_per_s']:8.1f} MB/s")
+    return metrics
+
+
+def bench_replay(pages: int, records: int, workers: int) -> Dict[str, float]:
+    """Re-extraction throughput from an archive: in-process vs one process per worker."""
+    from archive import ArchiveWriter
+    from replay import execute_replay
+    from requests.structures import CaseInsensitiveDict
+
+    class Page: # Stands for a fetched response: the archive only reads these attributes
+        status_code, reason, content = 200, 'OK', synthetic_page(records)
+        headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+
+    selectors = product_selectors()
+    metrics: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        with ArchiveWriter(directory) as archive:
+            for n in range(pages):
+                page = Page()
+                page.url = f"{BASE_URL}page/{n}"
+                archive.record(page.url, page)
+        print(f"replay: {pages} archived pages x {len(Page.content) / 1e6:.2f} MB, {workers} workers")
+        for name, parse_workers in (('thread', 0), ('processes', workers)):
+            start = time.perf_counter()
+            summary = execute_replay(directory, selectors, queue.Queue(), parse_workers=parse_workers)
+            elapsed = time.perf_counter() - start
+            if summary.failed:
+                raise RuntimeError(f"replay/{name}: {summary.failed} pages failed")
+            metrics[f'replay.{name}.seconds'] = elapsed
+            metrics[f'replay.{name}.pages_per_s'] = pages / elapsed
+            print(f"  {name:<10} {elapsed:8.3f} s {pages / elapsed:8.1f} pages/s")
+    return metrics
+
+
+def synthetic_rows(rows: int) -> Iterator[List[Any]]:
+    """
+    Result rows like a catalogue scrape gives: unique titles and links, repeated
+    categories, stock labels and image hosts. Every cell is a new str object,
+    as when rows come out of the parser.
+    """
+    categories = [f"Category {n}" for n in range(40)]
+    for n in range(rows):
+        yield [
+            f"Product {n}",
+            "".join(categories[n % 40]),
+            f"£{n % 97}.{n % 100:02d}",
+            "".join(["In stock" if n % 7 else "Out of stock"]),
+            f"{BASE_URL}item_{n}.html",
+            "".join([BASE_URL, "media/cache/placeholder.jpg"]),
+        ]
+
+
+def _traced_mb(function: Callable[[], Any]) -> Tuple[Any, float]:
+    """(result, MB still allocated through Python once it is built)."""
+    tracemalloc.start()
+    try:
+        result = function()
+        current = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, current / 1e6
+
+
+def bench_memory(rows: int, repeat: int = 3) -> Dict[str, float]:
+    """Memory held by a result set as a list of lists and as a ResultTable, and the cost of using each."""
+    metrics: Dict[str, float] = {}
+    builds = {'list': lambda: list(synthetic_rows(rows)),
+              'table': lambda: ResultTable.from_rows(synthetic_rows(rows))}
+    print(f"memory: {rows} rows x 6 columns")
+    for name, build in builds.items():
+        result, metrics[f'memory.{name}.mb'] = _traced_mb(build)
+        # Iterating gives every row as a list, as the savers read them
+        metrics[f'memory.{name}.iterate.seconds'] = min(_timed(lambda: sum(1 for _ in result))
+                                                        for _ in range(repeat))
+        del result # Only one result set alive at a time
+        metrics[f'memory.{name}.build.seconds'] = min(_timed(build) for _ in range(repeat))
+        print(f"  {name:<6} {metrics[f'memory.{name}.mb']:8.1f} MB  "
+              f"build {metrics[f'memory.{name}.build.seconds']:7.3f} s  "
+              f"iterate {metrics[f'memory.{name}.iterate.seconds']:7.3f} s")
+    print(f"  table / list: {metrics['memory.table.mb'] / metrics['memory.list.mb']:.2f}")
+    return metrics
+
+
+def environment() -> Dict[str, Any]:
+    """Where a report comes from, so that only comparable runs are compared."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    from parsers import available_parsers
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parsers': available_parsers(),
+    }
+
+
+def write_report(path: str, metrics: Dict[str, float], settings: Dict[str, Any]):
+    report = {'environment': environment(), 'settings': settings, 'metrics': metrics}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+    print(f"report: {path}")
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith('per_s')
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any],
+                    threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print old vs new for every common metric and return the regressed ones."""
+    regressions = []
+    old_metrics, new_metrics = old['metrics'], new['metrics']
+    if old.get('settings') != new.get('settings'):
+        print("warning: the reports were run with different settings")
+    print(f"{'metric':<36} {'old':>10} {'new':>10} {'change':>8}")
+    for metric in sorted(set(old_metrics) & set(new_metrics)):
+        before, after = old_metrics[metric], new_metrics[metric]
+        if not (metric.endswith('seconds') or metric.endswith('peak_mb') or _higher_is_better(metric)):
+            continue # Descriptive values (e.g. page size)
+        if before <= 0:
+            continue
+        change = after / before - 1
+        worse = -change if _higher_is_better(metric) else change
+        flag = ''
+        if worse > threshold:
+            regressions.append(metric)
+            flag = '  REGRESSION'
+        print(f"{metric:<36} {before:>10.4g} {after:>10.4g} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraping pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse_cmd = subparsers.add_parser("parse", help="in-thread vs process-pool parsing")
+    parse_cmd.add_argument("--pages", type=int, default=16)
+    parse_cmd.add_argument("--records", type=int, default=2000)
+    parse_cmd.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+
+    columns_cmd = subparsers.add_parser("columns", help="per-column vs single-pass selection")
+    columns_cmd.add_argument("--records", type=int, default=1000)
+    columns_cmd.add_argument("--columns", type=int, default=15)
+    columns_cmd.add_argument("--repeat", type=int, default=3)
+
+    def add_pipeline_args(command):
+        command.add_argument("--records", type=int, default=5000)
+        command.add_argument("--nesting", type=int, default=0, help="extra <div> levels around every record")
+        command.add_argument("--filler", type=int, default=0, help="description characters per record")
+        command.add_argument("--parser", default="html.parser")
+        command.add_argument("--format", default="csv", help="save_data format")
+        command.add_argument("--repeat", type=int, default=3)
+
+    def add_fetch_args(command):
+        command.add_argument("--pages", type=int, default=200)
+        command.add_argument("--page-records", type=int, default=100)
+        command.add_argument("--workers", type=int, default=8)
+
+    pipeline_cmd = subparsers.add_parser("pipeline", help="time and memory of every stage")
+    add_pipeline_args(pipeline_cmd)
+    pipeline_cmd.add_argument("--report", help="write a JSON report")
+
+    fetch_cmd = subparsers.add_parser("fetch", help="fetch throughput against a local server")
+    add_fetch_args(fetch_cmd)
+    fetch_cmd.add_argument("--report", help="write a JSON report")
+
+    replay_cmd = subparsers.add_parser("replay", help="re-extraction throughput from an archive")
+    add_fetch_args(replay_cmd)
+    replay_cmd.add_argument("--report", help="write a JSON report")
+
+    def add_memory_args(command):
+        command.add_argument("--rows", type=int, default=200_000)
+
+    memory_cmd = subparsers.add_parser("memory", help="result set memory: list of lists vs ResultTable")
+    add_memory_args(memory_cmd)
+    memory_cmd.add_argument("--repeat", type=int, default=3)
+    memory_cmd.add_argument("--report", help="write a JSON report")
+
+    suite_cmd = subparsers.add_parser("suite", help="pipeline + fetch + replay + memory, for reports across commits")
+    add_pipeline_args(suite_cmd)
+    add_fetch_args(suite_cmd)
+    add_memory_args(suite_cmd)
+    suite_cmd.add_argument("--report", help="write a JSON report")
+
+    compare_cmd = subparsers.add_parser("compare", help="compare two JSON reports")
+    compare_cmd.add_argument("old")
+    compare_cmd.add_argument("new")
+    compare_cmd.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                             help="relative change counted as a regression (default 0.10)")
+
+    args = parser.parse_args()
+    if args.command == "parse":
+        bench_parse(args.pages, args.records, args.workers)
+    elif args.command == "columns":
+        bench_columns(args.records, args.columns, args.repeat)
+    elif args.command == "compare":
+        with open(args.old, encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.new, encoding='utf-8') as f:
+            new = json.load(f)
+        regressions = compare_reports(old, new, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        metrics: Dict[str, float] = {}
+        settings = {key: value for key, value in vars(args).items() if key not in ('command', 'report')}
+        if args.command in ("pipeline", "suite"):
+            metrics.update(bench_pipeline(args.records, args.nesting, args.filler,
+                                          args.parser, args.format, args.repeat))
+        if args.command in ("fetch", "suite"):
+            metrics.update(bench_fetch(args.pages, args.page_records, args.workers))
+        if args.command in ("replay", "suite"):
+            metrics.update(bench_replay(args.pages, args.page_records, args.workers))
+        if args.command in ("memory", "suite"):
+            metrics.update(bench_memory(args.rows, args.repeat))
+        if args.report:
+            write_report(args.report, metrics, dict(settings, command=args.command))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Change detection for incremental re-scrapes (SQLite, persisted between runs)
+# Every URL keeps the fingerprint of its last page, the hash of every row it
+# gave and the rows themselves (compressed, to report deleted ones). A page
+# whose fingerprint did not change is not parsed again, and a re-scraped page
+# only reports the rows that are new or deleted since the last run.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from class_selectors import AbstractSelector
+from config import CHANGE_INDEX_BATCH, DEFAULT_CHANGE_INDEX
+from document_cache import DocumentCache
+from utils import json_default
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url         TEXT PRIMARY KEY,
+    signature   BLOB NOT NULL,
+    fingerprint BLOB NOT NULL,
+    row_hashes  BLOB NOT NULL,
+    rows        BLOB NOT NULL,
+    updated_at  REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Kinds of change, first column of a delta row (a changed row is deleted + new)
+NEW, DELETED = 'new', 'deleted'
+CHANGE_COLUMN = 'change'
+
+ROW_HASH_SIZE = 8 # Bytes per row hash: collisions are negligible within one page
+
+
+def page_fingerprint(content: bytes) -> bytes:
+    """Fingerprint of a page source (same digest as DocumentCache.content_hash)."""
+    return bytes.fromhex(DocumentCache.content_hash(content))
+
+
+def row_hash(row: List[Any]) -> bytes:
+    return hashlib.blake2b(json.dumps(row, ensure_ascii=False, default=json_default).encode('utf-8'),
+                           digest_size=ROW_HASH_SIZE).digest()
+
+
+def config_signature(selectors: List[AbstractSelector],
+                     record_selector: Optional[AbstractSelector] = None,
+                     parser: Optional[str] = None) -> bytes:
+    """
+    Hash of what turns a page into rows: with other selectors the same page
+    gives other rows, so stored entries with another signature are ignored.
+    """
+    data = {
+        'selectors': [selector.to_dict() for selector in selectors],
+        'record_selector': record_selector.to_dict() if record_selector is not None else None,
+        'parser': parser,
+    }
+    return hashlib.blake2b(json.dumps(data, sort_keys=True).encode('utf-8'), digest_size=8).digest()
+
+
+def delta_columns(columns: List[str]) -> List[str]:
+    """Column names of a delta file."""
+    return [CHANGE_COLUMN] + list(columns)
+
+
+def diff_rows(old_hashes: List[bytes], load_old_rows, new_rows: List[List[Any]]) -> List[List[Any]]:
+    """
+    Delta rows ([change] + row) between the rows of two runs of a page.
+    Rows are compared as multisets of hashes, so a page whose rows only moved
+    gives no delta. Rows have no identity of their own, so a row whose values
+    changed is its old row deleted and its new row added: deleted rows come
+    first, then new ones, which applied in that order to the stored rows give
+    the new ones. The old rows are only loaded when some are gone.
+    """
+    remaining = Counter(old_hashes)
+    added = []
+    for row in new_rows:
+        digest = row_hash(row)
+        if remaining[digest] > 0:
+            remaining[digest] -= 1
+        else:
+            added.append(row)
+
+    removed = []
+    if +remaining:
+        for digest, row in zip(old_hashes, load_old_rows()):
+            if remaining[digest] > 0:
+                remaining[digest] -= 1
+                removed.append(row)
+
+    return [[DELETED] + row for row in removed] + [[NEW] + row for row in added]
+
+
+class ChangeIndex:
+    """
+    One SQLite file, one entry per URL. Writes are buffered and committed
+    every `batch_size` pages (or on flush()). Safe to share between the
+    worker threads of a batch.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHANGE_INDEX, batch_size: int = CHANGE_INDEX_BATCH):
+        self.path = path
+        self.batch_size = batch_size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple] = {} # url -> row of the pages table, not committed yet
+
+    def _entry(self, url: str) -> Optional[Tuple]:
+        """(url, signature, fingerprint, row_hashes, rows, updated_at), or None."""
+        with self._lock:
+            # Buffered entries first: they are newer than the committed ones
+            entry = self._pending.get(url)
+            if entry is None:
+                entry = self._connection.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return entry
+
+    def unchanged(self, url: str, signature: bytes, fingerprint: bytes) -> bool:
+        """True if the page is the same as last time, for the same selectors."""
+        entry = self._entry(url)
+        return entry is not None and entry[1] == signature and entry[2] == fingerprint
+
+    def update(self, url: str, signature: bytes, fingerprint: bytes,
+               rows: List[List[Any]]) -> List[List[Any]]:
+        """Store the page's new rows and return the delta rows since the last run."""
+        entry = self._entry(url)
+        if entry is None or entry[1] != signature:
+            delta = [[NEW] + row for row in rows] # First run of this page (with these selectors)
+        else:
+            hashes = entry[3]
+            old_hashes = [hashes[i:i + ROW_HASH_SIZE] for i in range(0, len(hashes), ROW_HASH_SIZE)]
+            delta = diff_rows(old_hashes, lambda: json.loads(zlib.decompress(entry[4])), rows)
+
+        data = json.dumps(rows, ensure_ascii=False, default=json_default).encode('utf-8')
+        stored = (url, signature, fingerprint, b''.join(row_hash(row) for row in rows),
+                  zlib.compress(data), time.time())
+        with self._lock:
+            self._pending[url] = stored
+            due = len(self._pending) >= self.batch_size
+        if due:
+            self.flush()
+        return delta
+
+    def rows(self, url: str) -> Optional[List[List[Any]]]:
+        """Rows stored for the URL at its last run, or None."""
+        entry = self._entry(url)
+        return json.loads(zlib.decompress(entry[4])) if entry is not None else None
+
+    def flush(self):
+        with self._lock, self._connection:
+            if self._pending:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)", list(self._pending.values()))
+                self._pending.clear()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,32 +1,77 @@
 # Abstract Base Class
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from bs4.element import Tag
 from bs4 import BeautifulSoup
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import soupsieve
+from config import SELECTOR_CACHE_SIZE
+from transforms import ColumnTransform, StepSpec
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def compile_selector(query: str) -> soupsieve.SoupSieve:
+    """
+    Compile a CSS query once and reuse it for every document.
+    The LRU is shared across all selector instances.
+    """
+    return soupsieve.compile(query)
+
+def selector_cache_info():
+    """Hits/misses/size of the compiled selector cache (functools CacheInfo)."""
+    return compile_selector.cache_info()
 
 class AbstractSelector(ABC):
     """
     Abstract base class for all selectors.
     """
 
-    def __init__(self, *selector_queries: str):
+    def __init__(self, *selector_queries: str, name: Optional[str] = None,
+                 transforms: Optional[List[StepSpec]] = None):
         """
         Initialize the selector with one or more CSS selector queries.
+        `name` is the column name used by the savers (default: the first query).
+        `transforms` are cleaning / typing steps run on the extracted column
+        (see transforms.py), e.g. ["strip", {"op": "number"}].
         """
         if not selector_queries:
             raise ValueError("At least one selector query must be provided.")
         self._selectors = list(selector_queries)
+        self._name = name
+        self._transforms = ColumnTransform(transforms) if transforms else None
+
+        # Compile now: invalid CSS fails here, and the pages only hit the cache
+        for query in self._selectors:
+            compile_selector(query)
 
     def find_elements(self, soup: BeautifulSoup) -> List[Tag]:
         """
         Find and return elements from the soup based on the selector queries.
         """
         for query in self._selectors:
-            elements = soup.select(query)
+            if isinstance(soup, Tag):
+                elements = compile_selector(query).select(soup)
+            else:
+                # Non-BeautifulSoup backends (see parsers.py) bring their own CSS engine
+                elements = soup.select(query)
             if elements:
                 return elements
         return []
 
+    def find_first(self, soup: BeautifulSoup) -> Optional[Tag]:
+        """
+        First element matched by the first query that matches anything (None if none).
+        Stops at the first match, cheaper than find_elements inside small records.
+        """
+        for query in self._selectors:
+            if isinstance(soup, Tag):
+                element = compile_selector(query).select_one(soup)
+            else:
+                elements = soup.select(query)
+                element = elements[0] if elements else None
+            if element is not None:
+                return element
+        return None
+
     @abstractmethod
     def extract(self, element: Tag) -> Optional[str]:
         """
@@ -34,6 +79,30 @@ class AbstractSelector(ABC):
         """
         pass
 
+    @property
+    def name(self) -> str:
+        """Column name for this selector."""
+        return self._name or self._selectors[0]
+
+    @property
+    def queries(self) -> List[str]:
+        """The CSS queries, primary first then fallbacks (copy)."""
+        return list(self._selectors)
+
+    @property
+    def transforms(self) -> Optional[ColumnTransform]:
+        """Steps run on the extracted column, None if the values are kept as extracted."""
+        return self._transforms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data for job files and config files (see selector_from_dict)."""
+        data = {'type': 'tag', 'queries': list(self._selectors)}
+        if self._name:
+            data['name'] = self._name
+        if self._transforms is not None:
+            data['transforms'] = self._transforms.to_list()
+        return data
+
     def get_item(self, index: int):
         return self._selectors[index]
 
@@ -59,13 +128,25 @@ class AttributeSelector(AbstractSelector):
     Concrete implementation of BaseSelector for HTML attribute selection.
     """
 
-    def __init__(self, attribute_name: str, *selector_queries: str):
+    def __init__(self, attribute_name: str, *selector_queries: str, name: Optional[str] = None,
+                 transforms: Optional[List[StepSpec]] = None):
         """
         Initialize the selector with an attribute name and one or more CSS selector queries.
         """
-        super().__init__(*selector_queries)
+        super().__init__(*selector_queries, name=name, transforms=transforms)
         self.attribute_name = attribute_name
 
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['type'] = 'attribute'
+        data['attribute'] = self.attribute_name
+        return data
+
+    @property
+    def name(self) -> str:
+        """Column name for this selector (default: "query@attribute")."""
+        return self._name or f"{self._selectors[0]}@{self.attribute_name}"
+
     def extract(self, element: Tag) -> Optional[str]:
         """Extract the specified attribute's value from the HTML element."""
         if element:
@@ -74,17 +155,47 @@ class AttributeSelector(AbstractSelector):
     
 
 
+def selector_from_dict(data: Dict[str, Any]) -> AbstractSelector:
+    """
+    Build a selector from plain data:
+        {"type": "tag", "queries": ["h3 a", ...], "name": "title"}
+        {"type": "attribute", "attribute": "href", "queries": ["h3 a"]}
+    Both take optional "transforms" (see transforms.py).
+    """
+    queries = data.get('queries')
+    if isinstance(queries, str):
+        queries = [queries]
+    if not queries:
+        raise ValueError(f"Selector without queries: {data}")
+
+    selector_type = data.get('type', 'tag')
+    if selector_type == 'tag':
+        return TagSelector(*queries, name=data.get('name'), transforms=data.get('transforms'))
+    if selector_type == 'attribute':
+        if not data.get('attribute'):
+            raise ValueError(f"Attribute selector without attribute name: {data}")
+        return AttributeSelector(data['attribute'], *queries, name=data.get('name'),
+                                 transforms=data.get('transforms'))
+    raise ValueError(f"Selector type not supported: {selector_type}")
+
+
 class GUIRef():
     """
     Class that contains elements from GUI:
         - url
         - format (csv, json, ...)
         - AbstractSelector (TagSelector, AttributeSelector)
+        - parser backend (None -> config.DEFAULT_PARSER)
+        - record selector (optional): one row per matched container element,
+          the column selectors only search inside it (None for a missing field)
     """
-    def __init__(self, url: str, format: str, selectors: List[AbstractSelector]):
+    def __init__(self, url: str, format: str, selectors: List[AbstractSelector], parser: Optional[str] = None,
+                 record_selector: Optional[AbstractSelector] = None):
         self._url = url
         self._format = format
         self._selectors = selectors
+        self._parser = parser
+        self._record_selector = record_selector
 
     # Public properties to provide read-only access without exposing internals
     @property
@@ -97,4 +208,129 @@ class GUIRef():
 
     @property
     def selectors(self) -> List[AbstractSelector]:
-        return self._selectors
\ No newline at end of file
+        return self._selectors
+
+    @property
+    def parser(self) -> Optional[str]:
+        return self._parser
+
+    @property
+    def record_selector(self) -> Optional[AbstractSelector]:
+        return self._record_selector
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain data (JSON-friendly) describing this scraping job."""
+        return {
+            'url': self._url,
+            'format': self._format,
+            'selectors': [selector.to_dict() for selector in self._selectors],
+            'parser': self._parser,
+            'record_selector': self._record_selector.to_dict() if self._record_selector is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GUIRef':
+        return cls(
+            url=data['url'],
+            format=data.get('format', 'csv'),
+            selectors=[selector_from_dict(item) for item in data['selectors']],
+            parser=data.get('parser'),
+            record_selector=selector_from_dict(data['record_selector']) if data.get('record_selector') else None,
+        )
+
+    @property
+    def column_names(self) -> List[str]:
+        """One unique name per selector, in column order (duplicates get a suffix)."""
+        return unique_column_names(self._selectors)
+
+
+def unique_column_names(selectors: List[AbstractSelector]) -> List[str]:
+    """Selector names, with a suffix on duplicates ("title", "title_2", ...)."""
+    names = []
+    for selector in selectors:
+        name = selector.name
+        count = 2
+        while name in names:
+            name = f"{selector.name}_{count}"
+            count += 1
+        names.append(name)
+    return names
+
+
+class PageResult():
+    """
+    Outcome of scraping a single URL in a batch:
+        - url
+        - rows (None if the page failed)
+        - error (Exception raised while scraping, if any)
+    """
+    def __init__(self, url: str, rows: Optional[List[List[Any]]] = None, error: Optional[Exception] = None):
+        self._url = url
+        self._rows = rows
+        self._error = error
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def rows(self) -> Optional[List[List[Any]]]:
+        return self._rows
+
+    @property
+    def error(self) -> Optional[Exception]:
+        return self._error
+
+    @property
+    def ok(self) -> bool:
+        return self._error is None
+
+
+class BatchSummary():
+    """
+    Last message put on the queue by a batch scrape:
+        - total number of URLs processed
+        - number of URLs that failed
+        - cancelled (True if the batch was stopped before its end)
+    """
+    def __init__(self, total: int, failed: int, cancelled: bool = False):
+        self._total = total
+        self._failed = failed
+        self._cancelled = cancelled
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+
+class RowBatch():
+    """
+    Group of rows delivered while a page is still being scraped:
+        - url
+        - rows (a ResultTable from execute_scraping, or any list of rows)
+        - done (True on the last batch of the page)
+    """
+    def __init__(self, url: str, rows: List[List[Any]], done: bool = False):
+        self._url = url
+        self._rows = rows
+        self._done = done
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def rows(self) -> List[List[Any]]:
+        return self._rows
+
+    @property
+    def done(self) -> bool:
+        return self._done
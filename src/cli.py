@@ -0,0 +1,454 @@
+# Headless command-line runner (servers, cron jobs): no tkinter involved.
+# run: python cli.py run config.yaml
+# replay: python cli.py replay config.yaml --archive archive/   # re-extract captured pages, offline
+#
+# Config file (YAML or JSON):
+#     urls: [https://site.com/page/1, ...]   # and/or urls_file: one URL per line
+#     parser: lxml                            # optional, see parsers.py
+#     record_selector: article.product_pod    # optional: one row per record (None for missing fields)
+#     selectors:                              # class_selectors.selector_from_dict
+#       - {name: title, queries: ["h3 a", "h2 a"]}
+#       - {name: link, type: attribute, attribute: href, queries: "h3 a"}
+#       - {name: price, queries: p.price, transforms: [strip, {op: regex, pattern: "[\\d.,]+"}, number]}
+#     output: {format: csv, path: out.csv}    # path "-" is stdout
+#     workers: 8
+#     per_host_limit: 4
+#     parse_workers: 0
+#     cache: true                             # or a cache directory
+#     changes: changes.sqlite3                # incremental: write only new/changed/deleted rows
+#     archive: archive/                       # capture raw responses there (replay: see below)
+#     render: true                            # render pages matching nothing in a browser (playwright)
+#     crawl: {link_selector: {...}, max_depth: 3, max_pages: 1000, same_domain: true}
+#
+# Heavy modules (bs4, requests, the scraping code) are imported by the
+# commands that need them, so --help and `jobs` start instantly.
+import argparse
+import json
+import os
+import sys
+import threading
+from itertools import chain
+from queue import Queue
+from typing import Any, Dict, Iterator, List, Optional
+
+EXIT_OK = 0
+EXIT_FAILED = 1 # Some pages failed, or nothing was extracted
+EXIT_CONFIG = 2 # Same code argparse uses for usage errors
+
+STDOUT_FORMATS = ('csv', 'json', 'jsonl')
+CRAWL_KEYS = ('link_selector', 'max_depth', 'max_pages', 'same_domain')
+
+
+class ConfigError(Exception):
+    pass
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Read a YAML (.yaml/.yml, needs PyYAML) or JSON config file."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            if path.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ConfigError("PyYAML is required for YAML configs (pip install pyyaml).")
+                config = yaml.safe_load(f)
+            else:
+                config = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"Cannot read config: {e}")
+    except ValueError as e: # json.JSONDecodeError
+        raise ConfigError(f"Invalid config {path}: {e}")
+    except Exception as e: # yaml.YAMLError (not importable without PyYAML)
+        if isinstance(e, ConfigError):
+            raise
+        raise ConfigError(f"Invalid config {path}: {e}")
+
+    if not isinstance(config, dict):
+        raise ConfigError(f"Invalid config {path}: expected a mapping at top level.")
+    return config
+
+
+def iter_urls(config: Dict[str, Any], base_dir: str = '') -> Iterator[str]:
+    """URLs from `urls` then `urls_file` (read lazily: lists can be huge)."""
+    yield from config.get('urls') or []
+    urls_file = config.get('urls_file')
+    if urls_file:
+        with open(os.path.join(base_dir, urls_file), encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+
+
+def build_job(config: Dict[str, Any], base_dir: str = '', require_urls: bool = True):
+    """(GUIRef, urls, crawl options) from a config; raises ConfigError."""
+    from class_selectors import GUIRef, selector_from_dict
+    from config import SAVER_REGISTRY
+    from parsers import PARSER_REGISTRY
+
+    if not config.get('selectors'):
+        raise ConfigError("No selectors in config.")
+    try:
+        selectors = [selector_from_dict(data) for data in config['selectors']]
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ConfigError(f"Invalid selector: {e}")
+
+    record_selector = config.get('record_selector')
+    if record_selector is not None:
+        record_data = {'queries': record_selector} if isinstance(record_selector, (str, list)) else record_selector
+        try:
+            record_selector = selector_from_dict(dict(record_data, type='tag'))
+        except (ValueError, TypeError) as e:
+            raise ConfigError(f"Invalid record_selector: {e}")
+
+    output = config.get('output') or {}
+    fmt = output.get('format', 'csv')
+    if fmt not in SAVER_REGISTRY:
+        raise ConfigError(f"Format not supported: {fmt} (available: {', '.join(SAVER_REGISTRY)})")
+    parser = config.get('parser')
+    if parser is not None and parser not in PARSER_REGISTRY:
+        raise ConfigError(f"Parser not supported: {parser}")
+
+    urls_file = config.get('urls_file')
+    if urls_file and not os.path.isfile(os.path.join(base_dir, urls_file)):
+        raise ConfigError(f"urls_file not found: {urls_file}")
+    if require_urls and not config.get('urls') and not urls_file:
+        raise ConfigError("No URLs in config (urls or urls_file).")
+    urls = iter_urls(config, base_dir)
+
+    crawl = config.get('crawl')
+    if crawl is not None:
+        unknown = set(crawl) - set(CRAWL_KEYS)
+        if unknown:
+            raise ConfigError(f"Unknown crawl settings: {', '.join(sorted(unknown))}")
+        crawl = dict(crawl)
+        if crawl.get('link_selector'):
+            link_data = dict(crawl['link_selector'], type='attribute')
+            link_data.setdefault('attribute', 'href')
+            try:
+                crawl['link_selector'] = selector_from_dict(link_data)
+            except ValueError as e:
+                raise ConfigError(f"Invalid link_selector: {e}")
+
+    first_url = config.get('urls')[0] if config.get('urls') else ''
+    return GUIRef(first_url, fmt, selectors, parser, record_selector), urls, crawl
+
+
+def _stats(path: Optional[str]):
+    """ScrapeStats exported to `path` (.prom: Prometheus text, else JSON), None without a path."""
+    if not path:
+        return None
+    from metrics import FileExporter, ScrapeStats
+    return ScrapeStats(exporter=FileExporter(path))
+
+
+def _response_cache(setting, offline: bool):
+    if not setting and not offline:
+        return None
+    from http_cache import ResponseCache
+    if isinstance(setting, str):
+        return ResponseCache(os.path.expanduser(setting), offline=offline)
+    return ResponseCache(offline=offline)
+
+
+def _rows(result_queue: Queue, counts: Dict[str, int]) -> Iterator[List[Any]]:
+    """Rows as pages complete; failed pages and the stats summary are reported on stderr."""
+    from class_selectors import BatchSummary, PageResult
+    from metrics import ScrapeStats
+
+    while True:
+        message = result_queue.get()
+        if isinstance(message, Exception):
+            raise message
+        if isinstance(message, BatchSummary):
+            return
+        if isinstance(message, ScrapeStats):
+            for line in message.summary_lines():
+                print(f"stats: {line}", file=sys.stderr)
+        elif isinstance(message, PageResult):
+            counts['pages'] += 1
+            if message.ok:
+                yield from message.rows
+            else:
+                counts['failed'] += 1
+                print(f"error: {message.url}: {message.error}", file=sys.stderr)
+
+
+def _start(target, *args, **kwargs) -> threading.Thread:
+    """Run the producer in a worker thread, so the main thread can write rows meanwhile."""
+    def runner():
+        try:
+            target(*args, **kwargs)
+        except Exception as e:
+            kwargs['result_queue'].put(e)
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    return thread
+
+
+def _save(rows, fmt: str, output: str, columns: List[str], delta: bool = False) -> int:
+    """Write the rows; returns the exit code."""
+    from data_handler import save_data
+
+    if output == '-' and fmt not in STDOUT_FORMATS:
+        raise ConfigError(f"Format {fmt} cannot be written to stdout, use --output.")
+    try:
+        if delta:
+            # An empty delta is the expected outcome of most incremental runs, not an error
+            rows = iter(rows)
+            first = next(rows, None)
+            if first is None:
+                print("no changes since the last run", file=sys.stderr)
+                return EXIT_OK
+            rows = chain([first], rows)
+        save_data(rows, fmt, output, columns)
+    except ValueError as e: # "No data.", or raised by the producer
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def command_run(args) -> int:
+    config = load_config(args.config)
+    base_dir = os.path.dirname(os.path.abspath(args.config))
+    gui_data, urls, crawl = build_job(config, base_dir)
+
+    output = config.get('output') or {}
+    fmt = args.format or gui_data.format
+    path = args.output or output.get('path') or '-'
+    workers = args.workers or config.get('workers')
+    per_host_limit = config.get('per_host_limit')
+    cache = _response_cache(config.get('cache'), args.offline)
+    # Index path: from the command line as given, from the config relative to it (like urls_file)
+    changes = os.path.expanduser(args.changes) if args.changes else \
+        config.get('changes') and os.path.join(base_dir, os.path.expanduser(config['changes']))
+    if changes and (crawl is not None or args.job_store):
+        raise ConfigError("Incremental runs (changes) only apply to URL lists, not to crawls or stored jobs.")
+
+    renderer = _renderer(args.render or bool(config.get('render')))
+    archive = _archive_writer(args.archive, config.get('archive'), base_dir)
+
+    try:
+        settings = {}
+        stats = _stats(args.stats)
+        if stats is not None:
+            settings['stats'] = stats
+        if workers:
+            settings['max_workers'] = int(workers)
+        if per_host_limit:
+            settings['per_host_limit'] = int(per_host_limit)
+        if archive is not None:
+            settings['archive'] = archive
+        if renderer is not None:
+            settings['renderer'] = renderer
+
+        counts = {'pages': 0, 'failed': 0}
+        result_queue = Queue()
+
+        if crawl is not None or args.job_store:
+            # Crawls and stored jobs both go through crawler.py
+            from crawler import create_crawl_job
+            from job_store import JobStore
+
+            urls = list(urls)
+            crawl = dict(crawl or {})
+            link_selector = crawl.pop('link_selector', None)
+            settings.update(crawl)
+            if link_selector is None: # Plain URL list: every URL is a page to scrape
+                settings.setdefault('max_pages', len(urls))
+                settings['max_depth'] = 0
+            if args.job_store:
+                store = JobStore(os.path.expanduser(args.job_store))
+                settings.pop('stats', None) # Not stored settings, given to this run only
+                settings.pop('archive', None)
+                settings.pop('renderer', None)
+                job_id = create_crawl_job(store, gui_data, link_selector, urls, **settings)
+                print(f"job: {job_id}", file=sys.stderr)
+                return _run_stored(store, job_id, args.format, path, cache, counts, stats, archive, renderer)
+            _start(_crawl, gui_data, link_selector, urls, settings, cache, result_queue=result_queue)
+        else:
+            from scraper_logic import execute_batch_scraping
+            parse_workers = args.parse_workers if args.parse_workers is not None else config.get('parse_workers', 0)
+            if changes:
+                from change_index import ChangeIndex, delta_columns
+                settings['index'] = ChangeIndex(changes)
+            _start(execute_batch_scraping, urls, gui_data.selectors, parse_workers=int(parse_workers),
+                   parser=gui_data.parser, cache=cache, record_selector=gui_data.record_selector,
+                   result_queue=result_queue, **settings)
+
+        if changes:
+            # The index is updated before the rows are written: a failed write loses that delta
+            with settings['index']:
+                code = _save(_rows(result_queue, counts), fmt, path, delta_columns(gui_data.column_names), delta=True)
+        else:
+            code = _save(_rows(result_queue, counts), fmt, path, gui_data.column_names)
+        return _report(counts, code)
+    finally:
+        if archive is not None:
+            archive.close() # After the producer is done: every record is indexed
+        if renderer is not None:
+            renderer.close()
+
+
+def _renderer(enabled: bool):
+    """BrowserPool for the rendered-DOM fallback, or None; ConfigError without playwright."""
+    if not enabled:
+        return None
+    from renderer import BrowserPool, HAS_PLAYWRIGHT
+    if not HAS_PLAYWRIGHT:
+        raise ConfigError("playwright is required to render pages "
+                          "(pip install playwright && playwright install chromium).")
+    return BrowserPool()
+
+
+def _archive_path(argument: Optional[str], setting: Optional[str], base_dir: str) -> Optional[str]:
+    """Archive directory: --archive as given, or the config `archive` relative to it (like urls_file)."""
+    if argument:
+        return os.path.expanduser(argument)
+    return setting and os.path.join(base_dir, os.path.expanduser(setting))
+
+
+def _archive_writer(argument: Optional[str], setting: Optional[str], base_dir: str):
+    directory = _archive_path(argument, setting, base_dir)
+    if not directory:
+        return None
+    from archive import ArchiveWriter
+    return ArchiveWriter(directory)
+
+
+def _crawl(gui_data, link_selector, urls, settings, cache, result_queue):
+    from crawler import Crawler
+    crawler = Crawler(gui_data.selectors, link_selector, parser=gui_data.parser, cache=cache,
+                      record_selector=gui_data.record_selector, **settings)
+    crawler.run(urls, result_queue)
+
+
+def _run_stored(store, job_id: str, fmt: str, path: str, cache, counts: Dict[str, int], stats=None,
+                archive=None, renderer=None) -> int:
+    """Run a stored job to the end, then write every row it holds (earlier runs included)."""
+    from crawler import run_job
+
+    result_queue = Queue()
+    with store:
+        gui_data, _ = store.load_job(job_id)
+        _start(run_job, store, job_id, cache=cache, stats=stats, archive=archive, renderer=renderer,
+               result_queue=result_queue)
+        for _ in _rows(result_queue, counts): # Rows are recorded in the store
+            pass
+        code = _save(store.iter_rows(job_id), fmt or gui_data.format, path, gui_data.column_names)
+    return _report(counts, code)
+
+
+def _report(counts: Dict[str, int], code: int) -> int:
+    print(f"{counts['pages']} pages, {counts['failed']} failed", file=sys.stderr)
+    if counts['failed']:
+        return EXIT_FAILED
+    return code
+
+
+def command_resume(args) -> int:
+    from job_store import JobStore
+    store = JobStore(os.path.expanduser(args.job_store))
+    try:
+        store.load_job(args.job_id)
+    except KeyError as e:
+        store.close()
+        raise ConfigError(str(e.args[0]))
+    counts = {'pages': 0, 'failed': 0}
+    return _run_stored(store, args.job_id, args.format, args.output or '-',
+                       _response_cache(None, args.offline), counts, _stats(args.stats))
+
+
+def command_replay(args) -> int:
+    """Write the rows of archived pages (the config URLs, or all of them), without the network."""
+    from replay import execute_replay
+
+    config = load_config(args.config)
+    base_dir = os.path.dirname(os.path.abspath(args.config))
+    gui_data, urls, _ = build_job(config, base_dir, require_urls=False)
+    directory = _archive_path(args.archive, config.get('archive'), base_dir)
+    if not directory or not os.path.isdir(directory):
+        raise ConfigError(f"No archive to replay: {directory or 'use --archive or archive: in the config'}")
+
+    output = config.get('output') or {}
+    parse_workers = args.parse_workers if args.parse_workers is not None else config.get('parse_workers')
+    counts = {'pages': 0, 'failed': 0}
+    result_queue = Queue()
+    has_urls = config.get('urls') or config.get('urls_file')
+    _start(execute_replay, directory, gui_data.selectors, urls=urls if has_urls else None,
+           parse_workers=parse_workers, parser=gui_data.parser, record_selector=gui_data.record_selector,
+           stats=_stats(args.stats), result_queue=result_queue)
+    code = _save(_rows(result_queue, counts), args.format or gui_data.format,
+                 args.output or output.get('path') or '-', gui_data.column_names)
+    return _report(counts, code)
+
+
+def command_jobs(args) -> int:
+    from job_store import JobStore
+    with JobStore(os.path.expanduser(args.job_store)) as store:
+        for job in store.list_jobs():
+            print(f"{job['id']}  {job['status']:<8} done={job['done']} "
+                  f"failed={job['failed']} pending={job['pending']}")
+    return EXIT_OK
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    default_store = '~/.cache/web-scraper/jobs.sqlite3' # config.DEFAULT_JOB_STORE, without importing it
+
+    arg_parser = argparse.ArgumentParser(prog='cli.py', description="Headless web scraper.")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="scrape (or crawl) from a YAML/JSON config file")
+    run.add_argument('config')
+    run.add_argument('-o', '--output', help='output file, "-" for stdout (default: config output.path)')
+    run.add_argument('-f', '--format', help='save format (default: config output.format, csv)')
+    run.add_argument('-w', '--workers', type=int, help='concurrent fetches')
+    run.add_argument('--parse-workers', type=int, help='parsing processes (0: parse in the fetch threads)')
+    run.add_argument('--job-store', help='record the run as a resumable job in this SQLite file')
+    run.add_argument('--offline', action='store_true', help='serve pages from the cache only')
+    run.add_argument('--stats', help='write per-stage metrics here (.prom: Prometheus text, else JSON)')
+    run.add_argument('--changes', help='change index (SQLite): write only rows new or deleted '
+                                       'since the last run, skip unchanged pages')
+    run.add_argument('--archive', help='capture every fetched response in this archive directory (see replay)')
+    run.add_argument('--render', action='store_true',
+                     help='render pages whose HTML matches nothing in a headless browser (needs playwright)')
+    run.set_defaults(handler=command_run)
+
+    replay = commands.add_parser('replay', help="extract rows from archived pages, without the network")
+    replay.add_argument('config')
+    replay.add_argument('--archive', help='archive directory (default: config archive)')
+    replay.add_argument('-o', '--output', help='output file, "-" for stdout (default: config output.path)')
+    replay.add_argument('-f', '--format', help='save format (default: config output.format, csv)')
+    replay.add_argument('--parse-workers', type=int, help='parsing processes (default: one per CPU, 0: in-process)')
+    replay.add_argument('--stats', help='write per-stage metrics here (.prom: Prometheus text, else JSON)')
+    replay.set_defaults(handler=command_replay)
+
+    resume = commands.add_parser('resume', help="resume a stored job and write all its rows")
+    resume.add_argument('job_id')
+    resume.add_argument('-o', '--output', help='output file, "-" for stdout (default)')
+    resume.add_argument('-f', '--format', help='save format (default: the job format)')
+    resume.add_argument('--job-store', default=default_store)
+    resume.add_argument('--offline', action='store_true', help='serve pages from the cache only')
+    resume.add_argument('--stats', help='write per-stage metrics here (.prom: Prometheus text, else JSON)')
+    resume.set_defaults(handler=command_resume)
+
+    jobs = commands.add_parser('jobs', help="list stored jobs")
+    jobs.add_argument('--job-store', default=default_store)
+    jobs.set_defaults(handler=command_jobs)
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except ConfigError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_CONFIG
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,116 @@
-from utils import _save_as_csv, _save_as_json
-from typing import Callable, Dict, List, Any
+from utils import (_save_as_csv, _save_as_json, _save_as_jsonl,
+                   _save_as_csv_gz, _save_as_jsonl_gz, _save_as_csv_zst, _save_as_jsonl_zst,
+                   _save_as_parquet, _save_as_arrow, HAS_PYARROW, HAS_ZSTD)
+import os
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
 
 # Dispatcher dictionary
 # Mapping data formats to their respective functions
 # Format: Dict[str, function]
-SAVER_REGISTRY: Dict[str, Callable[[List[List[Any]], str], None]] = {
+# Savers receive any iterable of rows (list, generator...) and write incrementally,
+# plus the column names from the selectors: saver(results, filepath, columns=None)
+SAVER_REGISTRY: Dict[str, Callable[[Iterable[List[Any]], str, Optional[List[str]]], None]] = {
     'csv': _save_as_csv,
     'json': _save_as_json,
-}
\ No newline at end of file
+    'jsonl': _save_as_jsonl,
+    'csv.gz': _save_as_csv_gz,
+    'jsonl.gz': _save_as_jsonl_gz,
+}
+
+# Formats backed by optional packages
+if HAS_ZSTD:
+    SAVER_REGISTRY['csv.zst'] = _save_as_csv_zst
+    SAVER_REGISTRY['jsonl.zst'] = _save_as_jsonl_zst
+if HAS_PYARROW:
+    SAVER_REGISTRY['parquet'] = _save_as_parquet
+    SAVER_REGISTRY['arrow'] = _save_as_arrow
+
+# Label and file extension shown in the save dialog, per format
+# Format: Dict[str, (label, extension)]
+FORMAT_DESCRIPTIONS: Dict[str, Tuple[str, str]] = {
+    'csv': ('CSV', '.csv'),
+    'json': ('JSON', '.json'),
+    'jsonl': ('JSON Lines', '.jsonl'),
+    'csv.gz': ('CSV (gzip)', '.csv.gz'),
+    'jsonl.gz': ('JSON Lines (gzip)', '.jsonl.gz'),
+    'csv.zst': ('CSV (zstd)', '.csv.zst'),
+    'jsonl.zst': ('JSON Lines (zstd)', '.jsonl.zst'),
+    'parquet': ('Parquet', '.parquet'),
+    'arrow': ('Arrow IPC', '.arrow'),
+}
+
+# Batch scraping defaults
+DEFAULT_MAX_WORKERS = 8      # Worker threads fetching pages concurrently
+DEFAULT_PER_HOST_LIMIT = 4   # Max concurrent requests sent to the same host
+REQUEST_TIMEOUT = 30         # Seconds before a single request is abandoned
+DEFAULT_PARSE_WORKERS = 0    # Parsing processes (0 = parse in the fetch threads)
+
+# asyncio backend defaults
+ASYNC_MAX_IN_FLIGHT = 500    # Requests kept open at the same time on the event loop
+PARSE_QUEUE_SIZE = 100       # Fetched pages waiting for the parser before fetching pauses
+
+# HTML parser backend used when a GUIRef does not choose one (see parsers.py)
+DEFAULT_PARSER = 'html.parser'
+
+# Compiled CSS selectors kept in memory, shared by every selector instance
+SELECTOR_CACHE_SIZE = 1024
+
+# Streaming mode (see streaming.py)
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read from the socket at a time
+STREAM_BATCH_SIZE = 500        # Rows per RowBatch put on the queue
+
+# On-disk HTTP response cache (see http_cache.py)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'web-scraper', 'http')
+CACHE_MAX_BYTES = 512 * 1024 * 1024   # Least recently used pages are evicted past this size
+CACHE_MAX_AGE = 7 * 24 * 3600         # Seconds since a page was received before it is evicted
+
+# Parsed documents kept in memory for fast selector iteration (see document_cache.py)
+DOCUMENT_CACHE_SIZE = 8                     # Documents kept at most
+DOCUMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Total size of their HTML source
+
+# Crawler defaults (see crawler.py)
+CRAWL_MAX_DEPTH = 3       # Link hops from the seed URLs
+CRAWL_MAX_PAGES = 1000    # Pages fetched at most per crawl
+BLOOM_ERROR_RATE = 0.001  # False positive rate of the Bloom filter frontier dedup
+
+# Per-host politeness (see scheduler.py)
+HOST_RATE = 5.0             # Initial requests per second per host
+HOST_MIN_RATE = 0.2         # The adaptive rate never goes below this
+HOST_MAX_RATE = 50.0        # ... nor above this
+HOST_BURST = 5              # Requests allowed back to back before the rate applies
+MAX_RETRIES = 4             # Retries on 429 / 5xx / connection errors
+BACKOFF_BASE = 0.5          # Seconds, doubled at each retry (with full jitter)
+BACKOFF_MAX = 60.0          # Longest wait between two retries
+
+# Resumable jobs (see job_store.py)
+DEFAULT_JOB_STORE = os.path.join(os.path.expanduser('~'), '.cache', 'web-scraper', 'jobs.sqlite3')
+JOB_STORE_BATCH = 200     # Pages recorded per transaction
+
+# Column transforms (see transforms.py): columns at least this long use pandas
+# when installed, shorter ones the plain Python loop (cheaper to start)
+TRANSFORM_VECTOR_MIN_ROWS = 5000
+
+# Incremental re-scrapes (see change_index.py)
+DEFAULT_CHANGE_INDEX = os.path.join(os.path.expanduser('~'), '.cache', 'web-scraper', 'changes.sqlite3')
+CHANGE_INDEX_BATCH = 200  # Pages recorded per transaction
+
+# Offline archive (see archive.py / replay.py)
+ARCHIVE_SEGMENT_BYTES = 1024 ** 3 # A new segment file past 1 GiB
+ARCHIVE_INDEX_BATCH = 200         # Records indexed per transaction
+REPLAY_CHUNK = 16                 # Archived pages per task sent to a replay process
+
+# Rendered-DOM fallback (see renderer.py, needs playwright)
+RENDER_POOL_SIZE = 2                         # Warm browser contexts: pages rendered at the same time
+RENDER_TIMEOUT = 30.0                        # Seconds to load a page
+RENDER_WAIT = 5.0                            # Seconds to wait for the selectors to appear once loaded
+RENDER_BLOCKED_TYPES = ('image', 'font', 'media') # Requests not worth loading to read the DOM
+
+# Jobs (jobs.JobManager): scrapes running at the same time, e.g. from the GUI
+MAX_CONCURRENT_JOBS = 4
+
+# GUI rendering: rows arrive in batches and are drawn a chunk per tick,
+# in a table capped to a window of rows (all rows are kept for saving)
+GUI_ROW_BATCH = 1000      # Rows per RowBatch sent by the worker
+GUI_RENDER_CHUNK = 500    # Rows inserted in the table per tick
+GUI_TICK_MS = 50          # Delay between two ticks of the queue polling
+GUI_VIEW_MAX_ROWS = 5000  # Rows shown at most in the table
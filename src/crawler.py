@@ -0,0 +1,347 @@
+# Pagination / link-following crawler
+# A designated AttributeSelector (e.g. href on "a.next") grows a URL frontier;
+# every fetched page is scraped with the usual column selectors.
+import hashlib
+import math
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from queue import Queue
+from typing import Iterable, List, Optional, Tuple, Any
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+
+import scraper_logic as sl
+from class_selectors import (AbstractSelector, AttributeSelector, BatchSummary, GUIRef,
+                             PageResult, selector_from_dict)
+from config import (BLOOM_ERROR_RATE, CRAWL_MAX_DEPTH, CRAWL_MAX_PAGES,
+                    DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT)
+from archive import ArchiveWriter
+from http_cache import ResponseCache
+from renderer import BrowserPool
+from scheduler import HostScheduler
+from job_store import JobStore
+from metrics import ScrapeStats, stage
+from jobs import CancelToken, ScrapeCancelled, check_cancelled
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used for deduplication: lowercase scheme and host,
+    no default port, no fragment, '/' for an empty path, sorted query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def _digest(url: str) -> bytes:
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+class SeenSet:
+    """
+    Exact set of visited URLs, storing a 64-bit hash (an int) instead of the
+    string: a few dozen bytes per URL whatever its length.
+    """
+
+    def __init__(self):
+        self._hashes = set()
+
+    def add(self, url: str) -> bool:
+        """Add the URL, return False if it was already there."""
+        key = int.from_bytes(_digest(url)[:8], 'big')
+        if key in self._hashes:
+            return False
+        self._hashes.add(key)
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return int.from_bytes(_digest(url)[:8], 'big') in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class BloomFilter:
+    """
+    Probabilistic set for huge crawls: fixed memory (about 1.8 bytes per URL
+    at 0.1% error). A false positive means a new URL is skipped, never fetched twice.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be >= 1 and error_rate between 0 and 1.")
+        self._size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hash_count = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url: str):
+        # Double hashing: k positions from two 64-bit hashes
+        digest = _digest(url)
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self._size for i in range(self._hash_count)]
+
+    def add(self, url: str) -> bool:
+        """Add the URL, return False if it was (probably) already there."""
+        new = False
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, url: str) -> bool:
+        return all(self._bits[p // 8] & (1 << (p % 8)) for p in self._positions(url))
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class Crawler:
+    """
+    Breadth-first crawler feeding a pool of fetch workers.
+
+    Every page is parsed once: the column selectors produce its rows and the
+    link selector produces the next URLs (resolved with urljoin, normalized,
+    deduplicated, optionally limited to the seed domains).
+    Same queue contract as scraper_logic.execute_batch_scraping.
+    Without a link selector only the seed URLs are scraped (a plain batch).
+    With a record selector every page gives one row per record (see sl.build_rows).
+    """
+
+    def __init__(self,
+                 column_jobs: List[AbstractSelector],
+                 link_selector: Optional[AttributeSelector],
+                 max_depth: int = CRAWL_MAX_DEPTH,
+                 max_pages: int = CRAWL_MAX_PAGES,
+                 same_domain: bool = True,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 seen=None,
+                 session: Optional[requests.Session] = None,
+                 cache: Optional[ResponseCache] = None,
+                 parser: Optional[str] = None,
+                 scheduler: Optional[HostScheduler] = None,
+                 record_selector: Optional[AbstractSelector] = None,
+                 stats: Optional[ScrapeStats] = None,
+                 cancel: Optional[CancelToken] = None,
+                 archive: Optional[ArchiveWriter] = None,
+                 renderer: Optional[BrowserPool] = None):
+        if max_depth < 0 or max_pages < 1 or max_workers < 1:
+            raise ValueError("max_depth must be >= 0, max_pages and max_workers >= 1.")
+        self.column_jobs = column_jobs
+        self.link_selector = link_selector
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_domain = same_domain
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        # SeenSet by default, BloomFilter (or anything with add()) for huge crawls
+        self.seen = seen if seen is not None else SeenSet()
+        self.session = session
+        self.cache = cache
+        self.parser = parser
+        self.scheduler = scheduler # Politeness per host (rate, retries), see scheduler.py
+        self.record_selector = record_selector
+        self.stats = stats # Put on the queue (finished) before the BatchSummary
+        # Once cancelled: no new page starts, in-flight ones stop at the next step
+        # and stay pending in a job store, so the job can be resumed
+        self.cancel = cancel
+        self.archive = archive # Every fetched page is captured there (see archive.py)
+        # Pages whose HTML matches no column are rendered in a browser (see renderer.py):
+        # their rows and links then come from the rendered DOM
+        self.renderer = renderer
+
+    def _scrape(self, url: str, scheduler: HostScheduler, session) -> Tuple[List[List[Any]], List[str]]:
+        stats = self.stats
+
+        def fetch():
+            with stage(stats, 'fetch'):
+                return sl.fetch_page(url, session, cache=self.cache, cancel=self.cancel,
+                                     archive=self.archive)
+
+        response = scheduler.call(url, fetch, self.cancel)
+        if stats is not None:
+            stats.add_page(len(response.content), getattr(response, 'from_cache', False))
+        check_cancelled(self.cancel)
+        with stage(stats, 'parse'):
+            soup = sl.soupify(response.content, self.parser)
+        rows = sl.build_rows(soup, self.column_jobs, response.url, self.record_selector, stats)
+        if self.renderer is not None and sl.no_matches(rows):
+            # Render times do not adapt the host's rate (see execute_batch_scraping)
+            response = scheduler.call(url, lambda: sl.render_page(url, self.renderer, self.column_jobs,
+                                                                  self.record_selector, stats, self.cancel),
+                                      self.cancel, record_latency=False)
+            check_cancelled(self.cancel)
+            with stage(stats, 'parse'):
+                soup = sl.soupify(response.content, self.parser)
+            rows = sl.build_rows(soup, self.column_jobs, response.url, self.record_selector, stats)
+        links = []
+        if self.link_selector is not None:
+            links = [
+                urljoin(response.url, link)
+                for link in (self.link_selector.extract(e) for e in self.link_selector.find_elements(soup))
+                if isinstance(link, str) and link
+            ]
+        return rows, links
+
+    def _cancelled(self) -> bool:
+        return self.cancel is not None and self.cancel.cancelled
+
+    def _accept(self, url: str, allowed_hosts) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            return False
+        return not self.same_domain or (parts.hostname or '').lower() in allowed_hosts
+
+    def run(self, seed_urls: Iterable[str], result_queue: Queue,
+            store: Optional[JobStore] = None, job_id: Optional[str] = None) -> BatchSummary:
+        """
+        Crawl from the seeds, put one PageResult per page, then a BatchSummary.
+        With a JobStore every page, its rows and its links are recorded under
+        job_id; a job run again resumes from its stored frontier, without
+        fetching the finished pages again (they count toward max_pages).
+        """
+        if (store is None) != (job_id is None):
+            raise ValueError("store and job_id must be given together.")
+
+        frontier = deque()
+        budget = self.max_pages
+        if store is not None:
+            pending, known, finished = store.load_frontier(job_id)
+            for url in known:
+                self.seen.add(url)
+            frontier.extend(pending)
+            budget -= finished
+
+        allowed_hosts = set()
+        new_seeds = []
+        for url in seed_urls:
+            url = normalize_url(url)
+            allowed_hosts.add((urlsplit(url).hostname or '').lower())
+            if self.seen.add(url):
+                frontier.append((url, 0))
+                new_seeds.append((url, 0))
+        if store is not None and new_seeds:
+            store.add_urls(job_id, new_seeds)
+
+        session = self.session if self.session is not None else sl.create_session(self.max_workers)
+        scheduler = self.scheduler if self.scheduler is not None else HostScheduler(self.per_host_limit)
+        submitted = failed = 0
+        running = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while frontier or running:
+                    # Keep every worker busy while the page budget allows
+                    while frontier and len(running) < self.max_workers and submitted < budget \
+                            and not self._cancelled():
+                        url, depth = frontier.popleft()
+                        running[executor.submit(self._scrape, url, scheduler, session)] = (url, depth)
+                        submitted += 1
+
+                    if not running:
+                        break # Budget exhausted with URLs left in the frontier
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url, depth = running.pop(future)
+                        try:
+                            rows, links = future.result()
+                        except ScrapeCancelled:
+                            submitted -= 1 # Not scraped: left pending in the store
+                            continue
+                        except Exception as e:
+                            failed += 1
+                            if self.stats is not None:
+                                self.stats.add_failure()
+                            if store is not None:
+                                store.record_page(job_id, url, None)
+                            result_queue.put(PageResult(url, error=e))
+                            continue
+
+                        new_links = []
+                        if depth < self.max_depth:
+                            for link in links:
+                                link = normalize_url(link)
+                                if self._accept(link, allowed_hosts) and self.seen.add(link):
+                                    new_links.append((link, depth + 1))
+                        frontier.extend(new_links)
+
+                        if store is not None:
+                            store.record_page(job_id, url, rows, new_links)
+                        result_queue.put(PageResult(url, rows))
+        finally:
+            if store is not None:
+                store.flush()
+            if self.archive is not None:
+                self.archive.flush()
+            if self.session is None:
+                session.close()
+
+        cancelled = self._cancelled()
+        if store is not None:
+            store.set_status(job_id, 'done' if not frontier and not cancelled else 'stopped')
+            store.flush()
+
+        summary = BatchSummary(submitted, failed, cancelled)
+        if self.stats is not None:
+            result_queue.put(self.stats.finish())
+        result_queue.put(summary)
+        return summary
+
+
+def execute_crawl(gui_data: GUIRef, link_selector: Optional[AttributeSelector], result_queue: Queue, **options) -> BatchSummary:
+    """Crawl starting from gui_data.url, meant to be the target of a worker thread."""
+    crawler = Crawler(gui_data.selectors, link_selector, parser=gui_data.parser,
+                      record_selector=gui_data.record_selector, **options)
+    return crawler.run([gui_data.url], result_queue)
+
+
+# Crawl settings stored with a job (JSON-friendly, see JobStore.create_job)
+JOB_OPTIONS = ('max_depth', 'max_pages', 'same_domain', 'max_workers', 'per_host_limit')
+
+
+def create_crawl_job(store: JobStore, gui_data: GUIRef,
+                     link_selector: Optional[AttributeSelector] = None,
+                     urls: Optional[Iterable[str]] = None, **options) -> str:
+    """
+    Record a resumable crawl (seeds: `urls`, or gui_data.url) and return its id.
+    `options` are Crawler settings among JOB_OPTIONS.
+    """
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise ValueError(f"Options not supported in a job: {', '.join(sorted(unknown))}")
+    stored = dict(options)
+    stored['link_selector'] = link_selector.to_dict() if link_selector is not None else None
+    seeds = [normalize_url(url) for url in (urls or [gui_data.url])]
+    return store.create_job(gui_data, stored, seeds)
+
+
+def run_job(store: JobStore, job_id: str, result_queue: Queue, **overrides) -> BatchSummary:
+    """
+    Run or resume a stored job. `overrides` replace stored settings for this
+    run only (e.g. max_workers, or cache / scheduler objects).
+    """
+    gui_data, options = store.load_job(job_id)
+    options = dict(options)
+    link_data = options.pop('link_selector', None)
+    link_selector = selector_from_dict(link_data) if link_data else None
+    options.update(overrides)
+
+    store.set_status(job_id, 'running')
+    crawler = Crawler(gui_data.selectors, link_selector, parser=gui_data.parser,
+                      record_selector=gui_data.record_selector, **options)
+    return crawler.run(store.seed_urls(job_id), result_queue, store=store, job_id=job_id)
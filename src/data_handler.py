@@ -1,14 +1,31 @@
 from config import SAVER_REGISTRY
-from typing import List, Any
+from class_selectors import PageResult, BatchSummary, RowBatch
+from itertools import chain
+from queue import Queue
+from collections.abc import Sized
+from typing import Iterable, Iterator, List, Any, Optional
 
 # Dispatcher dictionary (in config.py)
 
-def save_data(results: List[List[Any]], format: str, filepath: str):
+def save_data(results: Iterable[List[Any]], format: str, filepath: str, columns: Optional[List[str]] = None):
     """
     Save results to a file in the specified format.
+    `results` can be a list or any iterator of rows (e.g. rows_from_queue):
+    rows are written as they arrive, never all held in memory.
+    `columns` are the column names (GUIRef.column_names), used by columnar formats.
     """
-    if not results: 
-        raise ValueError("No data.") 
+    if isinstance(results, Sized):
+        # Lists and ResultTables go to the saver as they are (columnar fast paths)
+        if len(results) == 0:
+            raise ValueError("No data.")
+        rows = results
+    else:
+        # Peek the first row, so that iterators can be checked for emptiness too
+        rows = iter(results)
+        first = next(rows, None)
+        if first is None:
+            raise ValueError("No data.")
+        rows = chain([first], rows)
 
     # Search for the appropriate saving function
     saver_function = SAVER_REGISTRY.get(format)
@@ -19,6 +36,31 @@ def save_data(results: List[List[Any]], format: str, filepath: str):
 
     # Run the saving function
     try:
-        saver_function(results, filepath)
+        saver_function(rows, filepath, columns)
     except IOError as e:
         raise Exception(f"Error during writing: {e}")
+
+def rows_from_queue(result_queue: Queue) -> Iterator[List[Any]]:
+    """
+    Yield rows from a result queue while the scraping is still running,
+    until the producer signals the end (list, BatchSummary or the last RowBatch).
+    Pages that failed in a batch are skipped; any other Exception is raised.
+    ScrapeStats messages are skipped too (read them from the queue to show them).
+    """
+    while True:
+        message = result_queue.get()
+
+        if isinstance(message, Exception):
+            raise message
+        if isinstance(message, list): # execute_scraping: the whole result at once
+            yield from message
+            return
+        if isinstance(message, PageResult):
+            if message.ok:
+                yield from message.rows
+        elif isinstance(message, RowBatch):
+            yield from message.rows
+            if message.done:
+                return
+        elif isinstance(message, BatchSummary):
+            return
@@ -0,0 +1,88 @@
+# In-memory LRU of parsed documents
+# When only the selectors change between two runs on the same URL, the page
+# does not need to be parsed again: it is still revalidated (a 304 with the
+# ResponseCache), and select_elements/format_results run directly on the
+# stored document as long as the page source has the same hash.
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from config import DOCUMENT_CACHE_MAX_BYTES, DOCUMENT_CACHE_SIZE
+
+
+class CachedDocument:
+    """A parsed page and what is needed to reuse it."""
+
+    __slots__ = ('document', 'base_url', 'content_hash', 'size')
+
+    def __init__(self, document: Any, base_url: str, content_hash: str, size: int):
+        self.document = document
+        self.base_url = base_url         # Final URL after redirects, for urljoin
+        self.content_hash = content_hash
+        self.size = size                 # Bytes of HTML source, for the memory bound
+
+
+class DocumentCache:
+    """
+    LRU of parsed documents keyed by (URL, parser backend), each tagged with the
+    hash of its HTML source. Bounded both in count and in total source size
+    (a parsed tree takes memory proportional to it). Thread-safe.
+    """
+
+    def __init__(self, max_documents: int = DOCUMENT_CACHE_SIZE, max_bytes: int = DOCUMENT_CACHE_MAX_BYTES):
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], CachedDocument]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def get(self, url: str, parser: Optional[str] = None) -> Optional[CachedDocument]:
+        """Most recent document for the URL, or None."""
+        with self._lock:
+            entry = self._entries.get((url, parser))
+            if entry is not None:
+                self._entries.move_to_end((url, parser))
+            return entry
+
+    def contains(self, url: str, parser: Optional[str] = None) -> bool:
+        with self._lock:
+            return (url, parser) in self._entries
+
+    def get_or_parse(self, url: str, content: bytes, base_url: str,
+                     parse: Callable[[bytes], Any], parser: Optional[str] = None) -> CachedDocument:
+        """
+        Return the stored document if `content` is unchanged, otherwise
+        parse it with `parse(content)` and store the result.
+        """
+        digest = self.content_hash(content)
+        entry = self.get(url, parser)
+        if entry is not None and entry.content_hash == digest:
+            return entry
+
+        # Parse outside the lock: other threads keep using the cache meanwhile
+        entry = CachedDocument(parse(content), base_url, digest, len(content))
+        with self._lock:
+            previous = self._entries.pop((url, parser), None)
+            if previous is not None:
+                self._bytes -= previous.size
+            if entry.size <= self.max_bytes:
+                self._entries[(url, parser)] = entry
+                self._bytes += entry.size
+            # Evict the least recently used documents
+            while self._entries and (len(self._entries) > self.max_documents or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
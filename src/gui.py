@@ -1,13 +1,48 @@
 import tkinter as tk
-import threading
 import scraper_logic as sl
 from queue import Queue, Empty
 from tkinter import ttk
 from tkinter import scrolledtext
-from class_selectors import GUIRef, AbstractSelector, TagSelector, AttributeSelector
+from class_selectors import GUIRef, AbstractSelector, TagSelector, AttributeSelector, RowBatch, PageResult
 from typing import List
 from tkinter import scrolledtext, filedialog
 from data_handler import save_data
+from collections import deque
+from itertools import islice
+from config import (SAVER_REGISTRY, FORMAT_DESCRIPTIONS, GUI_ROW_BATCH, GUI_RENDER_CHUNK,
+                    GUI_TICK_MS, GUI_VIEW_MAX_ROWS)
+from parsers import available_parsers, resolve_parser
+from http_cache import ResponseCache
+from document_cache import DocumentCache
+from metrics import ScrapeStats
+from result_table import ResultTable
+from renderer import BrowserPool, HAS_PLAYWRIGHT
+from jobs import JobManager, JobMessage, JobStatus, ScrapeCancelled, CANCELLED
+from job_store import JobStore
+from crawler import run_job
+
+class JobView:
+    """What the GUI keeps about one submitted job (its rows, state and stats)."""
+
+    def __init__(self, job, url: str, columns: List[str]):
+        self.job = job
+        self.url = url
+        self.columns = columns
+        self.from_cache = False # A parsed page was reused (from the run's ScrapeStats)
+        self.rows = ResultTable() # All rows, for saving (compact, see result_table.py)
+        self.state = job.state
+        self.error = None
+        self.stats_lines = []
+        self.finished = False
+
+def resume_stored_job(store: JobStore, job_id: str, result_queue, **options):
+    """
+    Target of a resumed job: the rows of its earlier runs (one RowBatch),
+    then crawler.run_job, which sends one PageResult per page.
+    """
+    gui_data, _ = store.load_job(job_id)
+    result_queue.put(RowBatch(gui_data.url, ResultTable.from_rows(store.iter_rows(job_id))))
+    return run_job(store, job_id, result_queue, **options)
 
 class WebScraperGUI:
     """
@@ -22,31 +57,35 @@ class WebScraperGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Web Scraper GUI")
-        self.root.geometry("700x600")
+        self.root.geometry("700x800")
         
         # --- Style ---
         self.style = ttk.Style()
         self.style.theme_use('clam') 
 
         
-        # Queue used to receive results from the scraping thread
+        # Queue used to receive results from the scraping jobs (JobMessage)
         self.result_queue = Queue()
+        # Jobs run on a shared pool, several at a time, each cancellable
+        self.job_manager = JobManager(self.result_queue)
+        self.job_views = {} # job_id -> JobView
+        self.current_job_id = None # Job shown in the results table
 
         self.last_results = None # Memory of last results
         self.save_button = None # Reference to the Save button
         self.run_button = None
 
-        self.save_dialog_configs = {
-            'csv': {
-                'filetypes': [('CSV files', '*.csv'), ('All files', '*.*')],
-                'defaultextension': '.csv'
-            },
-            'json': {
-                'filetypes': [('JSON files', '*.json'), ('All files', '*.*')],
-                'defaultextension': '.json'
-            }
-            # Future formats can be added here
-        }
+        self.last_columns = None # Column names of the last results
+        self.pending_rows = deque() # Rows of the shown job waiting to be drawn in the table
+        self.shown_rows = 0 # Rows drawn in the table (at most GUI_VIEW_MAX_ROWS)
+        self.response_cache = None # Created on first use (see get_response_cache)
+        self.renderer = None # Headless browser pool, started on first use (see get_renderer)
+        self.job_store = None # Resumable jobs (see job_store.py), opened on first use
+        self.resumed_jobs = {} # Stored job id -> id of the job resuming it
+        # Last parsed pages: editing only the selectors skips fetch and parse
+        self.document_cache = DocumentCache()
+        # Save dialog settings, one entry per format in SAVER_REGISTRY
+        self.save_dialog_configs = self.build_save_dialog_configs()
 
         # Track dynamic selector rows (initialized before creating selector UI)
         self.selector_rows = []
@@ -59,9 +98,57 @@ class WebScraperGUI:
         self.create_url_section(main_frame)
         self.create_selectors_section(main_frame)
         self.create_run_section(main_frame)
+        self.create_jobs_section(main_frame)
         self.create_results_section(main_frame)
+        self.create_stats_section(main_frame)
         self.create_save_section(main_frame)
 
+        # The queue is polled for as long as the window is open
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(GUI_TICK_MS, self.process_queue)
+
+    def on_close(self):
+        """Cancel the running jobs, then close the window."""
+        self.job_manager.shutdown()
+        if self.renderer is not None:
+            self.renderer.close()
+        self.root.destroy()
+
+    @staticmethod
+    def build_save_dialog_configs():
+        """Dialog file types for every registered format (see config.FORMAT_DESCRIPTIONS)."""
+        configs = {}
+        for save_format in SAVER_REGISTRY:
+            label, extension = FORMAT_DESCRIPTIONS.get(save_format, (save_format.upper(), f".{save_format}"))
+            configs[save_format] = {
+                'filetypes': [(f"{label} files", f"*{extension}"), ('All files', '*.*')],
+                'defaultextension': extension
+            }
+        return configs
+
+    def get_response_cache(self):
+        """The on-disk response cache matching the checkboxes, or None."""
+        if not self.use_cache_var.get() and not self.offline_var.get():
+            return None
+        if self.response_cache is None:
+            self.response_cache = ResponseCache()
+        self.response_cache.offline = self.offline_var.get()
+        return self.response_cache
+
+    def get_job_store(self):
+        """The default job store (config.DEFAULT_JOB_STORE), shared with the CLI."""
+        if self.job_store is None:
+            self.job_store = JobStore()
+        return self.job_store
+
+    def get_renderer(self):
+        """The browser pool if "Render JS" is checked, or None (kept warm across jobs)."""
+        if not self.render_var.get():
+            return None
+        if self.renderer is None:
+            self.renderer = BrowserPool()
+        return self.renderer
+
     def create_url_section(self, parent_frame):
         """Creates the URL input section."""
         url_frame = ttk.Frame(parent_frame, padding=(0, 5))
@@ -73,6 +160,17 @@ class WebScraperGUI:
         self.url_entry = ttk.Entry(url_frame)
         self.url_entry.pack(fill='x', expand=True, side=tk.LEFT)
 
+        # Optional container (e.g. "article.product_pod"): one row per record,
+        # columns searched inside it, empty cells for missing fields
+        record_frame = ttk.Frame(parent_frame, padding=(0, 5))
+        record_frame.pack(fill='x')
+
+        record_label = ttk.Label(record_frame, text="Record:", width=10)
+        record_label.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.record_entry = ttk.Entry(record_frame)
+        self.record_entry.pack(fill='x', expand=True, side=tk.LEFT)
+
     def create_selectors_section(self, parent_frame):
         """Creates the main container for dynamic selectors."""
         # Use a LabelFrame for visual grouping
@@ -172,36 +270,198 @@ class WebScraperGUI:
             attribute_entry.config(state='disabled')
 
     def create_run_section(self, parent_frame):
-        """Creates the 'Run' button."""
+        """Creates the 'Run' button and the parser backend choice."""
         run_frame = ttk.Frame(parent_frame, padding=(0, 10))
         run_frame.pack(fill='x')
 
+        parser_label = ttk.Label(run_frame, text="Parser:", width=10)
+        parser_label.pack(side=tk.LEFT, padx=(0, 5))
+
+        # Only the backends installed in this environment are offered
+        self.parser_var = tk.StringVar(value=resolve_parser())
+        parser_combo = ttk.Combobox(
+            run_frame,
+            textvariable=self.parser_var,
+            values=available_parsers(),
+            state='readonly',
+            width=12
+        )
+        parser_combo.pack(side=tk.LEFT, padx=5)
+
+        # Response cache: pages are revalidated instead of downloaded again,
+        # "Offline" re-runs the selectors on stored pages without any request
+        self.use_cache_var = tk.BooleanVar(value=True)
+        cache_check = ttk.Checkbutton(run_frame, text="Use cache", variable=self.use_cache_var)
+        cache_check.pack(side=tk.LEFT, padx=5)
+
+        self.offline_var = tk.BooleanVar(value=False)
+        offline_check = ttk.Checkbutton(run_frame, text="Offline", variable=self.offline_var)
+        offline_check.pack(side=tk.LEFT, padx=5)
+
+        # Pages whose HTML matches nothing (built by JavaScript) are rendered
+        # in a headless browser; only offered when playwright is installed
+        self.render_var = tk.BooleanVar(value=False)
+        render_check = ttk.Checkbutton(run_frame, text="Render JS", variable=self.render_var,
+                                       state='normal' if HAS_PLAYWRIGHT else 'disabled')
+        render_check.pack(side=tk.LEFT, padx=5)
+
         self.run_button = ttk.Button(
             run_frame, 
             text="Run", 
             command=self.execute_connector # Connects to the data gathering function
         )
-        self.run_button.pack()
+        self.run_button.pack(side=tk.LEFT, padx=5)
+
+    def create_jobs_section(self, parent_frame):
+        """Creates the list of submitted jobs, with their state and row count."""
+        jobs_frame = ttk.LabelFrame(parent_frame, text="Jobs", padding="10")
+        jobs_frame.pack(fill='x', pady=5)
+
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=('url', 'state', 'rows'), show='tree headings',
+                                      height=3, selectmode='browse')
+        self.jobs_tree.heading('#0', text="Job")
+        self.jobs_tree.column('#0', width=70, stretch=False)
+        self.jobs_tree.heading('url', text="URL")
+        self.jobs_tree.heading('state', text="State")
+        self.jobs_tree.column('state', width=80, stretch=False)
+        self.jobs_tree.heading('rows', text="Rows")
+        self.jobs_tree.column('rows', width=70, stretch=False)
+        self.jobs_tree.pack(side=tk.LEFT, fill='x', expand=True)
+        # Selecting a job shows its rows
+        self.jobs_tree.bind('<<TreeviewSelect>>', self.on_job_selected)
+
+        self.cancel_button = ttk.Button(jobs_frame, text="Cancel", command=self.cancel_selected_job)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        stored_button = ttk.Button(jobs_frame, text="Stored jobs...", command=self.open_stored_jobs)
+        stored_button.pack(side=tk.LEFT, padx=5)
+
+    def on_job_selected(self, _event=None):
+        selection = self.jobs_tree.selection()
+        if selection and selection[0] != self.current_job_id:
+            self.show_job(selection[0])
+
+    def cancel_selected_job(self):
+        """Cooperative cancel: the job stops at its next step (download chunk, parse, batch)."""
+        selection = self.jobs_tree.selection()
+        if selection:
+            self.job_manager.cancel(selection[0])
+
+    def open_stored_jobs(self):
+        """Lists the jobs of the job store (e.g. crawls started from the CLI); the selected one is resumed."""
+        store = self.get_job_store()
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Stored jobs")
+
+        tree = ttk.Treeview(dialog, columns=('status', 'done', 'failed', 'pending'), show='tree headings',
+                            height=8, selectmode='browse')
+        tree.heading('#0', text="Job")
+        for column in ('status', 'done', 'failed', 'pending'):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=80, stretch=False)
+        for stored in store.list_jobs():
+            tree.insert('', tk.END, iid=stored['id'], text=stored['id'],
+                        values=(stored['status'], stored['done'], stored['failed'], stored['pending']))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        def resume():
+            selection = tree.selection()
+            if selection:
+                self.resume_job(selection[0])
+                dialog.destroy()
+
+        ttk.Button(dialog, text="Resume", command=resume).pack(pady=5)
+
+    def resume_job(self, stored_id: str):
+        """Run a stored job from its saved frontier, as a new job of the list."""
+        running = self.resumed_jobs.get(stored_id)
+        if running is not None and not self.job_views[running].finished:
+            self.jobs_tree.selection_set(running) # Already running here: show it
+            return
+        store = self.get_job_store()
+        gui_data, _ = store.load_job(stored_id)
+        job = self.job_manager.submit(
+            resume_stored_job, store, stored_id,
+            cache=self.get_response_cache(), stats=ScrapeStats(), renderer=self.get_renderer(),
+            name=gui_data.url
+        )
+        self.resumed_jobs[stored_id] = job.job_id
+        self.track_job(JobView(job, gui_data.url, gui_data.column_names))
+
+    def track_job(self, view: JobView):
+        """Add a submitted job to the list and show it."""
+        self.job_views[view.job.job_id] = view
+        self.update_job_row(view)
+        self.jobs_tree.selection_set(view.job.job_id) # Shows the new job (see on_job_selected)
+        self.show_job(view.job.job_id)
+
+    def update_job_row(self, view: JobView):
+        values = (view.url, view.state, len(view.rows))
+        if self.jobs_tree.exists(view.job.job_id):
+            self.jobs_tree.item(view.job.job_id, values=values)
+        else:
+            self.jobs_tree.insert('', 0, iid=view.job.job_id, text=view.job.job_id, values=values)
 
     def create_results_section(self, parent_frame):
-        """Creates the text area for results, with a scrollbar."""
+        """Creates the message area and the results table, with scrollbars."""
         # Use a LabelFrame for visual grouping
         results_frame = ttk.LabelFrame(parent_frame, text="Output", padding="10")
         results_frame.pack(fill=tk.BOTH, expand=True, pady=5)
 
+        # Messages (progress, errors); the rows go to the table below.
         # ScrolledText is a compound widget that includes a Text widget
         # and a Scrollbar, managing them automatically.
         self.results_text = scrolledtext.ScrolledText(
             results_frame, 
-            height=10, 
+            height=4, 
             wrap=tk.WORD, # Wrap lines at word boundaries
             state='disabled' # Start as read-only
         )
-        self.results_text.pack(fill=tk.BOTH, expand=True)
-
+        self.results_text.pack(fill='x')
+
+        # Rows: a Treeview only draws the visible lines, and it holds at most
+        # GUI_VIEW_MAX_ROWS of them, whatever the size of the result
+        table_frame = ttk.Frame(results_frame)
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+        self.results_tree = ttk.Treeview(table_frame, show='headings', height=8)
+        y_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.results_tree.yview)
+        x_scroll = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.results_tree.xview)
+        self.results_tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        y_scroll.pack(side=tk.RIGHT, fill='y')
+        x_scroll.pack(side=tk.BOTTOM, fill='x')
+        self.results_tree.pack(fill=tk.BOTH, expand=True)
+
+        # Progress: moving bar while the job runs, and the row count
+        progress_frame = ttk.Frame(results_frame)
+        progress_frame.pack(fill='x', pady=(5, 0))
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='indeterminate', length=150)
+        self.progress_bar.pack(side=tk.LEFT)
+        self.row_count_var = tk.StringVar(value="")
+        row_count_label = ttk.Label(progress_frame, textvariable=self.row_count_var)
+        row_count_label.pack(side=tk.LEFT, padx=10)
+
+    def reset_results_table(self, columns: List[str]):
+        """Empty the table and set one column per selector."""
+        self.results_tree.delete(*self.results_tree.get_children())
+        self.results_tree['columns'] = [f"c{i}" for i in range(len(columns))]
+        for i, name in enumerate(columns):
+            self.results_tree.heading(f"c{i}", text=name)
+            self.results_tree.column(f"c{i}", width=150, stretch=True)
+        self.pending_rows.clear()
+        self.shown_rows = 0
+        self.row_count_var.set("")
+
+    def create_stats_section(self, parent_frame):
+        """Creates the summary panel of the last run's metrics (see metrics.ScrapeStats)."""
+        stats_frame = ttk.LabelFrame(parent_frame, text="Stats", padding="10")
+        stats_frame.pack(fill='x', pady=5)
+
+        self.stats_var = tk.StringVar(value="No run yet")
+        stats_label = ttk.Label(stats_frame, textvariable=self.stats_var, justify=tk.LEFT)
+        stats_label.pack(fill='x')
 
     def create_save_section(self, parent_frame):
-        """Creates the save options (CSV/JSON Radio buttons)."""
+        """Creates the save options (one choice per format in SAVER_REGISTRY)."""
         save_frame = ttk.Frame(parent_frame, padding=(0, 5))
         save_frame.pack(fill='x')
 
@@ -211,21 +471,15 @@ class WebScraperGUI:
         # Tkinter control variable to store the selected value
         self.save_format_var = tk.StringVar(value="csv") # Default to 'csv'
 
-        csv_radio = ttk.Radiobutton(
-            save_frame, 
-            text="CSV", 
-            variable=self.save_format_var, 
-            value="csv"
-        )
-        csv_radio.pack(side=tk.LEFT, padx=5)
-
-        json_radio = ttk.Radiobutton(
-            save_frame, 
-            text="JSON", 
-            variable=self.save_format_var, 
-            value="json"
+        # The list follows the registry: new savers show up without GUI changes
+        format_combo = ttk.Combobox(
+            save_frame,
+            textvariable=self.save_format_var,
+            values=list(self.save_dialog_configs),
+            state='readonly',
+            width=12
         )
-        json_radio.pack(side=tk.LEFT, padx=5)
+        format_combo.pack(side=tk.LEFT, padx=5)
 
         self.save_button = ttk.Button(
             save_frame,
@@ -248,9 +502,7 @@ class WebScraperGUI:
         self.results_text.config(state='normal')
         self.results_text.delete('1.0', tk.END)
 
-        self.last_results = None # 
         self.save_button.config(state='disabled')
-        self.run_button.config(state='disabled')
 
         # Flag to track validation errors
         has_errors = False
@@ -295,6 +547,16 @@ class WebScraperGUI:
                  self.results_text.insert(tk.END, f"Error processing row {i+1}: {e}\n")
                  has_errors = True
         
+        # Optional record selector
+        record_selector = None
+        record_str = self.record_entry.get().strip()
+        if record_str:
+            try:
+                record_selector = TagSelector(record_str, name='record')
+            except Exception as e:
+                self.results_text.insert(tk.END, f"Error Record selector: {e}\n")
+                has_errors = True
+
         # Validate that at least one selector was added
         if not cols_to_extract and not has_errors:
             # Only show this if no other errors were found
@@ -305,72 +567,155 @@ class WebScraperGUI:
         if has_errors:
             self.results_text.insert(tk.END, "\nPlease fix the errors and try again.")
             self.results_text.config(state='disabled') # Lock the text area
-            self.run_button.config(state='normal')
             return # Stop the function
 
         # Create the GUIRef object 
         # At this point, we know the input data is valid.
         try:
-            gui_data_object = GUIRef(url=url, format=save_format, selectors=cols_to_extract)
+            gui_data_object = GUIRef(
+                url=url,
+                format=save_format,
+                selectors=cols_to_extract,
+                parser=self.parser_var.get(),
+                record_selector=record_selector
+            )
         except Exception as e:
             self.results_text.insert(tk.END, f"\n--- Critical Error ---\nCould not create data object: {e}\n")
             self.results_text.config(state='disabled')
-            self.run_button.config(state='normal')
             return
         
         #### Scraping function logic
-        self.results_text.insert(tk.END, f"Scraping from {gui_data_object.url}...\n")
-
-        job_thread = threading.Thread(
-            target=sl.execute_scraping,
-            args=(gui_data_object, self.result_queue)
+        response_cache = self.get_response_cache()
+        # The parsed-page cache follows the "Use cache" / "Offline" choice too
+        document_cache = self.document_cache if response_cache is not None else None
+
+        # Runs on the shared job pool; the Run button stays available for more jobs
+        job = self.job_manager.submit(
+            sl.execute_scraping, gui_data_object,
+            cache=response_cache, document_cache=document_cache, stats=ScrapeStats(),
+            batch_size=GUI_ROW_BATCH, # Rows arrive in RowBatch messages
+            renderer=self.get_renderer(), # Used only if the page's HTML matches nothing
+            name=gui_data_object.url
         )
-        job_thread.daemon = True # Allow the app to close even if the thread is executing
-        job_thread.start()
+        self.track_job(JobView(job, gui_data_object.url, gui_data_object.column_names))
+
+    def show_job(self, job_id: str):
+        """Show a job in the output: messages, stats and its rows (re-drawn a chunk per tick)."""
+        view = self.job_views[job_id]
+        self.current_job_id = job_id
+        self.last_columns = view.columns
+        self.reset_results_table(view.columns)
+        self.pending_rows.extend(view.rows.iter_rows(0, GUI_VIEW_MAX_ROWS))
+        self.stats_var.set("\n".join(view.stats_lines) or "Running...")
+        self.show_job_message(view)
+
+    def show_job_message(self, view: JobView):
+        """Text area and save button for the shown job."""
+        self.results_text.config(state='normal')
+        self.results_text.delete('1.0', tk.END)
 
-        self.root.after(100, self.process_queue)
+        if not view.finished:
+            self.results_text.insert(tk.END, f"Scraping from {view.url}... ({view.state})\n")
+            self.last_results = None
+            self.save_button.config(state='disabled')
+
+        elif view.error is not None:
+            title = "cancelled" if isinstance(view.error, ScrapeCancelled) else "failed"
+            self.results_text.insert(tk.END, f"--- Scraping {title} ---\n\n{view.error}")
+            self.last_results = None
+            self.save_button.config(state='disabled')
+
+        else:
+            source = " (from cached document)" if view.from_cache else ""
+            self.results_text.insert(tk.END, f"--- Scraping results{source} ---\n")
+            if not view.rows:
+                self.results_text.insert(tk.END, "No data found with those selectors")
+                self.last_results = None
+                self.save_button.config(state='disabled')
+            else:
+                self.results_text.insert(tk.END, f"{len(view.rows)} rows")
+                self.last_results = view.rows
+                self.save_button.config(state='normal')
 
+        # Lock the text area again
         self.results_text.config(state='disabled')
 
     def process_queue(self):
         """
         Controlls resulting_queue with no blocking GUI
+        Every tick takes all the messages waiting, for every job (JobMessage:
+        JobStatus, ScrapeStats, RowBatch or Exception), but draws at most
+        GUI_RENDER_CHUNK rows of the shown job, so the main loop stays responsive.
         """
-        try:
-            # Try to get an elem from queue without stop the process
-            result = self.result_queue.get_nowait()
-
-            self.run_button.config(state='normal')
-
-            # Reset and prepare the results text area
-            self.results_text.config(state='normal')
-            self.results_text.delete('1.0', tk.END)
+        changed = set()
+        # Receiving is cheap: the rows are only stored here
+        while True:
+            try:
+                # Try to get an elem from queue without stop the process
+                message = self.result_queue.get_nowait()
+            except Empty:
+                break
+            if isinstance(message, JobMessage) and message.job_id in self.job_views:
+                self.handle_job_message(self.job_views[message.job_id], message.message)
+                changed.add(message.job_id)
 
-            if isinstance(result, Exception):
-                self.results_text.insert(tk.END, f"--- Scraping failed ---\n\n{result}")
-                self.last_results = None
-                self.save_button.config(state='disabled')
+        for job_id in changed:
+            self.update_job_row(self.job_views[job_id])
 
-            else:
-                self.results_text.insert(tk.END, "--- Scraping results ---\n\n")
-                if not result:
-                    self.results_text.insert(tk.END, "No data found with those selectors")
-                    self.last_results = None
-                    self.save_button.config(state='disabled')
-                
-                else:
-                    self.last_results = result 
-                    self.save_button.config(state='normal') 
-                
-                    for row in result:
-                        cleaned_row = [str(item) if item is not None else "N/A" for item in row]
-                        self.results_text.insert(tk.END, " : ".join(cleaned_row) + "\n")
+        self.render_pending_rows()
 
-            # Lock the text area again
-            self.results_text.config(state='disabled')
-
-        except Empty:
-            self.root.after(100, self.process_queue)
+        running = any(not view.finished for view in self.job_views.values())
+        if running:
+            self.progress_bar.start(10)
+        else:
+            self.progress_bar.stop()
+
+        self.root.after(GUI_TICK_MS, self.process_queue)
+
+    def handle_job_message(self, view: JobView, message):
+        shown = view.job.job_id == self.current_job_id
+
+        if isinstance(message, JobStatus):
+            view.state = message.state
+            if message.state == CANCELLED and view.error is None:
+                view.error = ScrapeCancelled("Job cancelled.")
+            elif message.error is not None and view.error is None:
+                view.error = message.error
+            view.finished = message.finished
+            if shown:
+                self.show_job_message(view)
+
+        elif isinstance(message, ScrapeStats):
+            view.stats_lines = message.summary_lines()
+            view.from_cache = message.document_cache_hits > 0
+            if shown:
+                self.stats_var.set("\n".join(view.stats_lines))
+
+        elif isinstance(message, (RowBatch, PageResult)): # PageResult: resumed jobs (see resume_stored_job)
+            if message.rows:
+                if shown and len(view.rows) < GUI_VIEW_MAX_ROWS:
+                    self.pending_rows.extend(islice(message.rows, GUI_VIEW_MAX_ROWS - len(view.rows)))
+                view.rows.extend(message.rows)
+
+        elif isinstance(message, Exception):
+            view.error = message
+
+    def render_pending_rows(self):
+        """Draw the next chunk of received rows, within the table cap."""
+        budget = min(GUI_RENDER_CHUNK, GUI_VIEW_MAX_ROWS - self.shown_rows)
+        for _ in range(min(budget, len(self.pending_rows))):
+            row = self.pending_rows.popleft()
+            cleaned_row = [str(item) if item is not None else "N/A" for item in row]
+            self.results_tree.insert('', tk.END, values=cleaned_row)
+            self.shown_rows += 1
+        if self.shown_rows >= GUI_VIEW_MAX_ROWS:
+            self.pending_rows.clear() # Kept in the job's rows for saving, not drawn
+
+        view = self.job_views.get(self.current_job_id)
+        if view is not None:
+            total = len(view.rows)
+            shown = f" (showing the first {self.shown_rows})" if self.shown_rows < total else ""
+            self.row_count_var.set(f"Rows: {total}{shown}")
 
     def save_results(self):
         """
@@ -410,7 +755,7 @@ class WebScraperGUI:
             
         # Call the saving logic
         try:
-            save_data(self.last_results, save_format, filepath)
+            save_data(self.last_results, save_format, filepath, self.last_columns)
             
             self.results_text.config(state='normal')
             self.results_text.insert(tk.END, f"\n--- Results found in: {filepath} ---")
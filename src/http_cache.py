@@ -0,0 +1,276 @@
+# Persistent HTTP response cache used under scraper_logic.fetch_page
+# Pages are stored on disk. A page still fresh (Cache-Control max-age or
+# Expires, counted from when it was received) is served without a request;
+# otherwise it is revalidated with ETag / Last-Modified, so a 304 Not Modified
+# answer skips the download. In offline mode the network is never touched and
+# stored pages are returned as they are.
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from config import CACHE_MAX_AGE, CACHE_MAX_BYTES, DEFAULT_CACHE_DIR, REQUEST_TIMEOUT
+
+# Request headers that change the content a server sends back
+VARY_HEADERS = ('Accept', 'Accept-Language')
+# Stores between two eviction scans (a scan lists the whole directory)
+EVICT_EVERY = 50
+# Headers describing the transfer, not the body stored: requests has already
+# decoded the body, so they would no longer be true when it is served again
+TRANSFER_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+# Headers a 304 may update on the stored response
+REVALIDATION_HEADERS = ('Cache-Control', 'Date', 'ETag', 'Expires', 'Last-Modified')
+
+
+def freshness_lifetime(headers) -> float:
+    """
+    Seconds a response stays fresh from when it was received: Cache-Control
+    max-age, or Expires minus Date, less its Age. 0 (always revalidate) without them.
+    """
+    headers = requests.structures.CaseInsensitiveDict(headers)
+    directives = [part.strip().lower() for part in headers.get('Cache-Control', '').split(',')]
+    if 'no-cache' in directives or 'no-store' in directives:
+        return 0.0
+    age = float(headers['Age']) if headers.get('Age', '').isdigit() else 0.0
+    for directive in directives:
+        name, _, value = directive.partition('=')
+        if name == 'max-age' and value.strip('"').isdigit():
+            return max(0.0, float(value.strip('"')) - age)
+    if 'Expires' in headers:
+        try:
+            expires = email.utils.parsedate_to_datetime(headers['Expires']).timestamp()
+            date = email.utils.parsedate_to_datetime(headers['Date']).timestamp() if 'Date' in headers else time.time()
+        except (TypeError, ValueError):
+            return 0.0 # e.g. "Expires: 0": already expired
+        return max(0.0, expires - date - age)
+    return 0.0
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a URL has never been stored."""
+
+
+class CachedResponse:
+    """
+    Response rebuilt from the cache, exposing the attributes the
+    scraping stage reads from a requests.Response.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.from_cache = True
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return requests.utils.get_encoding_from_headers(self.headers)
+
+    def raise_for_status(self):
+        pass # Only successful responses are stored
+
+    def close(self):
+        pass
+
+
+class ResponseCache:
+    """
+    Directory of cached pages: <key>.json (metadata) + <key>.body (zlib-compressed).
+    The .body file is dated when the response was received (or last
+    revalidated), the .json file when the entry was last used. Entries
+    received more than max_age seconds ago are evicted, and the least
+    recently used ones go first once the cache exceeds max_bytes.
+    Safe to share between the worker threads of a batch.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = CACHE_MAX_BYTES,
+                 max_age: float = CACHE_MAX_AGE,
+                 offline: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.offline = offline # Public: the GUI toggles it between runs
+        self._lock = threading.Lock()
+        self._stores = 0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- keys and files ---
+
+    def key(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """URL plus the headers that can change the content."""
+        headers = headers or {}
+        parts = [url] + [f"{name}:{headers.get(name, '')}" for name in VARY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def _load(self, key: str):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, ValueError, zlib.error):
+            return None, None # Missing or half-written entry
+        return meta, body
+
+    def _write(self, path: str, data, mode: str):
+        # Write to a temporary file first: readers never see half an entry
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, mode) as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def _write_meta(self, key: str, url: str, status_code: int, headers: Dict[str, str]):
+        meta = {
+            'url': url,
+            'status_code': status_code,
+            'headers': headers,
+            'stored_at': time.time(), # When the response was received, for its freshness
+            'fresh_for': freshness_lifetime(headers),
+        }
+        self._write(self._paths(key)[0], json.dumps(meta), 'w')
+
+    def _store(self, key: str, response):
+        meta_path, body_path = self._paths(key)
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in TRANSFER_HEADERS}
+        self._write(body_path, zlib.compress(response.content), 'wb') # Body first: the entry exists once its meta does
+        self._write_meta(key, response.url, response.status_code, headers)
+
+        with self._lock:
+            self._stores += 1
+            due = self._stores % EVICT_EVERY == 1
+        if due:
+            self.evict()
+
+    def _revalidated(self, key: str, meta: Dict, response):
+        """Entry confirmed by a 304: received again now, with the headers the 304 updates."""
+        headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        for name in REVALIDATION_HEADERS:
+            if name in response.headers:
+                headers[name] = response.headers[name]
+        self._write_meta(key, meta['url'], meta['status_code'], dict(headers))
+        try:
+            os.utime(self._paths(key)[1])
+        except OSError:
+            pass
+
+    def _touch(self, key: str):
+        try:
+            os.utime(self._paths(key)[0]) # Last use: the body keeps its date
+        except OSError:
+            pass
+
+    # --- public API ---
+
+    def lookup(self, url: str, session: Optional[requests.Session] = None
+               ) -> Tuple[Optional[CachedResponse], Dict[str, str]]:
+        """
+        Before a request: (stored page, {}) when it can be served as it is
+        (still fresh, or offline), otherwise (None, conditional request headers).
+        Raises CacheMiss when offline and the URL was never stored.
+        """
+        key = self.key(url, dict(session.headers) if session is not None else {})
+        meta, body = self._load(key)
+
+        if self.offline and meta is None:
+            raise CacheMiss(f"Not in cache (offline mode): {url}")
+        if meta is not None and (self.offline or time.time() - meta['stored_at'] < meta.get('fresh_for', 0)):
+            self._touch(key)
+            return CachedResponse(meta['url'], meta['status_code'], meta['headers'], body), {}
+
+        conditional = {}
+        if meta is not None:
+            stored_headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+            if 'ETag' in stored_headers:
+                conditional['If-None-Match'] = stored_headers['ETag']
+            if 'Last-Modified' in stored_headers:
+                conditional['If-Modified-Since'] = stored_headers['Last-Modified']
+        return None, conditional
+
+    def update(self, url: str, response, session: Optional[requests.Session] = None):
+        """
+        After the request sent with lookup()'s headers: the stored page on a
+        304, otherwise the response itself (stored when cacheable).
+        Raises like fetch_page on HTTP errors.
+        """
+        key = self.key(url, dict(session.headers) if session is not None else {})
+        if response.status_code == 304:
+            meta, body = self._load(key)
+            if meta is not None:
+                self._revalidated(key, meta, response)
+                return CachedResponse(meta['url'], meta['status_code'], meta['headers'], body)
+
+        response.raise_for_status()
+        if response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', ''):
+            self._store(key, response)
+        response.from_cache = False
+        return response
+
+    def fetch(self, url: str, session: Optional[requests.Session] = None):
+        """
+        Return the page for `url`, from the cache when it is still valid.
+        Raises like fetch_page on HTTP errors, and CacheMiss when offline.
+        (fetch_page uses lookup() and update() around its own download.)
+        """
+        cached, conditional = self.lookup(url, session)
+        if cached is not None:
+            return cached
+        client = session if session is not None else requests
+        return self.update(url, client.get(url, headers=conditional, timeout=REQUEST_TIMEOUT), session)
+
+    def contains(self, url: str, session: Optional[requests.Session] = None) -> bool:
+        request_headers = dict(session.headers) if session is not None else {}
+        return os.path.exists(self._paths(self.key(url, request_headers))[0])
+
+    def evict(self):
+        """Drop entries received more than max_age ago, then the least recently used past max_bytes."""
+        with self._lock:
+            entries = {} # key -> [size, received (body date), last used (meta date)]
+            now = time.time()
+            for name in os.listdir(self.directory):
+                key, extension = os.path.splitext(name)
+                if extension not in ('.json', '.body'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = entries.setdefault(key, [0, now, 0.0])
+                entry[0] += stat.st_size
+                if extension == '.body':
+                    entry[1] = stat.st_mtime
+                entry[2] = max(entry[2], stat.st_mtime)
+
+            total = sum(size for size, _, _ in entries.values())
+            expired = {key for key, (_, received, _) in entries.items() if now - received > self.max_age}
+            # Then the least recently used first, while over max_bytes
+            for key in list(expired) + sorted(entries.keys() - expired, key=lambda key: entries[key][2]):
+                if key not in expired and total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= entries[key][0]
+
+    def clear(self):
+        """Remove every stored page."""
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith(('.json', '.body')):
+                    os.remove(os.path.join(self.directory, name))
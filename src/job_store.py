@@ -0,0 +1,191 @@
+# Durable job store for long crawls (SQLite in WAL mode)
+# The frontier, the completed URLs and the emitted rows are written in
+# batched transactions, so an interrupted job resumes where it stopped
+# without fetching the finished pages again. The GUIRef configuration is
+# stored with the job, so it can be resumed from the CLI or the GUI.
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from class_selectors import GUIRef
+from config import DEFAULT_JOB_STORE, JOB_STORE_BATCH
+from utils import json_default
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id         TEXT PRIMARY KEY,
+    config     TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    job_id TEXT NOT NULL,
+    url    TEXT NOT NULL,
+    depth  INTEGER NOT NULL,
+    state  TEXT NOT NULL DEFAULT 'pending',
+    PRIMARY KEY (job_id, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (job_id, state);
+CREATE TABLE IF NOT EXISTS rows (
+    job_id TEXT NOT NULL,
+    url    TEXT NOT NULL,
+    data   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_job ON rows (job_id);
+"""
+
+# Frontier states
+PENDING, DONE, FAILED = 'pending', 'done', 'failed'
+
+
+class JobStore:
+    """
+    One SQLite file holding any number of jobs.
+    Writes are buffered in one transaction, committed every `batch_size`
+    pages (or on flush()); only create_job commits right away.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOB_STORE, batch_size: int = JOB_STORE_BATCH):
+        self.path = path
+        self.batch_size = batch_size
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL") # Durable enough with WAL, much faster
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending_pages = 0
+
+    # --- jobs ---
+
+    def create_job(self, gui_data: GUIRef, options: Optional[Dict[str, Any]] = None,
+                   urls: Optional[List[str]] = None) -> str:
+        """
+        Store a new job and its seed URLs (gui_data.url if none given).
+        `options` are the crawl settings (JSON-friendly). Returns the job id.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        config = {'gui_ref': gui_data.to_dict(), 'options': options or {}}
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO jobs (id, config, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (job_id, json.dumps(config), now, now)
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO frontier (job_id, url, depth) VALUES (?, ?, 0)",
+                ((job_id, url) for url in (urls or [gui_data.url]))
+            )
+        return job_id
+
+    def load_job(self, job_id: str) -> Tuple[GUIRef, Dict[str, Any]]:
+        """The GUIRef and crawl options of a stored job."""
+        row = self._connection.execute("SELECT config FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        config = json.loads(row[0])
+        return GUIRef.from_dict(config['gui_ref']), config['options']
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Every job with its status and progress, most recent first."""
+        jobs = []
+        for job_id, status, created_at in self._connection.execute(
+                "SELECT id, status, created_at FROM jobs ORDER BY created_at DESC"):
+            counts = dict(self._connection.execute(
+                "SELECT state, COUNT(*) FROM frontier WHERE job_id = ? GROUP BY state", (job_id,)))
+            jobs.append({'id': job_id, 'status': status, 'created_at': created_at,
+                         'done': counts.get(DONE, 0), 'failed': counts.get(FAILED, 0),
+                         'pending': counts.get(PENDING, 0)})
+        return jobs
+
+    def set_status(self, job_id: str, status: str):
+        """Part of the current batch: committed with the pages, or on flush()."""
+        with self._lock:
+            self._connection.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                                     (status, time.time(), job_id))
+
+    # --- frontier ---
+
+    def load_frontier(self, job_id: str) -> Tuple[List[Tuple[str, int]], List[str], int]:
+        """
+        State to resume a job: (pending (url, depth) in insertion order,
+        every known URL, number of pages already done or failed).
+        """
+        pending, known, finished = [], [], 0
+        for url, depth, state in self._connection.execute(
+                "SELECT url, depth, state FROM frontier WHERE job_id = ?", (job_id,)):
+            known.append(url)
+            if state == PENDING:
+                pending.append((url, depth))
+            else:
+                finished += 1
+        pending.sort(key=lambda item: item[1]) # Breadth-first
+        return pending, known, finished
+
+    def add_urls(self, job_id: str, urls: List[Tuple[str, int]]):
+        """
+        Add (url, depth) pairs to the frontier (known URLs are ignored).
+        Part of the current batch: committed with the pages, or on flush().
+        """
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO frontier (job_id, url, depth) VALUES (?, ?, ?)",
+                ((job_id, url, depth) for url, depth in urls)
+            )
+
+    def seed_urls(self, job_id: str) -> List[str]:
+        return [url for (url,) in self._connection.execute(
+            "SELECT url FROM frontier WHERE job_id = ? AND depth = 0", (job_id,))]
+
+    def record_page(self, job_id: str, url: str, rows: Optional[List[List[Any]]],
+                    links: List[Tuple[str, int]] = ()):
+        """
+        Mark a page done (rows given) or failed (rows None), add the links it
+        discovered to the frontier. Committed in batches.
+        """
+        with self._lock:
+            connection = self._connection # sqlite3 opens the transaction implicitly
+            connection.execute("UPDATE frontier SET state = ? WHERE job_id = ? AND url = ?",
+                               (DONE if rows is not None else FAILED, job_id, url))
+            if rows:
+                connection.executemany("INSERT INTO rows (job_id, url, data) VALUES (?, ?, ?)",
+                                       ((job_id, url, json.dumps(row, default=json_default)) for row in rows))
+            if links:
+                connection.executemany("INSERT OR IGNORE INTO frontier (job_id, url, depth) VALUES (?, ?, ?)",
+                                       ((job_id, link, depth) for link, depth in links))
+            self._pending_pages += 1
+            if self._pending_pages >= self.batch_size:
+                connection.commit()
+                self._pending_pages = 0
+
+    def flush(self):
+        """Commit the buffered pages, URLs and status changes."""
+        with self._lock:
+            if self._connection.in_transaction:
+                self._connection.commit()
+            self._pending_pages = 0
+
+    # --- results ---
+
+    def iter_rows(self, job_id: str) -> Iterator[List[Any]]:
+        """Every row emitted by the job, across all its runs (streamed)."""
+        self.flush()
+        cursor = self._connection.execute("SELECT data FROM rows WHERE job_id = ? ORDER BY rowid", (job_id,))
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
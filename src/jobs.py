@@ -0,0 +1,230 @@
+# Concurrent, cancellable scrape jobs sharing one worker pool
+# Every job gets an id and a CancelToken; the messages its target puts on
+# the queue reach the shared result queue wrapped in a JobMessage, so one
+# consumer (the GUI) can follow several jobs at the same time.
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from typing import Any, Callable, Dict, List, Optional
+
+from config import MAX_CONCURRENT_JOBS
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class ScrapeCancelled(Exception):
+    """Raised inside a job once its CancelToken is cancelled."""
+    pass
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag, checked by the pipeline between steps
+    (before each fetch, between downloaded chunks, before parsing).
+    Callbacks registered with on_cancel run once, e.g. to wake up a job
+    waiting on a blocked request (see scraper_logic.fetch_page).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass # Best effort: cancellation must not fail
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run `callback` when cancelled (right away if already cancelled).
+        Returns a function unregistering it, for callbacks only needed for a while.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, waking up early on cancel. True if cancelled."""
+        return self._event.wait(timeout)
+
+    def check(self):
+        """Raise ScrapeCancelled if cancelled."""
+        if self._event.is_set():
+            raise ScrapeCancelled("Job cancelled.")
+
+
+def check_cancelled(cancel: Optional[CancelToken]):
+    """cancel.check(), for the optional `cancel` arguments of the pipeline."""
+    if cancel is not None:
+        cancel.check()
+
+
+class JobMessage():
+    """
+    A message of one job on the shared queue:
+        - job_id
+        - message (what the target put: rows, RowBatch, PageResult, ScrapeStats,
+          BatchSummary, Exception) or a JobStatus
+    """
+    def __init__(self, job_id: str, message: Any):
+        self._job_id = job_id
+        self._message = message
+
+    @property
+    def job_id(self) -> str:
+        return self._job_id
+
+    @property
+    def message(self) -> Any:
+        return self._message
+
+
+class JobStatus():
+    """
+    Progress of a job, sent when its state changes:
+        - state (queued, running, done, failed, cancelled)
+        - error (for failed jobs)
+    """
+    def __init__(self, state: str, error: Optional[Exception] = None):
+        self._state = state
+        self._error = error
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def error(self) -> Optional[Exception]:
+        return self._error
+
+    @property
+    def finished(self) -> bool:
+        return self._state in (DONE, FAILED, CANCELLED)
+
+
+class _JobQueue:
+    """Queue-like adapter given to a job's target: wraps every message with the job id."""
+
+    def __init__(self, job_id: str, result_queue: Queue):
+        self._job_id = job_id
+        self._result_queue = result_queue
+        self.error: Optional[Exception] = None # Targets report failures as a message
+
+    def put(self, message: Any):
+        if isinstance(message, Exception):
+            self.error = message
+        self._result_queue.put(JobMessage(self._job_id, message))
+
+
+class ScrapeJob:
+    """One submitted job: id, name, state and its CancelToken."""
+
+    def __init__(self, job_id: str, name: str = ''):
+        self.job_id = job_id
+        self.name = name
+        self.state = QUEUED
+        self.cancel_token = CancelToken()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_token.cancel()
+        if self.future is not None:
+            self.future.cancel() # Still queued: it never starts
+
+
+class JobManager:
+    """
+    Runs jobs on a shared pool of at most `max_jobs` threads.
+    A target is called as target(*args, result_queue=<job queue>, cancel=<token>, **kwargs)
+    and reports through the queue as usual (execute_scraping, execute_batch_scraping, ...).
+    The manager adds a JobStatus when a job starts and when it ends.
+    """
+
+    def __init__(self, result_queue: Queue, max_jobs: int = MAX_CONCURRENT_JOBS):
+        self.result_queue = result_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='scrape-job')
+        self._jobs: Dict[str, ScrapeJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, target: Callable[..., Any], *args, name: str = '', **kwargs) -> ScrapeJob:
+        with self._lock:
+            job = ScrapeJob(f"job-{next(self._ids)}", name)
+            self._jobs[job.job_id] = job
+        job_queue = _JobQueue(job.job_id, self.result_queue)
+        job_queue.put(JobStatus(QUEUED))
+
+        def run():
+            if job.cancel_token.cancelled:
+                self._finish(job, job_queue, CANCELLED)
+                return
+            job.state = RUNNING
+            job_queue.put(JobStatus(RUNNING))
+            try:
+                target(*args, result_queue=job_queue, cancel=job.cancel_token, **kwargs)
+            except ScrapeCancelled:
+                self._finish(job, job_queue, CANCELLED)
+            except Exception as e:
+                self._finish(job, job_queue, FAILED, e)
+            else:
+                if job.cancel_token.cancelled:
+                    self._finish(job, job_queue, CANCELLED)
+                elif job_queue.error is not None:
+                    self._finish(job, job_queue, FAILED, job_queue.error)
+                else:
+                    self._finish(job, job_queue, DONE)
+
+        job.future = self._executor.submit(run)
+        # A job cancelled while queued is reported from here, as run() never starts
+        job.future.add_done_callback(
+            lambda future: self._finish(job, job_queue, CANCELLED) if future.cancelled() else None)
+        return job
+
+    def _finish(self, job: ScrapeJob, job_queue: _JobQueue, state: str, error: Optional[Exception] = None):
+        job.state = state
+        job_queue.put(JobStatus(state, error))
+
+    def get(self, job_id: str) -> ScrapeJob:
+        return self._jobs[job_id]
+
+    def jobs(self) -> List[ScrapeJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str):
+        self._jobs[job_id].cancel()
+
+    def cancel_all(self):
+        for job in self.jobs():
+            job.cancel()
+
+    def shutdown(self, cancel: bool = True):
+        if cancel:
+            self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
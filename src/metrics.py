@@ -0,0 +1,184 @@
+# Per-stage metrics of a scraping run (fetch, parse, select, format)
+# Collection is opt-in: the pipeline functions take stats=None by default and
+# then only pay for a shared no-op context manager per stage.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, List, Optional
+
+STAGES = ('fetch', 'parse', 'select', 'format')
+
+_NO_STAGE = nullcontext() # Reusable: entering it does nothing
+
+
+class ScrapeStats:
+    """
+    Metrics of one scraping run, a single page or a whole batch.
+    Updated from the worker threads (thread-safe), put on the result queue
+    before the rows / BatchSummary, and passed to `exporter` by finish().
+    """
+
+    def __init__(self, exporter: Optional[Callable[['ScrapeStats'], None]] = None):
+        self.exporter = exporter
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.pages = 0
+        self.failed_pages = 0
+        self.bytes_downloaded = 0
+        self.rows = 0
+        self.cache_hits = 0          # Pages served by the ResponseCache (fresh or revalidated)
+        self.document_cache_hits = 0 # Pages reused already parsed (DocumentCache)
+        self.unchanged_pages = 0     # Pages not parsed, same as the last run (ChangeIndex)
+        self.rendered_pages = 0      # Pages rendered in a browser, their HTML matched nothing (renderer.py)
+        self.matches: Dict[str, int] = {} # Column name -> elements matched
+        self.elapsed: Optional[float] = None
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to the stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+    def add_page(self, size: int, from_cache: bool = False):
+        with self._lock:
+            self.pages += 1
+            self.bytes_downloaded += 0 if from_cache else size
+            self.cache_hits += 1 if from_cache else 0
+
+    def add_failure(self):
+        with self._lock:
+            self.failed_pages += 1
+
+    def add_document_cache_hit(self):
+        with self._lock:
+            self.pages += 1
+            self.document_cache_hits += 1
+
+    def add_unchanged_page(self):
+        with self._lock:
+            self.unchanged_pages += 1
+
+    def add_rendered_page(self):
+        with self._lock:
+            self.rendered_pages += 1
+
+    def add_matches(self, column_names: List[str], counts: List[int]):
+        with self._lock:
+            for name, count in zip(column_names, counts):
+                self.matches[name] = self.matches.get(name, 0) + count
+
+    def add_rows(self, count: int):
+        with self._lock:
+            self.rows += count
+
+    def finish(self) -> 'ScrapeStats':
+        """Stop the clock and run the exporter, if any."""
+        self.elapsed = time.perf_counter() - self._started
+        if self.exporter is not None:
+            self.exporter(self)
+        return self
+
+    # --- output ---
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'elapsed_seconds': self.elapsed,
+                'stage_seconds': dict(self.stage_seconds),
+                'pages': self.pages,
+                'failed_pages': self.failed_pages,
+                'bytes_downloaded': self.bytes_downloaded,
+                'rows': self.rows,
+                'cache_hits': self.cache_hits,
+                'document_cache_hits': self.document_cache_hits,
+                'unchanged_pages': self.unchanged_pages,
+                'rendered_pages': self.rendered_pages,
+                'matches': dict(self.matches),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4)
+
+    def to_prometheus(self, prefix: str = 'webscraper') -> str:
+        """Prometheus text exposition format (e.g. for the node_exporter textfile collector)."""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        metric('stage_seconds', 'gauge', "Time spent in each pipeline stage.",
+               [(f'{{stage="{stage}"}}', seconds) for stage, seconds in data['stage_seconds'].items()])
+        if data['elapsed_seconds'] is not None:
+            metric('elapsed_seconds', 'gauge', "Wall time of the run.", [('', data['elapsed_seconds'])])
+        for name, help_text in (('pages', "Pages scraped."), ('failed_pages', "Pages that failed."),
+                                ('bytes_downloaded', "Bytes downloaded (cache hits excluded)."),
+                                ('rows', "Rows emitted."), ('cache_hits', "Pages served by the HTTP cache."),
+                                ('document_cache_hits', "Pages reused already parsed."),
+                                ('unchanged_pages', "Pages not parsed, unchanged since the last run."),
+                                ('rendered_pages', "Pages rendered in a browser (no match in their HTML).")):
+            metric(name, 'gauge', help_text, [('', data[name])])
+        metric('matches', 'gauge', "Elements matched per column.",
+               [(f'{{column="{_escape_label(column)}"}}', count) for column, count in data['matches'].items()])
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> List[str]:
+        """Short human-readable summary (GUI panel, CLI stderr)."""
+        data = self.to_dict()
+        elapsed = data['elapsed_seconds']
+        lines = [
+            f"{data['pages']} pages ({data['failed_pages']} failed), {data['rows']} rows"
+            + (f" in {elapsed:.3f} s" if elapsed is not None else ""),
+            "  ".join(f"{stage} {seconds:.3f} s" for stage, seconds in data['stage_seconds'].items()),
+            f"{data['bytes_downloaded'] / 1024:.1f} KiB downloaded, cache hits: "
+            f"{data['cache_hits']} HTTP, {data['document_cache_hits']} parsed",
+        ]
+        if data['unchanged_pages']:
+            lines.append(f"{data['unchanged_pages']} pages unchanged since the last run")
+        if data['rendered_pages']:
+            lines.append(f"{data['rendered_pages']} pages rendered in a browser")
+        if data['matches']:
+            lines.append("matches: " + ", ".join(f"{name}={count}" for name, count in data['matches'].items()))
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def stage(stats: Optional[ScrapeStats], name: str):
+    """stats.stage(name), or a shared no-op when stats are not collected."""
+    return stats.stage(name) if stats is not None else _NO_STAGE
+
+
+# --- exporters (ScrapeStats(exporter=...)) ---
+
+class FileExporter:
+    """
+    Write the stats to a file when a run finishes: Prometheus text for
+    ".prom" paths, JSON otherwise. The file is replaced atomically, so a
+    collector never reads a half-written file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, stats: ScrapeStats):
+        text = stats.to_prometheus() if self.path.endswith('.prom') else stats.to_json()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,174 @@
+# Parser backends behind scraper_logic.soupify
+# Every backend returns a document exposing select(query) whose elements
+# support get_text(strip=True) and get(attribute), which is all that
+# TagSelector.extract and AttributeSelector.extract need.
+import importlib.util
+import warnings
+from typing import Any, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from bs4.builder import HTMLTreeBuilder
+
+from config import DEFAULT_PARSER
+
+# Optional dependencies: the backends using them are skipped when missing.
+# selectolax is only imported when that backend is first used.
+HAS_LXML = importlib.util.find_spec('lxml') is not None
+HAS_SELECTOLAX = importlib.util.find_spec('selectolax') is not None
+
+
+def _selectolax_parser_class():
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser # Older releases: Modest engine only
+        return HTMLParser
+
+
+# --- selectolax adapter ---
+# BeautifulSoup semantics reproduced so the output is identical on every backend
+
+# Strings inside these tags are not plain text for BeautifulSoup (get_text skips them)
+_STRING_CONTAINERS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+# Attributes BeautifulSoup splits into a list of values (e.g. class="a b")
+_LIST_ATTRIBUTES = HTMLTreeBuilder.DEFAULT_CDATA_LIST_ATTRIBUTES
+
+
+class SelectolaxElement:
+    """Wraps a selectolax Node behind the subset of the bs4 Tag API used by the selectors."""
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    def select(self, query: str) -> List['SelectolaxElement']:
+        return [SelectolaxElement(node) for node in self._node.css(query)]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attributes = self._node.attributes
+        if key not in attributes:
+            return default
+        value = attributes[key]
+        if value is None:
+            return '' # Bare attribute, e.g. <input disabled>
+        if key in _LIST_ATTRIBUTES['*'] or key in _LIST_ATTRIBUTES.get(self._node.tag, ()):
+            return value.split()
+        return value
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        # Only keep the strings whose innermost container matches this element's
+        # (plain text for ordinary tags), like bs4's interesting_string_types
+        own_container = self._node.tag if self._node.tag in _STRING_CONTAINERS else None
+        parts = []
+        for node in self._node.traverse(include_text=True):
+            if node.tag != '-text':
+                continue
+            if self._container_of(node) != own_container:
+                continue
+            text = node.text_content or ''
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return separator.join(parts)
+
+    def _container_of(self, text_node) -> Optional[str]:
+        parent = text_node.parent
+        while parent is not None:
+            if parent.tag in _STRING_CONTAINERS:
+                return parent.tag
+            if parent.mem_id == self._node.mem_id:
+                break
+            parent = parent.parent
+        return None
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SelectolaxElement) and self._node.mem_id == other._node.mem_id
+
+    def __hash__(self) -> int:
+        return hash(self._node.mem_id)
+
+
+class SelectolaxDocument(SelectolaxElement):
+    """Root of a page parsed by selectolax."""
+
+    __slots__ = ('_tree',)
+
+    def __init__(self, html_content):
+        tree = _selectolax_parser_class()(html_content)
+        super().__init__(tree.root)
+        self._tree = tree # Keeps the parsed tree alive while nodes are in use
+
+    def select(self, query: str) -> List[SelectolaxElement]:
+        return [SelectolaxElement(node) for node in self._tree.css(query)]
+
+
+# --- backends ---
+
+def _parse_html_parser(html_content):
+    return BeautifulSoup(html_content, "html.parser")
+
+def _parse_lxml(html_content):
+    return BeautifulSoup(html_content, "lxml")
+
+def _parse_selectolax(html_content):
+    return SelectolaxDocument(html_content)
+
+
+# Dispatcher dictionary, same pattern as SAVER_REGISTRY
+# Format: Dict[name, function(html_content) -> document]
+PARSER_REGISTRY: Dict[str, Callable[[Any], Any]] = {
+    'html.parser': _parse_html_parser,
+    'lxml': _parse_lxml,
+    'selectolax': _parse_selectolax,
+}
+
+# Where to go when an optional package is missing
+PARSER_FALLBACKS: Dict[str, str] = {
+    'selectolax': 'lxml',
+    'lxml': 'html.parser',
+}
+
+_AVAILABLE = {
+    'html.parser': True,
+    'lxml': HAS_LXML,
+    'selectolax': HAS_SELECTOLAX,
+}
+
+
+def available_parsers() -> List[str]:
+    """Names of the backends that can run in this environment."""
+    return [name for name in PARSER_REGISTRY if _AVAILABLE.get(name, True)]
+
+
+def resolve_parser(name: Optional[str] = None) -> str:
+    """
+    Return the backend to use for `name` (the global default if None),
+    walking PARSER_FALLBACKS when its package is not installed.
+    """
+    requested = name or DEFAULT_PARSER
+    if requested not in PARSER_REGISTRY:
+        raise ValueError(f"Parser not supported: {requested}")
+
+    current = requested
+    while not _AVAILABLE.get(current, True):
+        current = PARSER_FALLBACKS.get(current, 'html.parser')
+
+    if current != requested:
+        warnings.warn(f"Parser '{requested}' is not installed, falling back to '{current}'.")
+    return current
+
+
+def parse_document(html_content, parser: Optional[str] = None):
+    """Parse the page with the chosen backend (see resolve_parser)."""
+    return PARSER_REGISTRY[resolve_parser(parser)](html_content)
@@ -0,0 +1,173 @@
+# Rendered-DOM fetching for JavaScript-heavy pages (optional: playwright)
+# A page built in the browser (single-page apps) has nothing for the
+# selectors in its server HTML. BrowserPool loads such pages in headless
+# Chromium and returns the final DOM as HTML, which then goes through the
+# usual soupify / build_rows path (see scraper_logic.render_rows).
+# The browser is started once and keeps a few warm contexts reused page
+# after page; images, fonts and media are never downloaded.
+# Install: pip install playwright && playwright install chromium
+import asyncio
+import concurrent.futures
+import importlib.util
+import threading
+from typing import Optional, Tuple
+
+import requests
+
+from config import RENDER_BLOCKED_TYPES, RENDER_POOL_SIZE, RENDER_TIMEOUT, RENDER_WAIT
+from jobs import CancelToken, ScrapeCancelled, check_cancelled
+
+HAS_PLAYWRIGHT = importlib.util.find_spec('playwright') is not None
+
+CANCEL_POLL = 0.2 # Seconds between two cancel checks while a page renders
+
+
+class RenderedResponse:
+    """
+    The rendered DOM of a page, exposing the attributes the parsing
+    stage reads from a requests.Response (the HTML is re-encoded as UTF-8).
+    """
+
+    def __init__(self, url: str, status_code: int, content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+        self.content = content
+        self.from_cache = False
+
+    @property
+    def encoding(self) -> str:
+        return 'utf-8'
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        pass
+
+
+class BrowserPool:
+    """
+    Headless Chromium with `size` warm browser contexts, started on the
+    first render and kept until close(). The browser lives on its own
+    asyncio loop in a daemon thread, so render() can be called from any
+    worker thread: up to `size` pages render at once, the others wait for a
+    free context. Contexts are reused as they are (cookies included), like
+    a browser tab going from page to page of a site.
+    """
+
+    def __init__(self, size: int = RENDER_POOL_SIZE, timeout: float = RENDER_TIMEOUT,
+                 wait: float = RENDER_WAIT, blocked_types: Tuple[str, ...] = RENDER_BLOCKED_TYPES):
+        if not HAS_PLAYWRIGHT:
+            raise RuntimeError("playwright is required to render pages "
+                               "(pip install playwright && playwright install chromium).")
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+        self.size = size
+        self.timeout = timeout
+        self.wait = wait
+        self.blocked_types = frozenset(blocked_types)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- browser side (on the pool's loop) ---
+
+    async def _start(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        self._contexts = asyncio.Queue()
+        for _ in range(self.size):
+            context = await self._browser.new_context()
+            await context.route("**/*", self._route)
+            self._contexts.put_nowait(context)
+
+    async def _route(self, route):
+        if route.request.resource_type in self.blocked_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str, wait_for: Optional[str]) -> RenderedResponse:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        context = await self._contexts.get()
+        page = None
+        try:
+            page = await context.new_page()
+            response = await page.goto(url, wait_until='load', timeout=self.timeout * 1000)
+            if wait_for:
+                try:
+                    await page.wait_for_selector(wait_for, state='attached', timeout=self.wait * 1000)
+                except PlaywrightTimeoutError:
+                    pass # Still nothing: the DOM as it is
+            html = await page.content()
+            status = response.status if response is not None else 200
+            return RenderedResponse(page.url, status, html.encode('utf-8'))
+        finally:
+            if page is not None:
+                await page.close()
+            self._contexts.put_nowait(context)
+
+    async def _stop(self):
+        while not self._contexts.empty():
+            await self._contexts.get_nowait().close()
+        await self._browser.close()
+        await self._playwright.stop()
+
+    # --- caller side (any thread) ---
+
+    def _started_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='browser-pool', daemon=True)
+                thread.start()
+                try:
+                    asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+                except BaseException:
+                    loop.call_soon_threadsafe(loop.stop)
+                    thread.join()
+                    loop.close()
+                    raise
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def render(self, url: str, wait_for: Optional[str] = None,
+               cancel: Optional[CancelToken] = None) -> RenderedResponse:
+        """
+        Load the page and return its DOM once loaded, after waiting up to
+        `wait` seconds for `wait_for` (a CSS query) to appear.
+        With `cancel` the render is dropped (ScrapeCancelled) once cancelled.
+        """
+        check_cancelled(cancel)
+        future = asyncio.run_coroutine_threadsafe(self._render(url, wait_for), self._started_loop())
+        if cancel is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=CANCEL_POLL)
+            except concurrent.futures.TimeoutError:
+                if cancel.cancelled:
+                    future.cancel() # Cancels the coroutine: the page closes, the context goes back
+                    raise ScrapeCancelled("Job cancelled.")
+
+    def close(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop(), loop).result(timeout=self.timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,173 @@
+# Re-extract rows from an archive (see archive.py): no network, all cores
+# Pages are handed to a pool of processes in chunks of (url, segment, offset,
+# length): every process maps the segments itself and reads, decompresses,
+# parses and extracts its pages there, so only locations go in and only rows
+# come back. Reads come from the OS page cache, which makes a replay bound
+# by parsing (CPU), not by I/O.
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from queue import Queue
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from archive import ArchiveMiss, ArchiveReader
+from class_selectors import AbstractSelector, BatchSummary, PageResult
+from config import REPLAY_CHUNK
+from jobs import CancelToken
+from metrics import ScrapeStats
+from scraper_logic import parse_rows
+
+# (url, segment, offset, length) of an archived page
+Task = Tuple[str, int, int, int]
+
+
+class _Replayer:
+    """Extraction settings plus an open archive: one per process (or one in-thread)."""
+
+    def __init__(self, directory: str, column_jobs: List[AbstractSelector],
+                 parser: Optional[str], record_selector: Optional[AbstractSelector]):
+        self.reader = ArchiveReader(directory)
+        self.column_jobs = column_jobs
+        self.parser = parser
+        self.record_selector = record_selector
+
+    def run_chunk(self, tasks: List[Task]) -> List[Tuple]:
+        """(url, rows, error, stage seconds, matches) for every page of the chunk."""
+        results = []
+        for url, segment, offset, length in tasks:
+            stats = ScrapeStats() # Per page: plain dicts go back to the parent process
+            try:
+                response = self.reader.read((segment, offset, length))
+                rows = parse_rows(response.content, self.column_jobs, response.url, self.parser,
+                                  self.record_selector, stats)
+                results.append((url, rows, None, stats.stage_seconds, stats.matches))
+            except Exception as e:
+                results.append((url, None, e, None, None))
+        return results
+
+
+_replayer: Optional[_Replayer] = None # Set in every worker process by _init_worker
+
+
+def _init_worker(directory: str, column_jobs: List[AbstractSelector],
+                 parser: Optional[str], record_selector: Optional[AbstractSelector]):
+    global _replayer
+    _replayer = _Replayer(directory, column_jobs, parser, record_selector)
+
+
+def _run_chunk(tasks: List[Task]) -> List[Tuple]:
+    return _replayer.run_chunk(tasks)
+
+
+def _tasks(reader: ArchiveReader, urls: Optional[Iterable[str]], missing: List[str]) -> Iterator[Task]:
+    """Every archived page in file order, or the given URLs (those never captured go to `missing`)."""
+    if urls is None:
+        yield from reader.locations()
+        return
+    for url in urls:
+        try:
+            yield (url,) + tuple(reader.locate(url))
+        except ArchiveMiss:
+            missing.append(url)
+
+
+def execute_replay(directory: str,
+                   column_jobs: List[AbstractSelector],
+                   result_queue: Queue,
+                   urls: Optional[Iterable[str]] = None,
+                   parse_workers: Optional[int] = None,
+                   parser: Optional[str] = None,
+                   record_selector: Optional[AbstractSelector] = None,
+                   stats: Optional[ScrapeStats] = None,
+                   cancel: Optional[CancelToken] = None) -> BatchSummary:
+    """
+    Extract rows from the pages of an archive, with the same queue contract
+    as scraper_logic.execute_batch_scraping: one PageResult per page (a URL
+    never captured gives a failed one, with ArchiveMiss), then a BatchSummary.
+    Without `urls` every archived page is replayed, in file order.
+
+    `parse_workers` processes do the work (default: one per CPU); with 0 the
+    pages are replayed one after the other in this thread.
+    With `cancel` no new chunk starts once cancelled and queued ones are dropped.
+    """
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    if parse_workers < 0:
+        raise ValueError("parse_workers cannot be negative.")
+
+    reader = ArchiveReader(directory)
+    missing: List[str] = []
+    counts = {'total': 0, 'failed': 0}
+    counter_lock = threading.Lock()
+
+    def report(results: List[Tuple]):
+        for url, rows, error, stage_seconds, matches in results:
+            if stats is not None:
+                if error is None:
+                    stats.add_page(0) # Read from the archive, not downloaded
+                    for name, seconds in stage_seconds.items():
+                        stats.add_time(name, seconds)
+                    stats.add_matches(list(matches), list(matches.values()))
+                    stats.add_rows(len(rows))
+                else:
+                    stats.add_failure()
+            with counter_lock:
+                counts['total'] += 1
+                counts['failed'] += error is not None
+            result_queue.put(PageResult(url, rows, error))
+
+    def report_missing():
+        report([(url, None, ArchiveMiss(f"Not in the archive: {url}"), None, None) for url in missing])
+        missing.clear()
+
+    tasks = _tasks(reader, urls, missing)
+    chunks = iter(lambda: list(islice(tasks, REPLAY_CHUNK)), [])
+    try:
+        if parse_workers == 0:
+            replayer = _Replayer(directory, column_jobs, parser, record_selector)
+            try:
+                for chunk in chunks:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    report(replayer.run_chunk(chunk))
+                    report_missing()
+            finally:
+                replayer.reader.close()
+        else:
+            # Bounds the chunks in flight so a huge archive is not queued up front
+            pending = threading.BoundedSemaphore(parse_workers * 2)
+
+            def done(future, chunk):
+                try:
+                    if not future.cancelled(): # Cancelled: dropped, like the batch's queued pages
+                        try:
+                            results = future.result()
+                        except Exception as e: # e.g. a worker process died
+                            results = [(task[0], None, e, None, None) for task in chunk]
+                        report(results)
+                finally:
+                    pending.release()
+
+            pool = ProcessPoolExecutor(max_workers=parse_workers, initializer=_init_worker,
+                                       initargs=(directory, column_jobs, parser, record_selector))
+            try:
+                for chunk in chunks:
+                    pending.acquire()
+                    report_missing()
+                    if cancel is not None and cancel.cancelled:
+                        pending.release()
+                        break
+                    pool.submit(_run_chunk, chunk).add_done_callback(lambda f, chunk=chunk: done(f, chunk))
+            finally:
+                pool.shutdown(cancel_futures=cancel is not None and cancel.cancelled)
+        report_missing()
+    finally:
+        reader.close()
+
+    cancelled = cancel is not None and cancel.cancelled
+    summary = BatchSummary(counts['total'], counts['failed'], cancelled)
+    if stats is not None:
+        result_queue.put(stats.finish())
+    result_queue.put(summary)
+    return summary
@@ -0,0 +1,236 @@
+# Compact in-memory result set, stored column by column
+# A list of row lists costs a list object per row plus a pointer and often a
+# separate str object per cell. Here every column is either:
+#   - dictionary-encoded: one small integer code per cell (array) plus the
+#     distinct values once (category names, repeated labels, None...), or
+#   - a plain list, once the column has too many distinct values for codes
+#     to pay off (titles, URLs with ids, prices).
+# Iterating yields plain lists (what csv/json and the savers expect), built
+# on the fly; indexing gives a RowView that reads the columns in place.
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+# A column keeps its codes while it has at most TABLE_DICT_MAX_RATIO distinct
+# values per row; checked every TABLE_DICT_MIN_ROWS rows (too few rows say nothing)
+TABLE_DICT_MIN_ROWS = 1024
+TABLE_DICT_MAX_RATIO = 0.5
+
+
+def _key(value: Any) -> Any:
+    # 1, 1.0 and True are equal dict keys: keep the type apart except for
+    # the common case (str), so a code always gives back the same value
+    return value if value.__class__ is str else (value.__class__, value)
+
+
+class _DictColumn:
+    """Dictionary-encoded column: codes[i] indexes values."""
+
+    __slots__ = ('codes', 'values', 'lookup')
+
+    def __init__(self):
+        self.codes = array('I')
+        self.values: List[Any] = []
+        self.lookup: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def encode(self, value: Any) -> int:
+        key = _key(value)
+        code = self.lookup.get(key)
+        if code is None:
+            code = self.lookup[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value: Any):
+        self.codes.append(self.encode(value))
+
+    def extend(self, values: Iterable[Any]):
+        lookup = self.lookup
+        codes = []
+        for value in values:
+            key = value if value.__class__ is str else (value.__class__, value)
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        self.codes.extend(codes)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[self.codes[index]]
+
+    def iter_values(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+        return map(self.values.__getitem__, islice(self.codes, start, stop))
+
+    def worth_keeping(self) -> bool:
+        """False once there are too many distinct values for codes to save memory."""
+        rows = len(self.codes)
+        return rows < TABLE_DICT_MIN_ROWS or len(self.values) <= rows * TABLE_DICT_MAX_RATIO
+
+
+class _ListColumn(list):
+    """Plain column, for values that rarely repeat."""
+
+    __slots__ = ()
+
+    def iter_values(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+        return islice(self, start, stop)
+
+
+class RowView:
+    """One row of a ResultTable, read in place (no copy of the values)."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'ResultTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._table.width
+
+    def __getitem__(self, column: int) -> Any:
+        return self._table._columns[column][self._index]
+
+    def __iter__(self) -> Iterator[Any]:
+        index = self._index
+        return (column[index] for column in self._table._columns)
+
+    def tolist(self) -> List[Any]:
+        return list(self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (RowView, list, tuple)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RowView({self.tolist()!r})"
+
+
+class ResultTable:
+    """
+    Rows of a scrape, stored column-wise (see the module comment).
+    Appending and iterating are the cheap operations; a slice is a new table
+    holding a copy of those rows. Compares equal to the same rows as lists.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, width: Optional[int] = None):
+        self.column_names = list(columns) if columns is not None else None
+        self.width = width if width is not None else (len(columns) if columns is not None else None)
+        self._columns: List[Union[_DictColumn, _ListColumn]] = []
+        self._length = 0
+        if self.width is not None:
+            self._columns = [_DictColumn() for _ in range(self.width)]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]], columns: Optional[List[str]] = None) -> 'ResultTable':
+        table = cls(columns)
+        table.extend(rows)
+        return table
+
+    # --- building ---
+
+    def _set_width(self, width: int):
+        self.width = width
+        self._columns = [_DictColumn() for _ in range(width)]
+
+    def append(self, row: Sequence[Any]):
+        if self.width is None:
+            self._set_width(len(row))
+        if len(row) != self.width:
+            raise ValueError(f"Row of {len(row)} values in a table of {self.width} columns.")
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self._length += 1
+        if self._length % TABLE_DICT_MIN_ROWS == 0:
+            self._check_encodings()
+
+    def extend(self, rows: Iterable[Sequence[Any]]):
+        """Append many rows; rows from another ResultTable are copied column by column."""
+        if isinstance(rows, ResultTable):
+            if not rows._length:
+                return
+            if self.width is None:
+                self._set_width(rows.width)
+            if rows.width != self.width:
+                raise ValueError(f"Rows of {rows.width} values in a table of {self.width} columns.")
+            for column, source in zip(self._columns, rows._columns):
+                column.extend(source.iter_values())
+            self._length += rows._length
+            self._check_encodings()
+            return
+        # Chunks of rows transposed at once: one extend per column, not per cell
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, TABLE_DICT_MIN_ROWS))
+            if not chunk:
+                return
+            if self.width is None:
+                self._set_width(len(chunk[0]))
+            if any(len(row) != self.width for row in chunk):
+                bad = next(row for row in chunk if len(row) != self.width)
+                raise ValueError(f"Row of {len(bad)} values in a table of {self.width} columns.")
+            for column, values in zip(self._columns, zip(*chunk)):
+                column.extend(values)
+            self._length += len(chunk)
+            self._check_encodings()
+
+    def _check_encodings(self):
+        # Columns with mostly distinct values: codes only add memory, decode once to a list
+        for i, column in enumerate(self._columns):
+            if isinstance(column, _DictColumn) and not column.worth_keeping():
+                self._columns[i] = _ListColumn(column.iter_values())
+
+    # --- reading ---
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        """Rows as new lists, built from the columns on the fly."""
+        if not self._columns:
+            return iter(())
+        return map(list, zip(*(column.iter_values() for column in self._columns)))
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[List[Any]]:
+        if not self._columns:
+            return iter(())
+        return map(list, zip(*(column.iter_values(start, stop) for column in self._columns)))
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RowView, 'ResultTable']:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            table = ResultTable(self.column_names, self.width)
+            if step == 1:
+                table.extend(self.iter_rows(start, stop))
+            else:
+                table.extend(self[i].tolist() for i in range(start, stop, step))
+            return table
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ResultTable index out of range")
+        return RowView(self, index)
+
+    def column(self, index: int, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """The values of a column (rows start:stop, all by default), as a list."""
+        return list(self._columns[index].iter_values(start, stop))
+
+    def tolist(self) -> List[List[Any]]:
+        return list(self)
+
+    def encodings(self) -> List[str]:
+        """'dict' or 'list' per column (how each one is stored)."""
+        return ['dict' if isinstance(column, _DictColumn) else 'list' for column in self._columns]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ResultTable, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ResultTable({self._length} rows x {self.width or 0} columns)"
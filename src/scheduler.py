@@ -0,0 +1,207 @@
+# Per-host politeness scheduler for the fetch workers
+# Each host gets a token bucket (request rate), a concurrency cap, and a
+# "not before" time used for Retry-After and exponential backoff. The rate
+# adapts to what the host shows: it grows slowly while responses stay fast
+# and is halved on throttling, server errors or a latency spike (AIMD).
+import email.utils
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+
+from config import (BACKOFF_BASE, BACKOFF_MAX, DEFAULT_PER_HOST_LIMIT, HOST_BURST,
+                    HOST_MAX_RATE, HOST_MIN_RATE, HOST_RATE, MAX_RETRIES)
+from jobs import CancelToken, check_cancelled
+
+# Status codes worth retrying: the request may succeed later
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# Latency above this multiple of the host's usual latency counts as a slowdown
+LATENCY_SPIKE = 3.0
+# The usual latency is the lower quartile of the host's last LATENCY_WINDOW
+# responses: one fast outlier (a 304, a tiny page) does not become the baseline
+LATENCY_WINDOW = 50
+# Weight of the last sample in the latency moving average
+LATENCY_SMOOTHING = 0.2
+
+T = TypeVar('T')
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity` saved up.
+    A caller without a token reserves the next one (the count goes negative)
+    and waits for it, so waiters are served in order with a single wait each.
+    """
+
+    def __init__(self, rate: float, capacity: float, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cancel: Optional[CancelToken] = None):
+        """
+        Take a token, waiting until it is available.
+        With `cancel`, the wait ends early (ScrapeCancelled) when cancelled.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            if cancel is None:
+                self._sleep(wait)
+            elif cancel.wait(wait):
+                cancel.check()
+
+
+class _HostState:
+    """Everything the scheduler knows about one host."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int, sleep: Callable[[float], None]):
+        self.bucket = TokenBucket(rate, burst, sleep)
+        self.slots = threading.Semaphore(concurrency)
+        self.not_before = 0.0              # time.monotonic() before which no request is sent
+        self.samples = deque(maxlen=LATENCY_WINDOW) # Last latencies, for the baseline
+        self.latency: Optional[float] = None # Moving average
+
+
+class HostScheduler:
+    """
+    Shared by all the fetch workers of a batch or crawl.
+    Use call(url, fetch) to run a request with rate limiting and retries,
+    or slot(url) to only hold a rate-limited concurrency slot.
+    """
+
+    def __init__(self,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 rate: float = HOST_RATE,
+                 min_rate: float = HOST_MIN_RATE,
+                 max_rate: float = HOST_MAX_RATE,
+                 burst: int = HOST_BURST,
+                 max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX,
+                 sleep: Callable[[float], None] = time.sleep):
+        if per_host_limit < 1:
+            raise ValueError("per_host_limit must be at least 1.")
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("Rates must satisfy 0 < min_rate <= rate <= max_rate.")
+        self.per_host_limit = per_host_limit
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(self.rate, self.burst, self.per_host_limit, self._sleep)
+                self._hosts[host] = state
+            return state
+
+    def host_rate(self, url: str) -> float:
+        """Current request rate allowed for the URL's host."""
+        return self._state(url).bucket.rate
+
+    @contextmanager
+    def slot(self, url: str, cancel: Optional[CancelToken] = None):
+        """
+        Wait for the host's backoff, a concurrency slot and a token.
+        With `cancel`, a backoff wait ends early (ScrapeCancelled) when cancelled.
+        """
+        state = self._state(url)
+        with state.slots:
+            delay = state.not_before - time.monotonic()
+            if delay > 0:
+                if cancel is None:
+                    self._sleep(delay)
+                elif cancel.wait(delay):
+                    cancel.check()
+            state.bucket.acquire(cancel)
+            yield
+
+    def _backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _on_success(self, state: _HostState, latency: float):
+        with self._lock:
+            state.samples.append(latency)
+            baseline = sorted(state.samples)[len(state.samples) // 4]
+            state.latency = latency if state.latency is None else \
+                (1 - LATENCY_SMOOTHING) * state.latency + LATENCY_SMOOTHING * latency
+            bucket = state.bucket
+            if state.latency > LATENCY_SPIKE * max(baseline, 0.001):
+                bucket.rate = max(self.min_rate, bucket.rate / 2) # The host is struggling
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + 0.1 * self.rate) # Probe for more
+
+    def _on_failure(self, state: _HostState, delay: float):
+        with self._lock:
+            state.bucket.rate = max(self.min_rate, state.bucket.rate / 2)
+            state.not_before = max(state.not_before, time.monotonic() + delay)
+
+    def call(self, url: str, fetch: Callable[[], T], cancel: Optional[CancelToken] = None,
+             record_latency: bool = True) -> T:
+        """
+        Run fetch() for the URL inside a slot, retrying on 429/5xx and connection
+        errors. Retry-After is honored when present, otherwise the wait is an
+        exponential backoff with jitter. The last error is raised when retries run out.
+        With `cancel`, no new attempt starts once cancelled (ScrapeCancelled).
+        With record_latency=False the time fetch() takes does not adapt the
+        host's rate (e.g. a browser render, slow whatever the host does).
+        """
+        state = self._state(url)
+        attempt = 0
+        while True:
+            check_cancelled(cancel)
+            with self.slot(url, cancel):
+                started = time.monotonic()
+                try:
+                    result = fetch()
+                except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
+                    response = getattr(e, 'response', None)
+                    status = response.status_code if response is not None else None
+                    retryable = status is None or status in RETRY_STATUSES
+                    if not retryable or attempt >= self.max_retries:
+                        raise
+                    retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+                    delay = min(self.backoff_max, retry_after) if retry_after is not None else self._backoff(attempt)
+                    self._on_failure(state, delay)
+                    attempt += 1
+                    continue
+            if record_latency:
+                self._on_success(state, time.monotonic() - started)
+            return result
@@ -1,22 +1,124 @@
 from urllib.parse import urljoin
+from functools import lru_cache
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from class_selectors import *
+from parsers import parse_document
+from http_cache import ResponseCache
+from document_cache import DocumentCache
+from scheduler import HostScheduler
+from metrics import ScrapeStats, stage
+from jobs import CancelToken, ScrapeCancelled, check_cancelled
+from archive import ArchiveWriter
+from change_index import ChangeIndex, config_signature, page_fingerprint
+from transforms import apply_transforms
+from renderer import BrowserPool
+from result_table import ResultTable
+from config import (DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT, DEFAULT_PARSE_WORKERS,
+                    REQUEST_TIMEOUT, SELECTOR_CACHE_SIZE, STREAM_CHUNK_SIZE)
 from queue import Queue
-from typing import Any
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
 
 # Interface: AbstractSelector
 # Implementations: TagSelector, AttributeSelector
 
-def fetch_page(url: str):
-    response = requests.get(url)
+def create_session(pool_size: int = DEFAULT_MAX_WORKERS) -> requests.Session:
+    """
+    Build a Session whose connection pool can keep one connection
+    alive per worker, so pages on the same host reuse TCP/TLS handshakes.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_page(url: str, session: Optional[requests.Session] = None, stream: bool = False,
+               cache: Optional[ResponseCache] = None, cancel: Optional[CancelToken] = None,
+               archive: Optional[ArchiveWriter] = None):
+    # Without a session every call opens a fresh connection
+    # stream=True leaves the body unread (see streaming.py)
+    # cache: on-disk ResponseCache; a page still fresh is served from it, others are
+    # revalidated with ETag/Last-Modified and downloaded like any page (see http_cache.py)
+    # cancel: the page is downloaded in chunks on a helper thread and the job gets
+    # ScrapeCancelled as soon as it is cancelled, even before the server answers
+    # archive: every successful response is also captured there, for offline replay (see archive.py)
+    if archive is not None and not stream:
+        response = fetch_page(url, session, cache=cache, cancel=cancel)
+        archive.record(url, response)
+        return response
+    check_cancelled(cancel)
+    conditional = None
+    if cache is not None and not stream:
+        cached, conditional = cache.lookup(url, session)
+        if cached is not None:
+            return cached
+
+    client = session if session is not None else requests
+    if cancel is None or stream:
+        response = client.get(url, headers=conditional, timeout=REQUEST_TIMEOUT, stream=stream)
+    else:
+        response = _download_cancellable(client, url, conditional, cancel)
+
+    if cache is not None and not stream:
+        return cache.update(url, response, session) # A 304 gives the stored page
     response.raise_for_status()
     return response
 
-def soupify(html_content):
+def _download_cancellable(client, url: str, headers: Optional[Dict[str, str]], cancel: CancelToken):
+    """
+    Download the page on a helper thread, in chunks, while the job waits for it or
+    for its CancelToken. A cancelled job returns at once, even while the request is
+    blocked connecting or waiting for headers, and frees its job slot; the dropped
+    request ends on its own, at its next chunk or after REQUEST_TIMEOUT.
+    """
+    outcome = {}
+    finished = threading.Event()
+
+    def download():
+        try:
+            response = client.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+            try:
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    cancel.check()
+                    chunks.append(chunk)
+                # Same object as a non-streamed response from here on (.content, .text)
+                response._content = b''.join(chunks)
+            finally:
+                response.close() # On cancel: the connection is dropped, not read to the end
+            outcome['response'] = response
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=download, name='fetch', daemon=True).start()
+    unregister = cancel.on_cancel(finished.set)
+    try:
+        finished.wait()
+    finally:
+        unregister()
+    cancel.check()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['response']
+
+def soupify(html_content, parser: Optional[str] = None):
     # html_content: response.content
-    return BeautifulSoup(html_content, "html.parser")
+    # parser: backend name from parsers.PARSER_REGISTRY (None -> config.DEFAULT_PARSER)
+    return parse_document(html_content, parser)
 
 def select_elements(soup: BeautifulSoup, column_jobs: List[AbstractSelector]) -> List[List[Tag]]:
+    if isinstance(soup, Tag):
+        element_lists = _select_elements_single_pass(soup, column_jobs)
+        if element_lists is not None:
+            return element_lists
+
     element_lists = []
     for job in column_jobs:
         # Every job knows how to find its elements
@@ -25,6 +127,214 @@ def select_elements(soup: BeautifulSoup, column_jobs: List[AbstractSelector]) ->
         
     return element_lists
 
+# Rightmost compound of a CSS query -> the id/class/tag an element needs to match it.
+# Used to skip, for each element, the queries that cannot possibly match
+# (the "rule hashing" browsers use). None means: always test the query.
+_IDENT = re.compile(r'-?[A-Za-z_][\w-]*')
+
+def _split_top_level(query: str, separators: str) -> Optional[List[str]]:
+    """Split on separator chars outside (), [] and quotes. None on escapes."""
+    if '\\' in query:
+        return None
+    parts, current, depth, quote = [], [], 0, None
+    for char in query:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0 and char in separators:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+def _compound_key(compound: str) -> Optional[Tuple[str, str]]:
+    """('id'|'class'|'tag', value) required by a compound selector, if any."""
+    if '|' in compound:
+        return None # Namespaced type selector
+    tag = None
+    match = _IDENT.match(compound)
+    if match:
+        tag = match.group().lower()
+    # Only look at the top level: (.a) inside :not()/:is() is not a requirement
+    depth, quote, plain = 0, None, []
+    for char in compound:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif depth == 0:
+            plain.append(char)
+            continue
+        plain.append(' ')
+    plain = ''.join(plain)
+    for prefix, kind in (('#', 'id'), ('.', 'class')):
+        position = plain.find(prefix)
+        while position != -1:
+            match = _IDENT.match(plain, position + 1)
+            if match:
+                return kind, match.group().lower()
+            position = plain.find(prefix, position + 1)
+    if tag:
+        return 'tag', tag
+    return None
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE)
+def _query_keys(query: str) -> Optional[FrozenSet[Tuple[str, str]]]:
+    """Keys an element must have one of to match `query` (None: unknown)."""
+    selector_list = _split_top_level(query, ',')
+    if selector_list is None:
+        return None
+    keys = set()
+    for complex_selector in selector_list:
+        parts = _split_top_level(complex_selector.strip(), ' \t\n>+~')
+        compound = [part for part in parts if part.strip()] if parts else []
+        if not compound:
+            return None
+        key = _compound_key(compound[-1].strip())
+        if key is None:
+            return None
+        keys.add(key)
+    return frozenset(keys)
+
+def _select_elements_single_pass(soup: BeautifulSoup, column_jobs: List[AbstractSelector]) -> Optional[List[List[Tag]]]:
+    """
+    Same result as calling find_elements per column, with one walk of the tree.
+    Returns None when the queries cannot be handled this way.
+    """
+    matches = _match_single_pass(soup, [query for job in column_jobs for query in job.queries])
+    if matches is None:
+        return None
+
+    element_lists = []
+    for job in column_jobs:
+        # First query with results wins, like AbstractSelector.find_elements
+        elements = []
+        for query in job.queries:
+            if matches[query]:
+                elements = list(matches[query])
+                break
+        element_lists.append(elements)
+    return element_lists
+
+def _match_single_pass(soup: BeautifulSoup, all_queries: List[str]) -> Optional[Dict[str, List[Tag]]]:
+    """
+    Elements matched by each query (fallbacks included), in document order.
+    Queries are indexed by the id/class/tag their rightmost compound requires,
+    so each element is only matched against the few queries that could apply
+    to it instead of every query scanning the whole document.
+    Returns None when the queries cannot be handled this way.
+    """
+    queries = []
+    for query in all_queries:
+        # :scope means the document in select() but the element in match()
+        if ':scope' in query:
+            return None
+        if query not in queries:
+            queries.append(query)
+
+    index: Dict[Tuple[str, str], List[str]] = {}
+    always = []
+    for query in queries:
+        keys = _query_keys(query)
+        if keys is None:
+            always.append(query)
+            continue
+        for key in keys:
+            index.setdefault(key, []).append(query)
+
+    if not index:
+        return None # Nothing to narrow down: soupsieve's own select() is faster
+
+    compiled = {query: compile_selector(query) for query in queries}
+    matches: Dict[str, List[Tag]] = {query: [] for query in queries}
+
+    # Document order, like soup.select()
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+
+        candidates = list(always)
+        candidates += index.get(('tag', element.name.lower()), ())
+        element_id = element.get('id')
+        if element_id and isinstance(element_id, str):
+            candidates += index.get(('id', element_id.lower()), ())
+        classes = element.get('class')
+        if classes:
+            if isinstance(classes, str):
+                classes = classes.split()
+            for name in classes:
+                candidates += index.get(('class', name.lower()), ())
+
+        if not candidates:
+            continue
+        for query in dict.fromkeys(candidates): # Dedup, keep order
+            if compiled[query].match(element):
+                matches[query].append(element)
+
+    return matches
+
+def _build_records_single_pass(soup: BeautifulSoup, record_selector: AbstractSelector,
+                               column_jobs: List[AbstractSelector], base_url: str) -> Optional[List[List[Any]]]:
+    """
+    Same rows as extract_record on every record, with one walk of the tree
+    finding the records and the columns together: each column match is then
+    assigned to the records containing it (nested records too), instead of
+    running every query again inside every record.
+    Returns None when the queries cannot be handled this way.
+    """
+    column_queries = [query for job in column_jobs for query in job.queries]
+    matches = _match_single_pass(soup, record_selector.queries + column_queries)
+    if matches is None:
+        return None
+
+    # Records: first query with results, like AbstractSelector.find_elements
+    records = next((matches[query] for query in record_selector.queries if matches[query]), [])
+
+    position = {id(record): n for n, record in enumerate(records)}
+    # firsts[n][query]: first element matching query inside records[n]
+    firsts: List[Dict[str, Tag]] = [{} for _ in records]
+    for query in dict.fromkeys(column_queries):
+        for element in matches[query]:
+            ancestor = element.parent # select_one() on a record never returns the record itself
+            while ancestor is not None:
+                n = position.get(id(ancestor))
+                if n is not None:
+                    firsts[n].setdefault(query, element)
+                ancestor = ancestor.parent
+
+    rows = []
+    for found in firsts:
+        row = []
+        for job in column_jobs:
+            element = next((found[query] for query in job.queries if query in found), None)
+            row.append(clean_value(element, job, base_url) if element is not None else None)
+        rows.append(row)
+    return rows
+
+def clean_value(tag: Tag, job: AbstractSelector, base_url: str) -> Any:
+    """Extract one cell, resolving relative links against the page URL."""
+    cleaned_data = job.extract(tag)
+
+    if isinstance(job, AttributeSelector) and \
+        job.attribute_name in ('href', 'src') and \
+        cleaned_data:
+        cleaned_data = urljoin(base_url, cleaned_data)
+
+    return cleaned_data
+
 def format_results(element_lists: List[List[Tag]], column_jobs: List[AbstractSelector], base_url: str) -> List[List[Any]]:
     # zip(*element_lists) transforms [ [a,b], [c,d] ] in zip([a,b], [c,d])
     zipped_tags = zip(*element_lists)
@@ -34,33 +344,351 @@ def format_results(element_lists: List[List[Tag]], column_jobs: List[AbstractSel
         cleaned_group = []
         
         for tag, job in zip(tag_group, column_jobs):
-            cleaned_data = job.extract(tag)
-
-            if isinstance(job, AttributeSelector) and \
-                job.attribute_name in ('href', 'src') and \
-                cleaned_data:
-                cleaned_data = urljoin(base_url, cleaned_data)
-
-            cleaned_group.append(cleaned_data)
+            cleaned_group.append(clean_value(tag, job, base_url))
             
         results.append(cleaned_group)
     
     return results
 
-def execute_scraping(gui_data: GUIRef, result_queue: Queue):
+def extract_record(record: Tag, column_jobs: List[AbstractSelector], base_url: str) -> List[Any]:
+    """
+    Build one row from a record element (e.g. one product card):
+    every column takes its first match inside the record, None when missing.
+    """
+    row = []
+    for job in column_jobs:
+        element = job.find_first(record)
+        row.append(clean_value(element, job, base_url) if element is not None else None)
+    return row
+
+def build_rows(soup: BeautifulSoup, column_jobs: List[AbstractSelector], base_url: str,
+               record_selector: Optional[AbstractSelector] = None,
+               stats: Optional[ScrapeStats] = None) -> List[List[Any]]:
+    """
+    Rows of a parsed page.
+    Without a record selector the columns are selected over the whole page and
+    zipped (format_results); with one, every matched record gives one row,
+    its columns searched only inside that record (extract_record).
+    Column transforms (AbstractSelector.transforms) then run column by column.
+    With `stats` the select/format times, the matches and the rows are recorded.
+    """
+    if record_selector is None:
+        with stage(stats, 'select'):
+            element_lists = select_elements(soup, column_jobs)
+        with stage(stats, 'format'):
+            rows = format_results(element_lists, column_jobs, base_url)
+            _transform_rows(rows, column_jobs, base_url)
+        if stats is not None:
+            stats.add_matches(unique_column_names(column_jobs), [len(elements) for elements in element_lists])
+            stats.add_rows(len(rows))
+        return rows
+
+    # Record mode selects and formats in one go: all of it counts as "select"
+    with stage(stats, 'select'):
+        rows = None
+        if isinstance(soup, Tag):
+            rows = _build_records_single_pass(soup, record_selector, column_jobs, base_url)
+        if rows is None:
+            rows = [extract_record(record, column_jobs, base_url) for record in record_selector.find_elements(soup)]
+    if stats is not None:
+        stats.add_matches(unique_column_names(column_jobs),
+                          [sum(row[i] is not None for row in rows) for i in range(len(column_jobs))])
+        stats.add_rows(len(rows))
+    with stage(stats, 'format'):
+        _transform_rows(rows, column_jobs, base_url)
+    return rows
+
+def no_matches(rows: List[List[Any]]) -> bool:
+    """True when the selectors found nothing: no rows, or rows of None only (record mode)."""
+    return not any(value is not None for row in rows for value in row)
+
+def _render_wait_query(column_jobs: List[AbstractSelector], record_selector: Optional[AbstractSelector]) -> str:
+    # What the rendered page is waited for: a record, or any column (a CSS selector list)
+    queries = record_selector.queries if record_selector is not None else \
+        [query for job in column_jobs for query in job.queries]
+    return ", ".join(queries)
+
+def render_page(url: str, renderer: BrowserPool, column_jobs: List[AbstractSelector],
+                record_selector: Optional[AbstractSelector] = None,
+                stats: Optional[ScrapeStats] = None,
+                cancel: Optional[CancelToken] = None):
+    """The page's DOM rendered by a browser (see renderer.py); rendering counts as the fetch stage."""
+    with stage(stats, 'fetch'):
+        response = renderer.render(url, _render_wait_query(column_jobs, record_selector), cancel)
+    response.raise_for_status()
+    if stats is not None:
+        stats.add_rendered_page()
+    return response
+
+def render_rows(url: str, renderer: BrowserPool, column_jobs: List[AbstractSelector],
+                parser: Optional[str] = None,
+                record_selector: Optional[AbstractSelector] = None,
+                stats: Optional[ScrapeStats] = None,
+                cancel: Optional[CancelToken] = None) -> List[List[Any]]:
+    """
+    Rows of the page as rendered by a browser, for pages whose server HTML
+    matched nothing: the rendered DOM goes through the same soupify / build_rows path.
+    """
+    response = render_page(url, renderer, column_jobs, record_selector, stats, cancel)
+    check_cancelled(cancel)
+    return parse_rows(response.content, column_jobs, response.url, parser, record_selector, stats)
+
+def _transform_rows(rows: List[List[Any]], column_jobs: List[AbstractSelector], base_url: str):
+    transforms = [job.transforms for job in column_jobs]
+    if any(transform is not None for transform in transforms):
+        apply_transforms(rows, transforms, base_url)
+
+def execute_scraping(gui_data: GUIRef, result_queue: Queue,
+                     cache: Optional[ResponseCache] = None,
+                     document_cache: Optional[DocumentCache] = None,
+                     stats: Optional[ScrapeStats] = None,
+                     batch_size: Optional[int] = None,
+                     cancel: Optional[CancelToken] = None,
+                     index: Optional[ChangeIndex] = None,
+                     archive: Optional[ArchiveWriter] = None,
+                     renderer: Optional[BrowserPool] = None):
     """
     Executes the whole workflow in a separeted thread
     It puts the results in the queue
+    With a document_cache, a page whose source did not change since it was
+    parsed is not parsed again (it is still revalidated, see fetch_page).
+    With `stats`, they are filled in and put on the queue (finished) just
+    before the results or the Exception.
+    With `batch_size` the results are put as RowBatch messages of at most that
+    many rows (the last one with done=True) instead of a single list; their
+    rows are compact ResultTables (see result_table.py), to be kept as is.
+    With `cancel` (see jobs.py) the run stops at the next step once cancelled:
+    ScrapeCancelled is put on the queue like any other failure.
+    With an `index` (see change_index.py) the results are the delta rows
+    ([change] + row) since the last run of this URL, and a page that did not
+    change is not parsed at all (its delta is empty).
+    With an `archive` the downloaded page is captured there (see archive.py).
+    With a `renderer` (see renderer.py) a page whose HTML matches none of the
+    selectors is rendered in a browser and the rows come from its final DOM.
     """
     try:
-        response = fetch_page(gui_data.url)
+        if index is not None:
+            signature = config_signature(gui_data.selectors, gui_data.record_selector, gui_data.parser)
+
+        # Always revalidated: with a ResponseCache an unchanged page is a 304, not a download
+        with stage(stats, 'fetch'):
+            response = fetch_page(gui_data.url, cache=cache, cancel=cancel, archive=archive)
+        if stats is not None:
+            stats.add_page(len(response.content), getattr(response, 'from_cache', False))
+        base_url = response.url
+        fingerprint = page_fingerprint(response.content) if index is not None else None
+        check_cancelled(cancel)
 
-        soup = soupify(response.content)
+        if index is not None and index.unchanged(gui_data.url, signature, fingerprint):
+            final_results = [] # Same page as last time: nothing to parse, nothing changed
+            if stats is not None:
+                stats.add_unchanged_page()
+        else:
+            with stage(stats, 'parse'):
+                if document_cache is not None:
+                    # The stored document is reused only if the page source has the same hash
+                    previous = document_cache.get(gui_data.url, gui_data.parser)
+                    entry = document_cache.get_or_parse(
+                        gui_data.url, response.content, base_url,
+                        lambda content: soupify(content, gui_data.parser), gui_data.parser
+                    )
+                    soup = entry.document
+                    if entry is previous and stats is not None:
+                        stats.add_document_cache_hit()
+                else:
+                    soup = soupify(response.content, gui_data.parser)
 
-        tag_lists = select_elements(soup, gui_data.selectors)
-        final_results = format_results(tag_lists, gui_data.selectors, response.url)
+            check_cancelled(cancel)
+            final_results = build_rows(soup, gui_data.selectors, base_url, gui_data.record_selector, stats)
+            if renderer is not None and no_matches(final_results):
+                final_results = render_rows(gui_data.url, renderer, gui_data.selectors, gui_data.parser,
+                                            gui_data.record_selector, stats, cancel)
+            if index is not None:
+                final_results = index.update(gui_data.url, signature, fingerprint, final_results)
+                index.flush()
 
-        result_queue.put(final_results)
+        if stats is not None:
+            result_queue.put(stats.finish())
+        if batch_size is None:
+            result_queue.put(final_results)
+        else:
+            for start in range(0, len(final_results), batch_size):
+                check_cancelled(cancel)
+                batch = ResultTable.from_rows(final_results[start:start + batch_size])
+                result_queue.put(RowBatch(gui_data.url, batch))
+            result_queue.put(RowBatch(gui_data.url, ResultTable(), done=True))
 
     except Exception as e:
-        result_queue.put(e)
\ No newline at end of file
+        if stats is not None:
+            stats.add_failure()
+            result_queue.put(stats.finish())
+        result_queue.put(e)
+
+def parse_rows(html_content: bytes, column_jobs: List[AbstractSelector], base_url: str,
+               parser: Optional[str] = None,
+               record_selector: Optional[AbstractSelector] = None,
+               stats: Optional[ScrapeStats] = None) -> List[List[Any]]:
+    """
+    Parse a page and return its formatted rows.
+    Module-level (picklable) so it can run in a ProcessPoolExecutor worker:
+    only the bytes go in and only the compact rows come back, never the soup.
+    """
+    with stage(stats, 'parse'):
+        soup = soupify(html_content, parser)
+    return build_rows(soup, column_jobs, base_url, record_selector, stats)
+
+def _parse_response(response, column_jobs: List[AbstractSelector],
+                    parse_pool: Optional[Executor], parser: Optional[str],
+                    record_selector: Optional[AbstractSelector] = None,
+                    stats: Optional[ScrapeStats] = None) -> List[List[Any]]:
+    if parse_pool is None:
+        return parse_rows(response.content, column_jobs, response.url, parser, record_selector, stats)
+    # Stats do not cross the process boundary: the whole round trip counts as "parse"
+    with stage(stats, 'parse'):
+        rows = parse_pool.submit(parse_rows, response.content, column_jobs, response.url, parser,
+                                 record_selector).result()
+    if stats is not None:
+        stats.add_rows(len(rows))
+    return rows
+
+
+def execute_batch_scraping(urls: Iterable[str],
+                           column_jobs: List[AbstractSelector],
+                           result_queue: Queue,
+                           max_workers: int = DEFAULT_MAX_WORKERS,
+                           per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                           session: Optional[requests.Session] = None,
+                           parse_workers: int = DEFAULT_PARSE_WORKERS,
+                           parser: Optional[str] = None,
+                           cache: Optional[ResponseCache] = None,
+                           scheduler: Optional[HostScheduler] = None,
+                           record_selector: Optional[AbstractSelector] = None,
+                           stats: Optional[ScrapeStats] = None,
+                           cancel: Optional[CancelToken] = None,
+                           index: Optional[ChangeIndex] = None,
+                           archive: Optional[ArchiveWriter] = None,
+                           renderer: Optional[BrowserPool] = None) -> BatchSummary:
+    """
+    Scrape many URLs concurrently with the same selectors.
+
+    Every URL produces exactly one PageResult on the queue, as soon as it is
+    done (errors are captured per URL and do not stop the batch).
+    A BatchSummary is put on the queue once every URL has been processed.
+    `urls` may be a generator: only a bounded number of URLs is pending at a time.
+
+    Requests go through a HostScheduler (per-host rate, concurrency cap and
+    retries with backoff on 429/5xx); pass one to share it or tune it.
+
+    With parse_workers > 0 the fetch threads hand the page bytes to a pool of
+    processes that parse and extract the rows, so CPU-bound parsing is not
+    serialized by the GIL. With 0 parsing happens in the fetch thread.
+
+    With a record_selector every page gives one row per record (see build_rows).
+    With `stats` the metrics of all pages are put on the queue (finished)
+    just before the BatchSummary.
+
+    With `cancel` (see jobs.py) no new URL starts once cancelled, in-flight
+    downloads stop at the next chunk and queued parse work is dropped; those
+    pages get no PageResult and the BatchSummary is marked cancelled.
+
+    With an `index` (see change_index.py) every PageResult holds the delta
+    rows ([change] + row) of its page; unchanged pages are not parsed.
+
+    With an `archive` every downloaded page is captured there, to be
+    re-extracted later without the network (see archive.py / replay.py).
+
+    With a `renderer` (see renderer.py) pages whose HTML matches none of the
+    selectors are rendered in a browser, their rows taken from the final DOM.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    if parse_workers < 0:
+        raise ValueError("parse_workers cannot be negative.")
+
+    own_session = session is None
+    if own_session:
+        session = create_session(max_workers)
+
+    if scheduler is None:
+        scheduler = HostScheduler(per_host_limit)
+    # Bounds the pending futures so a huge generator is not drained up front
+    pending = threading.BoundedSemaphore(max_workers * 2)
+    counter_lock = threading.Lock()
+    counts = {'total': 0, 'failed': 0}
+    if index is not None:
+        signature = config_signature(column_jobs, record_selector, parser)
+
+    def fetch(url: str):
+        with stage(stats, 'fetch'):
+            return fetch_page(url, session, cache=cache, cancel=cancel, archive=archive)
+
+    def parse(url: str, response):
+        rows = _parse_response(response, column_jobs, parse_pool, parser, record_selector, stats)
+        if renderer is not None and no_matches(rows):
+            # Same host slot and retries as a download, but a render's seconds say
+            # nothing about the host: they do not adapt its rate. The parsing stays outside
+            rendered = scheduler.call(url, lambda: render_page(url, renderer, column_jobs, record_selector,
+                                                               stats, cancel), cancel, record_latency=False)
+            check_cancelled(cancel)
+            rows = _parse_response(rendered, column_jobs, parse_pool, parser, record_selector, stats)
+        return rows
+
+    def worker(url: str):
+        try:
+            # The host slot only covers the network part
+            response = scheduler.call(url, lambda: fetch(url), cancel)
+            if stats is not None:
+                stats.add_page(len(response.content), getattr(response, 'from_cache', False))
+            check_cancelled(cancel)
+            if index is None:
+                rows = parse(url, response)
+            else:
+                fingerprint = page_fingerprint(response.content)
+                if index.unchanged(url, signature, fingerprint):
+                    rows = []
+                    if stats is not None:
+                        stats.add_unchanged_page()
+                else:
+                    rows = index.update(url, signature, fingerprint, parse(url, response))
+            page = PageResult(url, rows)
+        except ScrapeCancelled:
+            return # Not scraped: neither a result nor a failure
+        except Exception as e:
+            page = PageResult(url, error=e)
+            if stats is not None:
+                stats.add_failure()
+
+        with counter_lock:
+            counts['total'] += 1
+            if not page.ok:
+                counts['failed'] += 1
+        result_queue.put(page)
+
+    def release(_future):
+        pending.release()
+
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for url in urls:
+                pending.acquire()
+                if cancel is not None and cancel.cancelled:
+                    break
+                executor.submit(worker, url).add_done_callback(release)
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=cancel is not None and cancel.cancelled)
+        if own_session:
+            session.close()
+        if index is not None:
+            index.flush()
+        if archive is not None:
+            archive.flush()
+
+    cancelled = cancel is not None and cancel.cancelled
+    summary = BatchSummary(counts['total'], counts['failed'], cancelled)
+    if stats is not None:
+        result_queue.put(stats.finish())
+    result_queue.put(summary)
+    return summary
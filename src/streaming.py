@@ -0,0 +1,261 @@
+# Streaming mode: rows are produced while the page is still downloading
+# The response is read in chunks and fed to an incremental parser; only the
+# record element currently open is kept in memory, never the whole DOM.
+import codecs
+import re
+from html import escape
+from html.parser import HTMLParser
+from queue import Queue
+from typing import Any, Iterator, List, Optional, Tuple
+
+import requests
+
+from class_selectors import AbstractSelector, GUIRef, RowBatch, TagSelector
+from config import STREAM_BATCH_SIZE, STREAM_CHUNK_SIZE
+import scraper_logic as sl
+
+# Elements that never have a closing tag
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+))
+
+_SIMPLE_SELECTOR = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:[.#][\w-]+)*)$')
+
+
+def parse_record_selector(query: str) -> Tuple[Optional[str], Optional[str], List[str]]:
+    """
+    Split a compound selector like "article.product_pod" or "tr#main.row"
+    into (tag, id, classes). Combinators and pseudo-classes need the whole
+    tree, so they are not allowed for the record element.
+    """
+    match = _SIMPLE_SELECTOR.match(query.strip())
+    if not match or not query.strip():
+        raise ValueError(f"Record selector must be a simple tag/.class/#id selector: {query}")
+
+    element_id = None
+    classes = []
+    for token in re.findall(r'[.#][\w-]+', match.group('rest')):
+        if token[0] == '#':
+            element_id = token[1:]
+        else:
+            classes.append(token[1:])
+    tag = match.group('tag').lower() if match.group('tag') else None
+    return tag, element_id, classes
+
+
+# Elements whose end tag may be left out, and the start tags that close them
+# (a subset of the HTML rules: what lists, tables and paragraphs need)
+_P_CLOSERS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'main', 'menu',
+    'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul',
+))
+_CELLS = frozenset(('td', 'th', 'tr', 'thead', 'tbody', 'tfoot'))
+IMPLIED_END = {
+    'p': _P_CLOSERS,
+    'li': frozenset(('li',)),
+    'dt': frozenset(('dt', 'dd')),
+    'dd': frozenset(('dt', 'dd')),
+    'option': frozenset(('option', 'optgroup')),
+    'tr': frozenset(('tr', 'thead', 'tbody', 'tfoot')),
+    'td': _CELLS,
+    'th': _CELLS,
+    'thead': frozenset(('thead', 'tbody', 'tfoot')),
+    'tbody': frozenset(('thead', 'tbody', 'tfoot')),
+    'tfoot': frozenset(('thead', 'tbody', 'tfoot')),
+}
+# A start tag never closes an element across these (e.g. a nested list's <li>)
+SCOPE_ELEMENTS = frozenset(('ul', 'ol', 'dl', 'table', 'select', 'td', 'th', 'body', 'html'))
+
+
+class RecordCollector(HTMLParser):
+    """
+    Incremental parser: feed() it text chunks, then collect the HTML source of
+    every completed record element from `records`.
+    Only the names of the open elements are kept, like a tree builder without
+    the tree: end tags left out (<li>, <tr>, <p>...) are implied by the next
+    sibling's start tag or by the parent's end tag, so such records close
+    where a browser would close them instead of nesting until EOF.
+    """
+
+    def __init__(self, record_selector: str):
+        super().__init__(convert_charrefs=False) # Keep entities as written
+        self._tag, self._id, self._classes = parse_record_selector(record_selector)
+        self._stack: List[str] = []          # Open elements of the page
+        self._record: Optional[int] = None   # Position of the current record in _stack
+        self._buffer: List[str] = []         # Source of the current record
+        self.records: List[str] = []         # Completed records, drained by the caller
+
+    def _matches(self, tag: str, attrs) -> bool:
+        if self._tag and tag != self._tag:
+            return False
+        attributes = dict(attrs)
+        if self._id and attributes.get('id') != self._id:
+            return False
+        classes = (attributes.get('class') or '').split()
+        return all(name in classes for name in self._classes)
+
+    @property
+    def _capturing(self) -> bool:
+        return self._record is not None
+
+    def _close_to(self, depth: int):
+        """Close the open elements down to `depth`, finishing the record if it is one of them."""
+        while len(self._stack) > depth:
+            open_tag = self._stack.pop()
+            if self._capturing:
+                self._buffer.append(f"</{open_tag}>")
+                if len(self._stack) == self._record:
+                    self._finish()
+
+    def _close_implied(self, tag: str):
+        """Close the elements whose end tag the start tag `tag` implies (a <tr> closes a <td>, then a <tr>)."""
+        depth = len(self._stack) - 1
+        while depth >= 0:
+            open_tag = self._stack[depth]
+            if tag in IMPLIED_END.get(open_tag, ()):
+                self._close_to(depth)
+            elif open_tag in SCOPE_ELEMENTS:
+                return
+            depth -= 1
+
+    def _open(self, tag: str, attrs) -> bool:
+        """Handle a start tag; True if it starts a record."""
+        self._close_implied(tag)
+        starts = not self._capturing and self._matches(tag, attrs)
+        if starts:
+            self._record = len(self._stack)
+        if self._capturing:
+            self._buffer.append(self.get_starttag_text())
+        return starts
+
+    def handle_starttag(self, tag, attrs):
+        starts = self._open(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(tag)
+        elif starts:
+            self._finish() # A void element as record, e.g. "img.cover"
+
+    def handle_startendtag(self, tag, attrs):
+        if self._open(tag, attrs):
+            self._finish()
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return # Stray end tag
+        # Close the elements left open inside it too (e.g. <li> without </li>)
+        depth = len(self._stack) - 1 - self._stack[::-1].index(tag)
+        self._close_to(depth)
+
+    def handle_data(self, data):
+        if self._capturing:
+            self._buffer.append(escape(data, quote=False))
+
+    def handle_entityref(self, name):
+        if self._capturing:
+            self._buffer.append(f"&{name};")
+
+    def handle_charref(self, name):
+        if self._capturing:
+            self._buffer.append(f"&#{name};")
+
+    def _finish(self):
+        self.records.append(''.join(self._buffer))
+        self._buffer = []
+        self._record = None
+
+    def close(self):
+        super().close()
+        self._close_to(0) # Truncated page: close what is still open
+
+
+def _response_decoder(response: requests.Response):
+    # requests guesses ISO-8859-1 for text/* without charset; HTML is mostly UTF-8
+    content_type = response.headers.get('Content-Type', '')
+    encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
+def _records_to_rows(records: List[str], record_selector: str,
+                     column_jobs: List[AbstractSelector], base_url: str) -> Iterator[List[Any]]:
+    # Fragments always go through html.parser: lxml and selectolax rebuild a
+    # full document around them and drop table parts such as a lone <tr>
+    record_finder = TagSelector(record_selector)
+    for source in records:
+        fragment = sl.soupify(source, 'html.parser')
+        # The outermost match is the record element itself
+        record = record_finder.find_elements(fragment)
+        if record:
+            yield sl.extract_record(record[0], column_jobs, base_url)
+
+
+def stream_rows(url: str,
+                record_selector: str,
+                column_jobs: List[AbstractSelector],
+                session: Optional[requests.Session] = None,
+                chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Generator of rows for one page: one row per record element (see
+    scraper_logic.extract_record), yielded as soon as the record closes.
+    Peak memory is one chunk plus one record, whatever the page size.
+    Column selectors only see the record itself (it is parsed on its own):
+    a selector going through its ancestors, like "ol > li h3" for an "li"
+    record, or depending on its siblings (":nth-child") matches nothing.
+    """
+    collector = RecordCollector(record_selector)
+    response = sl.fetch_page(url, session, stream=True)
+    try:
+        decoder = _response_decoder(response)
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            collector.feed(decoder.decode(chunk))
+            records, collector.records = collector.records, []
+            yield from _records_to_rows(records, record_selector, column_jobs, response.url)
+
+        collector.feed(decoder.decode(b'', final=True))
+        collector.close()
+        yield from _records_to_rows(collector.records, record_selector, column_jobs, response.url)
+    finally:
+        response.close()
+
+
+def _default_record_selector(gui_data: GUIRef, record_selector: Optional[str]) -> str:
+    # Streaming needs a single simple query (see parse_record_selector)
+    if record_selector is None:
+        if gui_data.record_selector is None:
+            raise ValueError("Streaming needs a record selector.")
+        record_selector = gui_data.record_selector.queries[0]
+    return record_selector
+
+
+def stream_scraping(gui_data: GUIRef, record_selector: Optional[str] = None,
+                    chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """
+    Generator counterpart of scraper_logic.execute_scraping.
+    `record_selector` defaults to the first query of gui_data.record_selector.
+    """
+    record_selector = _default_record_selector(gui_data, record_selector)
+    return stream_rows(gui_data.url, record_selector, gui_data.selectors, chunk_size=chunk_size)
+
+
+def execute_streaming_scraping(gui_data: GUIRef, record_selector: Optional[str], result_queue: Queue,
+                               batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Streaming version of execute_scraping, meant to run in a worker thread.
+    Puts RowBatch messages on the queue as rows are produced; the last one
+    has done=True. On failure the Exception is put instead, like execute_scraping.
+    """
+    try:
+        batch = []
+        for row in stream_scraping(gui_data, record_selector):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                result_queue.put(RowBatch(gui_data.url, batch))
+                batch = []
+        result_queue.put(RowBatch(gui_data.url, batch, done=True))
+
+    except Exception as e:
+        result_queue.put(e)
@@ -0,0 +1,70 @@
+# Local HTTP server used by the offline test scripts (no internet needed)
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+# A route returns (status, headers, body)
+Route = Callable[[BaseHTTPRequestHandler], Tuple[int, Dict[str, str], bytes]]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256 # The default (5) drops bursts of concurrent connections
+
+
+class StubServer:
+    """
+    Serves fixed routes on 127.0.0.1 from a background thread.
+    Unknown paths answer 404.
+    keep_alive: answer in HTTP/1.1, keeping connections open between requests.
+    """
+
+    def __init__(self, routes: Dict[str, Route], keep_alive: bool = False):
+        self.routes = routes
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" if keep_alive else "HTTP/1.0"
+
+            def do_GET(self):
+                route = stub.routes.get(self.path)
+                if route is None:
+                    status, headers, body = 404, {}, b"not found"
+                else:
+                    status, headers, body = route(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The client gave up (e.g. a cancelled download)
+
+            def log_message(self, format, *args):
+                pass # Keep test output clean
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def html_page(body: str, status: int = 200) -> Route:
+    """Route that always answers with the given HTML body."""
+    def route(_handler):
+        return status, {"Content-Type": "text/html; charset=utf-8"}, body.encode("utf-8")
+    return route
@@ -0,0 +1,124 @@
+# Non-GUI test for archive.py / replay.py: capture responses, re-extract them offline
+import contextlib
+import gzip
+import io
+import json
+import os
+import tempfile
+from queue import Queue
+import cli
+import scraper_logic as sl
+from archive import ArchiveMiss, ArchiveReader, ArchiveWriter, decode_record, encode_record, SEGMENT_NAME
+from class_selectors import PageResult, TagSelector, AttributeSelector
+from crawler import Crawler
+from metrics import ScrapeStats
+from replay import execute_replay
+from scheduler import HostScheduler
+from stub_server import StubServer, html_page
+
+def catalogue(n: int) -> str:
+    return (f'<article><h3><a href="/item/{n}">Book {n}</a></h3><p class="price">£{n}.99</p></article>'
+            f'<article><h3><a href="/item/{n}b">Book {n}b</a></h3><p class="price">£{n}.49</p></article>'
+            f'<a class="next" href="/page/{n + 1}">next</a>')
+
+routes = {f"/page/{n}": html_page(catalogue(n)) for n in range(1, 7)}
+routes["/latin"] = lambda _handler: (200, {"Content-Type": "text/html; charset=iso-8859-1", "X-Id": "7"},
+                                     "<h3>caf\xe9</h3>".encode("latin-1"))
+columns = [TagSelector('h3 a', name='title'), TagSelector('p.price', name='price'),
+           AttributeSelector('href', 'h3 a', name='link')]
+
+def pages_of(q: Queue, summary) -> dict:
+    return {m.url: m.rows if m.ok else m.error for m in iter(q.get, summary) if isinstance(m, PageResult)}
+
+# A record is a standalone gzip member holding a WARC/1.1 response record
+data = encode_record("http://x/a", 200, "OK", {"Content-Type": "text/html", "Content-Encoding": "gzip"}, b"<p>\r\n\r\nhi</p>")
+record = gzip.decompress(data)
+assert record.startswith(b"WARC/1.1\r\nWARC-Type: response\r\n") and b"WARC-Target-URI: http://x/a\r\n" in record
+assert b"HTTP/1.1 200 OK\r\n" in record and b"Content-Encoding" not in record # Body stored decoded
+response = decode_record(data)
+assert (response.url, response.status_code, response.content) == ("http://x/a", 200, b"<p>\r\n\r\nhi</p>")
+assert response.headers["content-type"] == "text/html" and response.headers["Content-Length"] == "13"
+
+workdir = tempfile.TemporaryDirectory() # Outlives the servers: replay runs with no server
+directory = workdir.name
+with StubServer(routes) as server:
+    base = server.base_url
+    urls = [f"{base}/page/{n}" for n in range(1, 5)] + [f"{base}/latin"]
+    archive_dir = os.path.join(directory, "archive")
+
+    # Capture: a batch, with tiny segments so that pages spread over several of them
+    with ArchiveWriter(archive_dir, segment_bytes=600) as archive:
+        q = Queue()
+        summary = sl.execute_batch_scraping(urls, columns, q, archive=archive, scheduler=HostScheduler(max_retries=0),
+                                            record_selector=TagSelector('article'))
+        live = pages_of(q, summary)
+    assert len(os.listdir(archive_dir)) > 3 # Index + segments
+
+    # Captured responses read back as they were served
+    with ArchiveReader(archive_dir) as reader:
+        assert len(reader) == 5 and urls[0] in reader and f"{base}/nope" not in reader
+        latin = reader.get(f"{base}/latin")
+        assert latin.content == "<h3>caf\xe9</h3>".encode("latin-1") and latin.encoding == "iso-8859-1"
+        assert latin.headers["X-Id"] == "7" and latin.url == f"{base}/latin"
+        try:
+            reader.get(f"{base}/nope")
+            assert False, "ArchiveMiss expected"
+        except ArchiveMiss:
+            pass
+        assert [url for url, *_ in reader.locations()] != [] and \
+            sorted(location[1:3] for location in reader.locations()) == [location[1:3] for location in reader.locations()]
+
+    # Capture again: appended after the existing records, the URL points to the latest one
+    routes["/page/1"] = html_page(catalogue(100))
+    with ArchiveWriter(archive_dir, segment_bytes=600) as archive:
+        sl.fetch_page(urls[0], archive=archive)
+        # A crawl captures every page it fetches
+        crawler = Crawler(columns, AttributeSelector('href', 'a.next'), max_depth=1, archive=archive,
+                          scheduler=HostScheduler(max_retries=0))
+        crawler.run([f"{base}/page/5"], Queue())
+    with ArchiveReader(archive_dir) as reader:
+        assert b"Book 100" in reader.get(urls[0]).content
+        assert len(reader) == 7 # /page/5 and /page/6 from the crawl
+    live[urls[0]] = [["Book 100", "£100.99", f"{base}/item/100"], ["Book 100b", "£100.49", f"{base}/item/100b"]]
+
+# Replay: server stopped, same rows as the live run, in this thread and in processes
+expected = dict(live, **{f"{base}/page/{n}": [[f"Book {n}", f"£{n}.99", f"{base}/item/{n}"],
+                                              [f"Book {n}b", f"£{n}.49", f"{base}/item/{n}b"]] for n in (5, 6)})
+for parse_workers in (0, 2):
+    q = Queue()
+    stats = ScrapeStats()
+    summary = execute_replay(archive_dir, columns, q, parse_workers=parse_workers,
+                             record_selector=TagSelector('article'), stats=stats)
+    assert pages_of(q, summary) == expected and summary.total == 7 and summary.failed == 0
+    assert stats.pages == 7 and stats.bytes_downloaded == 0 and stats.rows == 12
+    assert stats.stage_seconds['parse'] > 0 and stats.matches['title'] == 12
+
+# Only some URLs; one never captured fails with ArchiveMiss
+for parse_workers in (0, 2):
+    q = Queue()
+    summary = execute_replay(archive_dir, columns[:1], q, urls=[urls[1], f"{base}/nope"], parse_workers=parse_workers)
+    pages = pages_of(q, summary)
+    assert pages[urls[1]] == [["Book 2"], ["Book 2b"]] and isinstance(pages[f"{base}/nope"], ArchiveMiss)
+    assert summary.total == 2 and summary.failed == 1
+
+# CLI: run --archive captures, replay re-extracts other columns without the network
+os.mkdir(os.path.join(directory, "cli"))
+config_path = os.path.join(directory, "cli", "config.json")
+with StubServer(routes) as server:
+    with open(config_path, "w") as f:
+        json.dump({"urls": [f"{server.base_url}/page/3"], "selectors": [{"name": "title", "queries": "h3 a"}],
+                   "output": {"format": "csv", "path": "-"}, "archive": "archive"}, f)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        assert cli.main(["run", config_path]) == 0
+    assert os.path.isfile(os.path.join(directory, "cli", "archive", SEGMENT_NAME.format(0)))
+with open(config_path, "w") as f:
+    json.dump({"selectors": [{"name": "price", "queries": "p.price"}], "archive": "archive"}, f)
+out, err = io.StringIO(), io.StringIO()
+with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+    code = cli.main(["replay", config_path, "--parse-workers", "0"])
+assert code == 0 and out.getvalue().splitlines() == ["£3.99", "£3.49"], (code, out.getvalue(), err.getvalue())
+with contextlib.redirect_stderr(io.StringIO()):
+    assert cli.main(["replay", config_path, "--archive", os.path.join(directory, "missing")]) == cli.EXIT_CONFIG
+
+workdir.cleanup()
+print("OK: archive capture and replay")
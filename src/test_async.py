@@ -0,0 +1,84 @@
+# Non-GUI test for the asyncio backend (async_scraper) against a local server
+import time
+from queue import Queue
+import async_scraper as asc
+from class_selectors import GUIRef, TagSelector, AttributeSelector, PageResult, BatchSummary
+from stub_server import StubServer, html_page
+
+PAGE = """
+<html>
+  <body>
+    <p class="price">{n}.99</p>
+    <img class="cover" src="img/{n}.jpg">
+  </body>
+</html>
+"""
+
+def slow_page(handler):
+    time.sleep(2)
+    return 200, {}, b"<p class='price'>late</p>"
+
+def redirect(handler):
+    return 302, {"Location": "/page/0"}, b""
+
+routes = {f"/page/{n}": html_page(PAGE.format(n=n)) for n in range(50)}
+routes["/slow"] = slow_page
+routes["/redirect"] = redirect
+
+selectors = [TagSelector('p.price'), AttributeSelector('src', 'img.cover')]
+
+with StubServer(routes) as server:
+    base = server.base_url
+
+    # Batch: same queue contract as execute_batch_scraping
+    urls = [f"{base}/page/{n}" for n in range(50)] + [f"{base}/missing", f"{base}/slow"]
+    q = Queue()
+    summary = asc.execute_async_batch_scraping(
+        urls, selectors, q, max_in_flight=20, per_host_limit=10, timeout=0.5, parse_queue_size=5
+    )
+
+    pages = {}
+    while True:
+        message = q.get()
+        if isinstance(message, BatchSummary):
+            break
+        assert isinstance(message, PageResult)
+        pages[message.url] = message
+
+    assert summary.total == 52 and summary.failed == 2, (summary.total, summary.failed)
+    assert isinstance(pages[f"{base}/slow"].error, TimeoutError)
+    assert not pages[f"{base}/missing"].ok
+    assert pages[f"{base}/page/3"].rows == [["3.99", f"{base}/page/img/3.jpg"]]
+
+    # Parsing in processes: several consumers feed the pool, same rows
+    q = Queue()
+    urls = [f"{base}/page/{n}" for n in range(20)]
+    summary = asc.execute_async_batch_scraping(urls, selectors, q, max_in_flight=10, parse_workers=2)
+    rows = {m.url: m.rows for m in iter(q.get, summary)}
+    assert summary.total == 20 and summary.failed == 0
+    assert rows == {f"{base}/page/{n}": [[f"{n}.99", f"{base}/page/img/{n}.jpg"]] for n in range(20)}
+
+    # Single page: same contract as execute_scraping
+    q = Queue()
+    asc.execute_scraping_async(GUIRef(url=f"{base}/redirect", format='csv', selectors=selectors), q)
+    assert q.get() == [["0.99", f"{base}/page/img/0.jpg"]]
+
+# Keep-alive: the pages of one host share a few connections
+ports = []
+def counted(handler):
+    ports.append(handler.client_address[1])
+    if handler.path == "/hang-up/5":
+        handler.close_connection = True # Closed after this answer, without saying so
+    return html_page(PAGE.format(n=0))(handler)
+
+with StubServer({f"/{kind}/{n}": counted for kind in ("page", "hang-up") for n in range(20)},
+                keep_alive=True) as server:
+    for kind in ("page", "hang-up"):
+        ports.clear()
+        q = Queue()
+        urls = [f"{server.base_url}/{kind}/{n}" for n in range(20)]
+        summary = asc.execute_async_batch_scraping(urls, selectors, q, max_in_flight=4, per_host_limit=2)
+        assert summary.total == 20 and summary.failed == 0, kind
+        assert len(ports) == 20 and len(set(ports)) <= (2 if kind == "page" else 4), (kind, len(set(ports)))
+
+print('OK: async scraping')
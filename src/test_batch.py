@@ -0,0 +1,56 @@
+# Non-GUI test for scraper_logic.execute_batch_scraping against a local server
+from queue import Queue
+import scraper_logic as sl
+from class_selectors import TagSelector, AttributeSelector, PageResult, BatchSummary
+from stub_server import StubServer, html_page
+
+PAGE = """
+<html>
+  <body>
+    <h3 class="title">Book {n}</h3>
+    <a class="more" href="/detail/{n}">more</a>
+  </body>
+</html>
+"""
+
+def main():
+    routes = {f"/page/{n}": html_page(PAGE.format(n=n)) for n in range(20)}
+
+    with StubServer(routes) as server:
+        urls = (f"{server.base_url}/page/{n}" for n in range(20))
+        # One missing page must not abort the rest of the batch
+        urls = list(urls) + [f"{server.base_url}/missing"]
+
+        selectors = [TagSelector('h3.title'), AttributeSelector('href', 'a.more')]
+        q = Queue()
+        summary = sl.execute_batch_scraping(iter(urls), selectors, q, max_workers=4, per_host_limit=2)
+
+        pages = []
+        while True:
+            message = q.get()
+            if isinstance(message, BatchSummary):
+                break
+            assert isinstance(message, PageResult)
+            pages.append(message)
+
+        assert summary.total == 21, summary.total
+        assert summary.failed == 1, summary.failed
+        assert len(pages) == 21
+
+        by_url = {page.url: page for page in pages}
+        assert not by_url[f"{server.base_url}/missing"].ok
+        assert by_url[f"{server.base_url}/page/7"].rows == [["Book 7", f"{server.base_url}/detail/7"]]
+
+        # Same results when parsing runs in a process pool
+        q = Queue()
+        summary = sl.execute_batch_scraping(urls, selectors, q, max_workers=4, parse_workers=2)
+        assert summary.total == 21 and summary.failed == 1
+        rows = [message.rows for message in iter(q.get, summary) if isinstance(message, PageResult) and message.ok]
+        assert sorted(rows) == sorted(page.rows for page in pages if page.ok)
+
+    print('OK: batch scraping')
+
+
+# The guard keeps process-pool workers from re-running the test on spawn platforms
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Smoke test for benchmark.py: tiny corpora, report round trip, regression check
+import json
+import os
+import tempfile
+import benchmark
+from scraper_logic import parse_rows
+
+
+def main():
+    # Nesting and filler change the page, not the extracted rows
+    plain = parse_rows(benchmark.synthetic_page(20), benchmark.product_selectors(), benchmark.BASE_URL)
+    nested = benchmark.synthetic_page(20, nesting=3, filler=500)
+    assert len(nested) > 20 * 500
+    assert parse_rows(nested, benchmark.product_selectors(), benchmark.BASE_URL) == plain
+
+    metrics = benchmark.bench_pipeline(50, nesting=2, repeat=1)
+    metrics.update(benchmark.bench_fetch(pages=5, records=10, workers=2))
+    metrics.update(benchmark.bench_memory(2000, repeat=1))
+    metrics.update(benchmark.bench_replay(pages=4, records=5, workers=1))
+    for stage in ('soupify', 'select_elements', 'format_results', 'save_data'):
+        assert metrics[f'pipeline.{stage}.seconds'] > 0, stage
+    assert metrics['pipeline.soupify.peak_mb'] > 0
+    assert metrics['memory.table.mb'] < metrics['memory.list.mb']
+    assert metrics['replay.thread.pages_per_s'] > 0 and metrics['replay.processes.pages_per_s'] > 0
+    assert metrics['fetch.threads.pages_per_s'] > 0 and metrics['fetch.async.pages_per_s'] > 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "report.json")
+        benchmark.write_report(path, metrics, {'records': 50})
+        with open(path) as f:
+            report = json.load(f)
+    assert report['metrics'] == metrics and 'python' in report['environment']
+
+    # Slower stage or lower throughput -> regression; faster is fine
+    slower = dict(report, metrics=dict(metrics, **{
+        'pipeline.soupify.seconds': metrics['pipeline.soupify.seconds'] * 2,
+        'fetch.async.pages_per_s': metrics['fetch.async.pages_per_s'] / 2,
+        'pipeline.select_elements.seconds': metrics['pipeline.select_elements.seconds'] / 2,
+    }))
+    regressions = benchmark.compare_reports(report, slower)
+    assert regressions == ['fetch.async.pages_per_s', 'pipeline.soupify.seconds'], regressions
+
+    print("OK: benchmark harness")
+
+
+if __name__ == "__main__":
+    main()
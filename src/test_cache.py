@@ -0,0 +1,131 @@
+# Non-GUI test for the on-disk response cache (http_cache.py) against a local server
+import gzip
+import os
+import tempfile
+import time
+from queue import Queue
+import scraper_logic as sl
+from class_selectors import GUIRef, TagSelector
+from document_cache import DocumentCache
+from http_cache import ResponseCache, CacheMiss
+from jobs import CancelToken, ScrapeCancelled
+from metrics import ScrapeStats
+from stub_server import StubServer
+
+PAGE = b"<html><body><p class='content'>cached text</p></body></html>"
+hits = {"downloads": 0, "not_modified": 0}
+
+def etag_page(handler):
+    if handler.headers.get("If-None-Match") == '"v1"':
+        hits["not_modified"] += 1
+        return 304, {"ETag": '"v1"'}, b""
+    hits["downloads"] += 1
+    return 200, {"ETag": '"v1"', "Content-Type": "text/html"}, PAGE
+
+with tempfile.TemporaryDirectory() as directory, StubServer({"/page": etag_page}) as server:
+    url = f"{server.base_url}/page"
+    cache = ResponseCache(directory)
+
+    first = sl.fetch_page(url, cache=cache)
+    second = sl.fetch_page(url, cache=cache)
+    assert first.content == second.content == PAGE
+    assert not first.from_cache and second.from_cache
+    assert hits == {"downloads": 1, "not_modified": 1}, hits
+
+    # Offline: no request at all, and unknown URLs fail clearly
+    cache.offline = True
+    assert sl.fetch_page(url, cache=cache).content == PAGE
+    assert hits["not_modified"] == 1
+    try:
+        sl.fetch_page(f"{server.base_url}/other", cache=cache)
+        raise AssertionError("expected a CacheMiss")
+    except CacheMiss:
+        pass
+
+    # Size-based eviction empties a cache that cannot hold the page
+    cache.max_bytes = 10
+    cache.evict()
+    assert not cache.contains(url)
+    assert not os.listdir(directory)
+
+# Freshness: max-age pages are served without a request, counted from when they were received
+requests_seen = []
+def fresh_page(handler):
+    requests_seen.append(handler.headers.get("If-None-Match"))
+    return 200, {"Cache-Control": "max-age=60", "ETag": '"f"', "Content-Encoding": "gzip"}, gzip.compress(PAGE)
+def expired_page(handler):
+    requests_seen.append(handler.headers.get("If-None-Match"))
+    if handler.headers.get("If-None-Match") == '"e"':
+        return 304, {"ETag": '"e"'}, b""
+    return 200, {"Expires": "Thu, 01 Jan 1970 00:00:00 GMT", "ETag": '"e"'}, PAGE
+
+with tempfile.TemporaryDirectory() as directory, StubServer({"/fresh": fresh_page, "/expired": expired_page}) as server:
+    cache = ResponseCache(directory)
+    for _ in range(3):
+        response = sl.fetch_page(f"{server.base_url}/fresh", cache=cache, cancel=CancelToken())
+        assert response.content == PAGE
+    # Stored decoded: the transfer headers are gone
+    assert response.from_cache and "Content-Encoding" not in response.headers
+    assert "Content-Length" not in response.headers and response.headers["ETag"] == '"f"'
+    assert requests_seen == [None] # One download, then fresh hits
+    for _ in range(2):
+        assert sl.fetch_page(f"{server.base_url}/expired", cache=cache).content == PAGE
+    assert requests_seen == [None, None, '"e"'] # Expired: revalidated every time
+
+    # A download through the cache is still cancellable
+    token = CancelToken()
+    token.cancel()
+    try:
+        sl.fetch_page(f"{server.base_url}/other", cache=cache, cancel=token)
+        raise AssertionError("expected ScrapeCancelled")
+    except ScrapeCancelled:
+        pass
+
+    # max_age counts from when the page was received, not from its last use
+    cache.max_age = 3600
+    key = cache.key(f"{server.base_url}/fresh")
+    meta_path, body_path = cache._paths(key)
+    os.utime(body_path, (time.time() - 7200, time.time() - 7200)) # Received long ago, used just now
+    cache.evict()
+    assert not os.path.exists(meta_path) and cache.contains(f"{server.base_url}/expired")
+
+# Parsed documents: a second run with other selectors revalidates (304) but does not parse again
+versions = {"body": PAGE}
+def changing_page(handler):
+    etag = f'"{len(versions["body"])}"'
+    if handler.headers.get("If-None-Match") == etag:
+        return 304, {"ETag": etag}, b""
+    return 200, {"ETag": etag, "Content-Type": "text/html"}, versions["body"]
+
+with tempfile.TemporaryDirectory() as directory, StubServer({"/page": changing_page}) as server:
+    url = f"{server.base_url}/page"
+    cache = ResponseCache(directory)
+    documents = DocumentCache(max_documents=2)
+
+    def run(selector: str):
+        q = Queue()
+        sl.execute_scraping(GUIRef(url, 'csv', [TagSelector(selector)]), q, cache=cache,
+                            document_cache=documents, stats=ScrapeStats())
+        return q.get(), q.get()
+
+    stats, rows = run('p.content')
+    assert rows == [['cached text']] and stats.document_cache_hits == 0
+    stats, rows = run('p')
+    assert rows == [['cached text']] and stats.document_cache_hits == 1 and stats.cache_hits == 1
+    assert documents.contains(url)
+
+    # The page changed: served fresh, not from the stored document
+    versions["body"] = PAGE.replace(b"cached text", b"new text!")
+    stats, rows = run('p')
+    assert rows == [['new text!']] and stats.document_cache_hits == 0
+
+    # Unchanged content is not parsed again, changed content replaces the entry
+    documents.clear()
+    documents.get_or_parse(url, PAGE, url, sl.soupify)
+    parses = []
+    parse = lambda content: parses.append(content) or sl.soupify(content)
+    documents.get_or_parse(url, PAGE, url, parse)
+    documents.get_or_parse(url, PAGE + b"<p>new</p>", url, parse)
+    assert len(parses) == 1 and len(documents) == 1
+
+print('OK: response cache')
@@ -0,0 +1,101 @@
+# Non-GUI test for change_index.py: incremental re-scrapes against a local server
+import contextlib
+import io
+import json
+import os
+import tempfile
+from queue import Queue
+import cli
+import scraper_logic as sl
+from change_index import ChangeIndex, diff_rows, row_hash, NEW, DELETED
+from class_selectors import GUIRef, TagSelector, PageResult
+from metrics import ScrapeStats
+from scheduler import HostScheduler
+from stub_server import StubServer, html_page
+
+def catalogue(*items) -> str:
+    return "".join(f'<div class="item"><h3>{name}</h3><p class="price">{price}</p></div>' for name, price in items)
+
+# Reordered rows are not a change; a changed row is its old row deleted and its new row added
+old = [['A', '1'], ['B', '2'], ['C', '3']]
+hashes = [row_hash(row) for row in old]
+assert diff_rows(hashes, lambda: old, [['C', '3'], ['A', '1'], ['B', '2']]) == []
+assert diff_rows(hashes, lambda: old, [['A', '1'], ['B', '5'], ['C', '3'], ['D', '4']]) == \
+    [[DELETED, 'B', '2'], [NEW, 'B', '5'], [NEW, 'D', '4']]
+assert diff_rows(hashes, lambda: old, [['A', '1']]) == [[DELETED, 'B', '2'], [DELETED, 'C', '3']]
+assert diff_rows(hashes, lambda: 1 / 0, old + [['D', '4']]) == [[NEW, 'D', '4']] # Old rows not loaded
+
+routes = {"/shop": html_page(catalogue(('A', '1'), ('B', '2'))),
+          "/shop/2": html_page(catalogue(('C', '3')))}
+columns = [TagSelector('h3', name='name'), TagSelector('p.price', name='price')]
+
+def run(gui_ref, index):
+    q = Queue()
+    sl.execute_scraping(gui_ref, q, stats=ScrapeStats(), index=index)
+    stats, rows = q.get(), q.get()
+    assert not isinstance(rows, Exception), rows
+    return stats, rows
+
+with StubServer(routes) as server, tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "changes.sqlite3")
+    gui_ref = GUIRef(f"{server.base_url}/shop", 'csv', columns, record_selector=TagSelector('div.item'))
+
+    # First run: every row is new
+    index = ChangeIndex(path)
+    stats, rows = run(gui_ref, index)
+    assert rows == [[NEW, 'A', '1'], [NEW, 'B', '2']], rows
+
+    # Same page: not parsed, empty delta (also after reopening the index)
+    index.close()
+    index = ChangeIndex(path)
+    stats, rows = run(gui_ref, index)
+    assert rows == [] and stats.unchanged_pages == 1 and stats.stage_seconds['parse'] == 0
+    assert index.rows(gui_ref.url) == [['A', '1'], ['B', '2']]
+
+    # Changed page: only what changed
+    routes["/shop"] = html_page(catalogue(('B', '2'), ('A', '9'), ('E', '5')))
+    stats, rows = run(gui_ref, index)
+    assert rows == [[DELETED, 'A', '1'], [NEW, 'A', '9'], [NEW, 'E', '5']], rows
+    routes["/shop"] = html_page(catalogue(('A', '9'), ('E', '5')))
+    assert run(gui_ref, index)[1] == [[DELETED, 'B', '2']]
+
+    # A page whose source changed but not its rows gives no delta
+    routes["/shop"] = html_page(catalogue(('A', '9'), ('E', '5')) + "<!-- generated at 12:00 -->")
+    stats, rows = run(gui_ref, index)
+    assert rows == [] and stats.unchanged_pages == 0
+
+    # Other selectors: the stored rows do not apply, everything is new again
+    other = GUIRef(gui_ref.url, 'csv', columns[:1], record_selector=TagSelector('div.item'))
+    assert run(other, index)[1] == [[NEW, 'A'], [NEW, 'E']]
+
+    # Batch: one PageResult of delta rows per page (the last run of /shop used other selectors)
+    urls = [f"{server.base_url}/shop", f"{server.base_url}/shop/2"]
+    for expected in ({urls[0]: [[NEW, 'A', '9'], [NEW, 'E', '5']], urls[1]: [[NEW, 'C', '3']]},
+                     {urls[0]: [], urls[1]: []}):
+        q = Queue()
+        summary = sl.execute_batch_scraping(urls, columns, q, index=index, scheduler=HostScheduler(max_retries=0),
+                                            record_selector=TagSelector('div.item'))
+        pages = {m.url: m.rows for m in iter(q.get, summary) if isinstance(m, PageResult)}
+        assert pages == expected, pages
+    assert len(index) == 2
+    index.close()
+
+    # CLI: the first run writes every row, the next one only reports that nothing changed
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"urls": [f"{server.base_url}/shop/2"], "record_selector": "div.item",
+                   "selectors": [{"name": "name", "queries": "h3"}, {"name": "price", "queries": "p.price"}],
+                   "output": {"format": "csv", "path": "-"}, "changes": "cli.sqlite3"}, f)
+    for expected in (["new,C,3"], []):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            code = cli.main(["run", config_path])
+        assert code == 0 and out.getvalue().splitlines() == expected, (code, out.getvalue(), err.getvalue())
+    assert "no changes" in err.getvalue()
+    # A producer error is not an empty delta
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()) as err:
+        assert cli.main(["run", config_path, "--parse-workers", "-1"]) == cli.EXIT_FAILED
+    assert "no changes" not in err.getvalue()
+    assert os.path.exists(os.path.join(directory, "cli.sqlite3"))
+
+print("OK: change detection")
@@ -0,0 +1,80 @@
+# Non-GUI test for cli.py: config files, stdout/file output, crawl, stored jobs
+import contextlib
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import cli
+from stub_server import StubServer, html_page
+
+routes = {f"/page/{n}": html_page(f'<h3><a href="/item/{n}">Title {n}</a></h3>'
+                                  f'<a class="next" href="/page/{n + 1}">next</a>') for n in range(1, 5)}
+routes["/broken"] = html_page("oops", status=500)
+
+def run(*argv):
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        code = cli.main(list(argv))
+    return code, out.getvalue(), err.getvalue()
+
+SELECTORS = [{"name": "title", "queries": ["h2 a", "h3 a"]},
+             {"name": "link", "type": "attribute", "attribute": "href", "queries": "h3 a"}]
+
+# Start-up: --help must not import tkinter nor the scraping stack
+probe = "import sys, cli; cli.build_arg_parser(); print(sorted(m for m in ('tkinter', 'bs4', 'requests') if m in sys.modules))"
+assert subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True).stdout.strip() == "[]"
+
+with StubServer(routes) as server, tempfile.TemporaryDirectory() as directory:
+    base = server.base_url
+
+    # JSON config, URL list from a file, jsonl on stdout
+    with open(os.path.join(directory, "urls.txt"), "w") as f:
+        f.write(f"# listing pages\n{base}/page/1\n\n{base}/page/2\n")
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w") as f:
+        json.dump({"urls_file": "urls.txt", "selectors": SELECTORS,
+                   "output": {"format": "jsonl", "path": "-"}, "workers": 2}, f)
+    stats_path = os.path.join(directory, "stats.prom")
+    code, out, err = run("run", config_path, "--stats", stats_path)
+    rows = sorted(json.loads(line) for line in out.splitlines())
+    assert code == 0, err
+    assert "stats: 2 pages" in err, err
+    with open(stats_path) as f:
+        assert "webscraper_rows 2" in f.read()
+    assert rows == [["Title 1", f"{base}/item/1"], ["Title 2", f"{base}/item/2"]], rows
+
+    # YAML config, crawl following "next", CSV file; a failing page gives exit code 1
+    yaml_path = os.path.join(directory, "config.yaml")
+    output = os.path.join(directory, "out.csv")
+    with open(yaml_path, "w") as f:
+        f.write(f"urls: ['{base}/page/1', '{base}/broken']\n"
+                "selectors:\n  - {name: title, queries: 'h3 a'}\n"
+                "crawl:\n  link_selector: {queries: 'a.next'}\n  max_depth: 10\n")
+    code, out, err = run("run", yaml_path, "--output", output, "--format", "csv")
+    with open(output, newline="") as f:
+        titles = sorted(row[0] for row in csv.reader(f))
+    assert code == 1 and "/broken" in err, (code, err)
+    assert titles == [f"Title {n}" for n in range(1, 5)], titles
+
+    # Stored job, then resume: all rows are written again
+    store = os.path.join(directory, "jobs.sqlite3")
+    code, out, err = run("run", config_path, "--job-store", store, "-f", "csv")
+    job_id = err.split("job: ")[1].split()[0]
+    assert code == 0 and len(out.splitlines()) == 2, (code, out, err)
+    code, out, err = run("resume", job_id, "--job-store", store)
+    assert code == 0 and len(out.splitlines()) == 2, (code, out, err)
+    code, out, err = run("jobs", "--job-store", store)
+    assert job_id in out and "done" in out, out
+
+    # Config errors: exit code 2, message on stderr
+    with open(config_path, "w") as f:
+        json.dump({"urls": [f"{base}/page/1"], "selectors": [{"type": "xpath", "queries": "//a"}]}, f)
+    code, out, err = run("run", config_path)
+    assert code == 2 and "xpath" in err, (code, err)
+    code, out, err = run("resume", "missing", "--job-store", store)
+    assert code == 2, code
+
+print("OK: headless CLI")
@@ -0,0 +1,84 @@
+# Non-GUI test for crawler.py (pagination + detail links) against a local server
+import os
+import sqlite3
+import tempfile
+from queue import Queue
+import crawler
+from job_store import JobStore
+from class_selectors import GUIRef, TagSelector, AttributeSelector
+from data_handler import rows_from_queue
+from stub_server import StubServer, html_page
+
+def listing(n: int, last: int) -> str:
+    # Every listing links to its detail page, the next page, page 1 again and another site
+    next_link = f'<a class="next" href="/list/{n + 1}?b=2&a=1#top">next</a>' if n < last else ''
+    return (f'<h1>List {n}</h1><a class="item" href="../item/{n}">item</a>{next_link}'
+            f'<a class="item" href="/list/1">first</a><a class="item" href="http://other.example/x">ext</a>')
+
+routes = {f"/list/{n}?a=1&b=2": html_page(listing(n, 6)) for n in range(2, 7)}
+routes["/list/1"] = html_page(listing(1, 6))
+routes.update({f"/item/{n}": html_page(f"<h1>Item {n}</h1>") for n in range(1, 7)})
+
+links = AttributeSelector('href', 'a.next', 'a.item')
+links_both = AttributeSelector('href', 'a.next, a.item')
+
+with StubServer(routes) as server:
+    gui_ref = GUIRef(url=f"{server.base_url}/list/1", format='csv', selectors=[TagSelector('h1')])
+
+    # Follow next + item links; page 1 and external links are skipped
+    q = Queue()
+    summary = crawler.execute_crawl(gui_ref, links_both, q, max_depth=10, max_workers=3)
+    rows = sorted(row[0] for row in rows_from_queue(q))
+    assert summary.failed == 0, summary.failed
+    assert rows == sorted([f"List {n}" for n in range(1, 7)] + [f"Item {n}" for n in range(1, 7)]), rows
+
+    # Depth limit: seed (depth 0) plus one hop
+    q = Queue()
+    crawler.execute_crawl(gui_ref, links_both, q, max_depth=1)
+    assert sorted(row[0] for row in rows_from_queue(q)) == ["Item 1", "List 1", "List 2"]
+
+    # Page limit, with a Bloom filter for dedup
+    q = Queue()
+    summary = crawler.execute_crawl(gui_ref, links, q, max_pages=4, seen=crawler.BloomFilter(1000))
+    assert summary.total == 4 and len(list(rows_from_queue(q))) == 4
+
+    # Resumable job: stop after 5 pages, resume without refetching them
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(os.path.join(directory, "jobs.sqlite3"), batch_size=2)
+        job_id = crawler.create_crawl_job(store, gui_ref, links_both, max_depth=10, max_pages=5)
+
+        q = Queue()
+        first = crawler.run_job(store, job_id, q)
+        first_urls = {m.url for m in iter(q.get, first)}
+        assert first.total == 5 and store.list_jobs()[0]['status'] == 'stopped'
+
+        # Reopen the file, as after a crash, and finish the job
+        store.close()
+        store = JobStore(os.path.join(directory, "jobs.sqlite3"))
+        q = Queue()
+        second = crawler.run_job(store, job_id, q, max_pages=100)
+        second_urls = {m.url for m in iter(q.get, second)}
+        assert second.total == 7 and not first_urls & second_urls, (first_urls, second_urls)
+        assert store.list_jobs()[0]['status'] == 'done'
+        assert len(list(store.iter_rows(job_id))) == 12
+        store.close()
+
+    # Frontier URLs and status changes go in the batch: nothing is committed before flush()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.sqlite3")
+        store = JobStore(path, batch_size=100)
+        job_id = store.create_job(gui_ref)
+        store.add_urls(job_id, [(f"{server.base_url}/a", 1), (f"{server.base_url}/b", 1)])
+        store.set_status(job_id, 'stopped')
+        reader = sqlite3.connect(path)
+        assert reader.execute("SELECT COUNT(*) FROM frontier").fetchone()[0] == 1
+        assert reader.execute("SELECT status FROM jobs").fetchone()[0] == 'running'
+        store.flush()
+        assert reader.execute("SELECT COUNT(*) FROM frontier").fetchone()[0] == 3
+        assert reader.execute("SELECT status FROM jobs").fetchone()[0] == 'stopped'
+        reader.close()
+        store.close()
+
+assert crawler.normalize_url("HTTP://Example.com:80/a?b=2&a=1#x") == "http://example.com/a?a=1&b=2"
+
+print('OK: crawler')
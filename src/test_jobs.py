@@ -0,0 +1,170 @@
+# Non-GUI test for jobs.py: concurrent, cancellable jobs against a local server
+import os
+import tempfile
+import threading
+import time
+from queue import Queue
+import crawler
+import scraper_logic as sl
+from class_selectors import GUIRef, TagSelector, AttributeSelector, BatchSummary, RowBatch
+from jobs import (CancelToken, JobManager, JobStatus, ScrapeCancelled,
+                  QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+from job_store import JobStore
+from scheduler import HostScheduler
+from stub_server import StubServer, html_page
+
+def slow_page(body: str, delay: float):
+    route = html_page(body)
+    def slow(handler):
+        time.sleep(delay)
+        return route(handler)
+    return slow
+
+def stalled_page(body: str, release: threading.Event):
+    """Sends nothing, not even the headers, until `release` is set."""
+    route = html_page(body)
+    def stalled(handler):
+        release.wait(10)
+        return route(handler)
+    return stalled
+
+def big_page(size: int):
+    def route(handler):
+        return 200, {"Content-Type": "text/html"}, b"<p>x</p>" * (size // 8)
+    return route
+
+received = {} # job_id -> messages, kept for the jobs not read yet
+
+def messages_of(q: Queue, job_id: str):
+    """Messages of one job, until its final JobStatus."""
+    result = received.setdefault(job_id, [])
+    while not (result and isinstance(result[-1], JobStatus) and result[-1].finished):
+        message = q.get(timeout=10)
+        received.setdefault(message.job_id, []).append(message.message)
+    return result
+
+PAGE = '<h3><a href="/item/1">A</a></h3><a class="next" href="/list/{}">next</a>'
+routes = {"/page": html_page('<h3>A</h3><h3>B</h3>'), "/broken": html_page("oops", status=500)}
+routes.update({f"/slow/{n}": slow_page('<h3>S</h3>', 0.2) for n in range(20)})
+routes.update({f"/list/{n}": slow_page(PAGE.format(n + 1), 0.1) for n in range(30)})
+routes["/big"] = big_page(4 * 1024 * 1024)
+release = threading.Event()
+routes["/stalled"] = stalled_page('<h3>late</h3>', release)
+columns = [TagSelector('h3')]
+
+# CancelToken: callbacks, interruptible waits
+token = CancelToken()
+calls = []
+token.on_cancel(lambda: calls.append(1))
+assert not token.wait(0.01)
+threading.Timer(0.05, token.cancel).start()
+started = time.monotonic()
+assert token.wait(5) and time.monotonic() - started < 1
+token.cancel() # Idempotent
+assert calls == [1] and token.cancelled
+try:
+    token.check()
+    assert False, "check() should raise once cancelled"
+except ScrapeCancelled:
+    pass
+
+with StubServer(routes) as server:
+    q = Queue()
+    manager = JobManager(q, max_jobs=2)
+
+    # One job: QUEUED, RUNNING, its own messages, DONE
+    job = manager.submit(sl.execute_scraping, GUIRef(f"{server.base_url}/page", 'csv', columns),
+                         batch_size=1, name="page")
+    messages = messages_of(q, job.job_id)
+    states = [m.state for m in messages if isinstance(m, JobStatus)]
+    assert states == [QUEUED, RUNNING, DONE], states
+    rows = [row for m in messages if isinstance(m, RowBatch) for row in m.rows]
+    assert rows == [['A'], ['B']] and job.state == DONE and job.name == "page"
+
+    # A target reporting an Exception on the queue ends FAILED
+    job = manager.submit(sl.execute_scraping, GUIRef(f"{server.base_url}/broken", 'csv', columns))
+    final = messages_of(q, job.job_id)[-1]
+    assert final.state == FAILED and final.error is not None
+
+    # Concurrent jobs: distinct ids, every message tagged with its job
+    slow = [f"{server.base_url}/slow/{n}" for n in range(4)]
+    started = time.monotonic()
+    jobs = [manager.submit(sl.execute_scraping, GUIRef(url, 'csv', columns)) for url in slow[:2]]
+    assert len({job.job_id for job in jobs}) == 2
+    for job in jobs:
+        assert messages_of(q, job.job_id)[-2] == [['S']]
+    assert time.monotonic() - started < 0.39 # Both ran at the same time (0.2 s each)
+
+    # Cancel a batch: no new URL starts, the summary is marked cancelled
+    slow = [f"{server.base_url}/slow/{n}" for n in range(20)]
+    job = manager.submit(sl.execute_batch_scraping, slow, columns, max_workers=2,
+                         scheduler=HostScheduler(max_retries=0))
+    time.sleep(0.3)
+    started = time.monotonic()
+    manager.cancel(job.job_id)
+    messages = messages_of(q, job.job_id)
+    summary = [m for m in messages if isinstance(m, BatchSummary)][0]
+    assert messages[-1].state == CANCELLED and summary.cancelled
+    assert summary.total < len(slow) and summary.failed == 0, summary.total
+    assert time.monotonic() - started < 1
+
+    # Cancel a queued job: it never runs
+    blockers = [manager.submit(sl.execute_scraping, GUIRef(url, 'csv', columns)) for url in slow[:2]]
+    queued = manager.submit(sl.execute_scraping, GUIRef(slow[2], 'csv', columns))
+    queued.cancel()
+    states = [m.state for m in messages_of(q, queued.job_id)]
+    assert states == [QUEUED, CANCELLED], states
+    for job in blockers:
+        messages_of(q, job.job_id)
+    manager.shutdown()
+
+    # fetch_page stops between chunks of a long download
+    class CancelAfter(CancelToken):
+        def __init__(self, checks: int):
+            super().__init__()
+            self.checks = checks
+        def check(self):
+            self.checks -= 1
+            if self.checks == 0:
+                self.cancel()
+            super().check()
+    try:
+        sl.fetch_page(f"{server.base_url}/big", cancel=CancelAfter(3)) # Cancelled at the 3rd chunk
+        assert False, "fetch_page should stop once cancelled"
+    except ScrapeCancelled:
+        pass
+    token = CancelToken()
+    assert len(sl.fetch_page(f"{server.base_url}/big", cancel=token).content) == 4 * 1024 * 1024
+    assert not token._callbacks # Its wake-up callback is removed once the download is over
+
+    # ... and before the server answers: a request stalled before the headers does not hold the job
+    for fetch in (lambda token: sl.fetch_page(f"{server.base_url}/stalled", cancel=token),
+                  lambda token: sl.fetch_page(f"{server.base_url}/stalled", sl.create_session(), cancel=token)):
+        token = CancelToken()
+        threading.Timer(0.1, token.cancel).start()
+        started = time.monotonic()
+        try:
+            fetch(token)
+            assert False, "fetch_page should stop once cancelled"
+        except ScrapeCancelled:
+            pass
+        assert time.monotonic() - started < 1
+    release.set()
+
+    # Crawl cancelled mid-way: stopped, the rest stays pending and resumes later
+    links = AttributeSelector('href', 'a.next')
+    gui_ref = GUIRef(f"{server.base_url}/list/0", 'csv', columns)
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(os.path.join(directory, "jobs.sqlite3"), batch_size=1)
+        job_id = crawler.create_crawl_job(store, gui_ref, links, max_depth=100, max_pages=10)
+        token = CancelToken()
+        threading.Timer(0.35, token.cancel).start()
+        first = crawler.run_job(store, job_id, Queue(), cancel=token)
+        assert first.cancelled and 0 < first.total < 10, first.total
+        assert store.list_jobs()[0]['status'] == 'stopped'
+
+        second = crawler.run_job(store, job_id, Queue())
+        assert not second.cancelled and first.total + second.total == 10, (first.total, second.total)
+        store.close()
+
+print("OK: jobs")
@@ -0,0 +1,73 @@
+# Non-GUI test for metrics.py: per-stage stats from execute_scraping / batch / crawl
+import json
+import os
+import tempfile
+from queue import Queue
+import crawler
+import scraper_logic as sl
+from class_selectors import GUIRef, TagSelector, AttributeSelector
+from data_handler import rows_from_queue
+from document_cache import DocumentCache
+from metrics import FileExporter, ScrapeStats, STAGES
+from scheduler import HostScheduler
+from stub_server import StubServer, html_page
+
+PAGE = '<h3><a href="/a">A</a></h3><h3><a href="/b">B</a></h3><p class="price">1</p>'
+routes = {f"/page/{n}": html_page(PAGE) for n in range(3)}
+routes["/broken"] = html_page("oops", status=500)
+columns = [TagSelector('h3 a', name='title'), TagSelector('p.price'), AttributeSelector('href', 'h3 a')]
+
+with StubServer(routes) as server, tempfile.TemporaryDirectory() as directory:
+    gui_ref = GUIRef(f"{server.base_url}/page/0", 'csv', columns)
+
+    # Without stats: only the rows, as before
+    q = Queue()
+    sl.execute_scraping(gui_ref, q)
+    assert isinstance(q.get(), list) and q.empty()
+
+    # With stats: finished stats first, then the rows; the exporter runs on finish
+    path = os.path.join(directory, "stats.json")
+    q = Queue()
+    documents = DocumentCache()
+    sl.execute_scraping(gui_ref, q, document_cache=documents, stats=ScrapeStats(exporter=FileExporter(path)))
+    stats, rows = q.get(), q.get()
+    assert isinstance(stats, ScrapeStats) and len(rows) == 1
+    assert set(stats.stage_seconds) == set(STAGES) and all(stats.stage_seconds[s] > 0 for s in STAGES)
+    assert stats.pages == 1 and stats.rows == 1 and stats.bytes_downloaded == len(PAGE)
+    assert stats.matches == {'title': 2, 'p.price': 1, 'h3 a@href': 2}, stats.matches
+    with open(path) as f:
+        assert json.load(f)['rows'] == 1
+
+    # The second run gets the same page and reuses its parsed document: no parse
+    q = Queue()
+    sl.execute_scraping(gui_ref, q, document_cache=documents, stats=ScrapeStats())
+    stats = q.get()
+    assert stats.document_cache_hits == 1 and stats.stage_seconds['fetch'] > 0
+
+    # Failure: stats (with the failure) then the Exception
+    q = Queue()
+    sl.execute_scraping(GUIRef(f"{server.base_url}/broken", 'csv', columns), q, stats=ScrapeStats())
+    assert q.get().failed_pages == 1 and isinstance(q.get(), Exception)
+
+    # Batch: aggregated over the pages, before the BatchSummary
+    q = Queue()
+    urls = [f"{server.base_url}/page/{n}" for n in range(3)] + [f"{server.base_url}/broken"]
+    sl.execute_batch_scraping(urls, columns, q, stats=ScrapeStats(), scheduler=HostScheduler(max_retries=0))
+    assert len(list(rows_from_queue(q))) == 3 # rows_from_queue skips the stats
+    q = Queue()
+    summary = sl.execute_batch_scraping(urls, columns, q, stats=ScrapeStats(), scheduler=HostScheduler(max_retries=0))
+    stats = [m for m in iter(q.get, summary) if isinstance(m, ScrapeStats)][0]
+    assert stats.pages == 3 and stats.failed_pages == 1 and stats.matches['title'] == 6
+
+    # Crawler
+    q = Queue()
+    summary = crawler.execute_crawl(gui_ref, None, q, stats=ScrapeStats())
+    stats = [m for m in iter(q.get, summary) if isinstance(m, ScrapeStats)][0]
+    assert stats.pages == 1 and stats.rows == 1
+
+    # Prometheus text format
+    text = stats.to_prometheus()
+    assert '# TYPE webscraper_stage_seconds gauge' in text
+    assert 'webscraper_rows 1' in text and 'webscraper_matches{column="h3 a@href"} 2' in text
+
+print("OK: metrics")
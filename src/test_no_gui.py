@@ -19,27 +19,41 @@ class FakeResponse:
         self.url = url
 
 # Monkeypatch fetch_page to avoid network
-def fake_fetch_page(url: str):
+def fake_fetch_page(url: str, *args, **kwargs):
     return FakeResponse(HTML, url)
 
+# Restored afterwards: other tests may run in the same process (e.g. under pytest)
+original_fetch_page = sl.fetch_page
 sl.fetch_page = fake_fetch_page
-
-# Build GUIRef-like object
-selectors = [TagSelector('p.content'), AttributeSelector('href', 'a')]
-# Note: AttributeSelector(attribute_name, selector_query)
-
-gui_ref = GUIRef(url='http://example.com/base/', format='csv', selectors=selectors)
-
-q = Queue()
-
-# Run the scraping function (synchronous call)
-sl.execute_scraping(gui_ref, q)
-
-# Get and print result
-result = q.get()
-if isinstance(result, Exception):
-    print('ERROR:', result)
-else:
-    print('RESULTS:')
-    for row in result:
-        print(row)
+try:
+    # Build GUIRef-like object
+    selectors = [TagSelector('p.content'), AttributeSelector('href', 'a')]
+    # Note: AttributeSelector(attribute_name, selector_query)
+
+    gui_ref = GUIRef(url='http://example.com/base/', format='csv', selectors=selectors)
+
+    q = Queue()
+
+    # Run the scraping function (synchronous call)
+    sl.execute_scraping(gui_ref, q)
+
+    # Get and print result
+    result = q.get()
+    if isinstance(result, Exception):
+        print('ERROR:', result)
+    else:
+        print('RESULTS:')
+        for row in result:
+            print(row)
+
+    # Same run delivered in RowBatch messages (what the GUI uses)
+    from class_selectors import RowBatch
+    q = Queue()
+    sl.execute_scraping(gui_ref, q, batch_size=1)
+    batches = [q.get(), q.get()]
+    assert all(isinstance(batch, RowBatch) for batch in batches), batches
+    assert batches[0].rows == result and not batches[0].done and batches[1].done and not batches[1].rows
+finally:
+    sl.fetch_page = original_fetch_page
+
+print('OK: batched results')
@@ -0,0 +1,101 @@
+# Conformance test: every installed parser backend must extract exactly
+# what html.parser extracts, for TagSelector and AttributeSelector alike
+import warnings
+import scraper_logic as sl
+from class_selectors import TagSelector, AttributeSelector
+from parsers import PARSER_REGISTRY, available_parsers, resolve_parser
+
+BASE_URL = "http://example.com/shop/"
+
+FIXTURES = {
+    "listing": b"""<!DOCTYPE html>
+<html><head><title>Shop</title><style>.price { color: red; }</style></head>
+<body>
+  <ol class="row">
+    <li><article class="product_pod">
+      <h3><a href="item_1.html" title="A Light in the Attic">A Light in the ...</a></h3>
+      <p class="price_color">\xc2\xa351.77</p>
+      <p class="instock availability"> <i class="icon-ok"></i>
+         In stock </p>
+    </article></li>
+    <li><article class="product_pod">
+      <h3><a href="/abs/item_2.html" title="Tipping the Velvet">Tipping the Velvet</a></h3>
+      <p class="price_color">\xc2\xa353.74</p>
+      <p class="instock availability">In stock</p>
+    </article></li>
+  </ol>
+</body></html>""",
+    "mixed": b"""<html><body>
+  <div id="main" class="content  wide">
+    Intro &amp; <b>bold</b> text<!-- hidden comment -->
+    <script>var ignored = 1;</script>
+    <span data-sku="X-1">caf\xc3\xa9</span>
+    <a rel="nofollow next" href="?page=2">Next</a>
+    <img src="//cdn.example.com/a.png" alt="">
+    <input type="checkbox" checked>
+  </div>
+</body></html>""",
+}
+
+SELECTORS = {
+    "listing": [
+        TagSelector("article.product_pod h3 a"),
+        AttributeSelector("title", "article.product_pod h3 a"),
+        AttributeSelector("href", "article.product_pod h3 a"),
+        TagSelector("p.price_color"),
+        TagSelector("p.availability"),
+        AttributeSelector("class", "p.availability"),
+    ],
+    "mixed": [
+        TagSelector("#main"),
+        AttributeSelector("class", "div#main"),
+        TagSelector("span[data-sku]"),
+        AttributeSelector("data-sku", "span"),
+        AttributeSelector("rel", "a"),
+        AttributeSelector("href", "a"),
+        AttributeSelector("src", "img"),
+        AttributeSelector("alt", "img"),
+        AttributeSelector("checked", "input"),
+        AttributeSelector("missing", "input"),
+        TagSelector("p.does-not-exist", "span"), # Fallback query
+    ],
+}
+
+
+def extract_all(fixture: str, parser: str):
+    soup = sl.soupify(FIXTURES[fixture], parser)
+    selectors = SELECTORS[fixture]
+    # Per column, so that one empty column does not hide the others
+    return [sl.format_results([elements], [job], BASE_URL)
+            for elements, job in zip(sl.select_elements(soup, selectors), selectors)]
+
+
+backends = available_parsers()
+for name in PARSER_REGISTRY:
+    if name not in backends:
+        print(f"SKIP: {name} is not installed")
+
+for fixture in FIXTURES:
+    expected = extract_all(fixture, "html.parser")
+    assert all(expected), f"{fixture}: a selector matched nothing"
+    for backend in backends:
+        got = extract_all(fixture, backend)
+        assert got == expected, f"{fixture} on {backend}:\n{got}\n!=\n{expected}"
+
+# A missing optional package falls back instead of failing
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    assert resolve_parser("selectolax") in backends
+
+# The single-pass select_elements must match the per-column find_elements scans
+for fixture in FIXTURES:
+    for backend in ("html.parser", "lxml"):
+        if backend not in backends:
+            continue
+        soup = sl.soupify(FIXTURES[fixture], backend)
+        selectors = SELECTORS[fixture] + [TagSelector("*"), TagSelector(".nope", "li:nth-child(2) p, h3")]
+        expected = [job.find_elements(soup) for job in selectors]
+        got = sl.select_elements(soup, selectors)
+        assert [[id(e) for e in column] for column in got] == [[id(e) for e in column] for column in expected]
+
+print(f"OK: parser conformance ({', '.join(backends)})")
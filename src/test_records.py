@@ -0,0 +1,67 @@
+# Non-GUI test for record mode (GUIRef.record_selector): one row per container
+from queue import Queue
+import scraper_logic as sl
+from class_selectors import GUIRef, TagSelector, AttributeSelector
+from data_handler import rows_from_queue
+from stub_server import StubServer, html_page
+
+# The second product has no price: column mode shifts it, record mode gives None
+PAGE = """
+<article class="product_pod"><h3><a href="/a">A</a></h3><p class="price">1.00</p></article>
+<article class="product_pod"><h3><a href="/b">B</a></h3></article>
+<article class="product_pod"><h3><a href="/c">C</a></h3><p class="price">3.00</p></article>
+<p class="price">99.00</p>
+"""
+columns = [TagSelector('h3 a'), TagSelector('p.missing', 'p.price'), AttributeSelector('href', 'h3 a')]
+records = TagSelector('article.product_pod')
+
+soup = sl.soupify(PAGE)
+base = "http://example.com/list"
+assert sl.build_rows(soup, columns, base) == [
+    ["A", "1.00", "http://example.com/a"], ["B", "3.00", "http://example.com/b"],
+    ["C", "99.00", "http://example.com/c"]]
+assert sl.build_rows(soup, columns, base, records) == [
+    ["A", "1.00", "http://example.com/a"], ["B", None, "http://example.com/b"],
+    ["C", "3.00", "http://example.com/c"]]
+
+# Per-record fallbacks and nested records: same rows as extract_record on each record
+NESTED = """
+<div class="r"><b>1</b><div class="r"><i>2</i><b>3</b></div></div>
+<div class="r"><i>4</i></div><div class="r"></div>
+"""
+nested_columns = [TagSelector('b', 'i'), TagSelector('i'), TagSelector('div.r > b')]
+nested_soup = sl.soupify(NESTED)
+expected = [sl.extract_record(r, nested_columns, base) for r in TagSelector('div.r').find_elements(nested_soup)]
+assert sl.build_rows(nested_soup, nested_columns, base, TagSelector('div.r')) == expected
+assert expected == [["1", "2", "1"], ["3", "2", "3"], ["4", "4", None], [None, None, None]], expected
+assert sl.build_rows(nested_soup, nested_columns, base, TagSelector('div.none')) == []
+
+# Same rows with every parser backend
+for parser in ('lxml', 'selectolax'):
+    rows = sl.parse_rows(PAGE.encode(), columns, base, parser, records)
+    assert rows == sl.build_rows(soup, columns, base, records), (parser, rows)
+
+# GUIRef keeps the record selector through to_dict / from_dict (job store, configs)
+gui_ref = GUIRef(base, 'csv', columns, record_selector=records)
+restored = GUIRef.from_dict(gui_ref.to_dict())
+assert restored.record_selector.queries == ['article.product_pod']
+assert GUIRef.from_dict(GUIRef(base, 'csv', columns).to_dict()).record_selector is None
+
+def main():
+    # Batch scraping, with and without a process pool
+    with StubServer({"/list": html_page(PAGE)}) as server:
+        for parse_workers in (0, 2):
+            q = Queue()
+            sl.execute_batch_scraping([f"{server.base_url}/list"], columns, q,
+                                      parse_workers=parse_workers, record_selector=records)
+            assert [row[1] for row in rows_from_queue(q)] == ["1.00", None, "3.00"]
+
+        q = Queue()
+        sl.execute_scraping(GUIRef(f"{server.base_url}/list", 'csv', columns, record_selector=records), q)
+        assert len(q.get()) == 3
+
+    print("OK: record mode")
+
+
+if __name__ == "__main__": # Process pools re-import this module on spawn platforms
+    main()
@@ -0,0 +1,141 @@
+# Non-GUI test for renderer.py: rendered-DOM fallback for pages built by JavaScript
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from queue import Queue
+import cli
+import renderer
+import scraper_logic as sl
+from class_selectors import GUIRef, PageResult, TagSelector, AttributeSelector
+from crawler import Crawler
+from metrics import ScrapeStats
+from renderer import RenderedResponse
+from scheduler import HostScheduler
+from stub_server import StubServer, html_page
+
+# The items exist only once the script has run; the image must never be requested
+SPA = """<html><body><ul id="list"></ul><img src="/pixel.png">
+<script>
+setTimeout(function () {
+    var list = document.getElementById("list");
+    for (var n = 1; n <= 3; n++) {
+        var item = document.createElement("li");
+        item.className = "item";
+        item.innerHTML = '<a href="/item/' + n + '">Item ' + n + '</a>';
+        list.appendChild(item);
+    }
+}, 50);
+</script></body></html>"""
+STATIC = '<ul><li class="item"><a href="/item/9">Item 9</a></li></ul>'
+
+requested = []
+def pixel(handler):
+    requested.append(handler.path)
+    return 200, {"Content-Type": "image/png"}, b"\x89PNG"
+
+routes = {"/spa": html_page(SPA), "/static": html_page(STATIC), "/pixel.png": pixel}
+columns = [TagSelector('li.item a', name='title'), AttributeSelector('href', 'li.item a', name='link')]
+
+# What counts as "nothing matched", and what the browser waits for
+assert sl.no_matches([]) and sl.no_matches([[None, None]]) and not sl.no_matches([[None, "x"]])
+assert sl._render_wait_query(columns, None) == "li.item a, li.item a"
+assert sl._render_wait_query(columns, TagSelector('li', 'div.card')) == "li, div.card"
+
+
+class DOMRenderer:
+    """Stands in for BrowserPool where no browser is needed: serves the DOM the script would build."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.rendered = []
+
+    def render(self, url, wait_for=None, cancel=None):
+        self.rendered.append((url, wait_for))
+        items = "".join(f'<li class="item"><a href="/item/{n}">Item {n}</a></li>' for n in (1, 2, 3))
+        return RenderedResponse(url, 200, f'<ul id="list">{items}</ul>'.encode('utf-8'))
+
+
+class SlowRenderer:
+    """A renderer taking much longer than the downloads, like a real browser."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def render(self, url, wait_for=None, cancel=None):
+        time.sleep(0.3)
+        return self.pool.render(url, wait_for, cancel)
+
+
+def check_fallback(pool, base: str):
+    """Static pages are not rendered, pages matching nothing are: single page, batch and crawl."""
+    spa_rows = [[f"Item {n}", f"{base}/item/{n}"] for n in (1, 2, 3)]
+
+    q = Queue()
+    stats = ScrapeStats()
+    sl.execute_scraping(GUIRef(f"{base}/spa", 'csv', columns), q, stats=stats, renderer=pool)
+    assert q.get() is stats and q.get() == spa_rows and stats.rendered_pages == 1
+    assert "1 pages rendered in a browser" in stats.summary_lines()
+
+    q = Queue()
+    stats = ScrapeStats()
+    summary = sl.execute_batch_scraping([f"{base}/static", f"{base}/spa"], columns, q, renderer=pool, stats=stats,
+                                        scheduler=HostScheduler(max_retries=0))
+    pages = {m.url: m.rows for m in iter(q.get, summary) if isinstance(m, PageResult)}
+    assert pages == {f"{base}/static": [["Item 9", f"{base}/item/9"]], f"{base}/spa": spa_rows}, pages
+    assert stats.rendered_pages == 1 and stats.pages == 2
+
+    q = Queue()
+    crawler = Crawler(columns, AttributeSelector('href', 'a.none'), renderer=pool, scheduler=HostScheduler(max_retries=0))
+    summary = crawler.run([f"{base}/spa"], q)
+    assert [m.rows for m in iter(q.get, summary) if isinstance(m, PageResult)] == [spa_rows]
+
+    # Render times do not slow the host down
+    scheduler = HostScheduler(max_retries=0)
+    q = Queue()
+    summary = sl.execute_batch_scraping([f"{base}/spa"], columns, q, renderer=SlowRenderer(pool), scheduler=scheduler)
+    assert scheduler.host_rate(base) >= scheduler.rate, scheduler.host_rate(base)
+
+    # Without a renderer the page simply has no rows
+    q = Queue()
+    sl.execute_scraping(GUIRef(f"{base}/spa", 'csv', columns), q)
+    assert q.get() == []
+
+
+with StubServer(routes) as server:
+    base = server.base_url
+
+    # The fallback wiring, with the DOM a browser would give
+    dom = DOMRenderer(base)
+    check_fallback(dom, base)
+    assert [url for url, _ in dom.rendered] == [f"{base}/spa"] * 4
+    assert dom.rendered[0][1] == "li.item a, li.item a"
+
+    # A real headless browser: the script runs, the image is blocked, contexts are reused
+    if not renderer.HAS_PLAYWRIGHT:
+        print("playwright not installed: browser rendering skipped")
+        try:
+            renderer.BrowserPool()
+            assert False, "BrowserPool without playwright"
+        except RuntimeError:
+            pass
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = os.path.join(directory, "config.json")
+            with open(config_path, "w") as f:
+                json.dump({"urls": [f"{base}/spa"], "selectors": [{"name": "t", "queries": "li"}], "render": True}, f)
+            with contextlib.redirect_stderr(io.StringIO()) as err:
+                assert cli.main(["run", config_path]) == cli.EXIT_CONFIG and "playwright" in err.getvalue()
+    else:
+        with renderer.BrowserPool(size=2) as pool:
+            try:
+                page = pool.render(f"{base}/spa", "li.item")
+            except Exception as e: # e.g. browsers not downloaded (playwright install chromium)
+                print(f"headless browser not available ({type(e).__name__}): browser rendering skipped")
+            else:
+                assert b"Item 3" in page.content and page.url == f"{base}/spa" and page.status_code == 200
+                check_fallback(pool, base)
+                assert requested == [], requested # Images are never downloaded
+
+print("OK: rendered-DOM fallback")
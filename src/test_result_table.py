@@ -0,0 +1,124 @@
+# Non-GUI test for result_table.py: compact column-wise storage of result rows
+import os
+import pickle
+import tempfile
+from queue import Queue
+import scraper_logic as sl
+from class_selectors import GUIRef, TagSelector, RowBatch
+from config import SAVER_REGISTRY
+from data_handler import save_data
+from result_table import ResultTable, RowView
+from utils import ROW_GROUP_SIZE
+from stub_server import StubServer, html_page
+
+rows = [["Book A", "Travel", 1.5, None],
+        ["Book B", "Travel", 1, True],
+        ["Book C", "Poetry", 1.0, None]]
+table = ResultTable.from_rows(rows, ["title", "category", "price", "flag"])
+
+# Same rows back, as lists, with their types (1, 1.0 and True are not merged)
+assert len(table) == 3 and table.width == 4 and table == rows
+assert list(table) == rows and table.tolist() == rows
+assert [type(row[2]) for row in table] == [float, int, float] and table[1][3] is True
+assert table.column(1) == ["Travel", "Travel", "Poetry"]
+assert table.column(0, 1, 2) == ["Book B"]
+
+# Row views read the columns in place
+row = table[-1]
+assert isinstance(row, RowView) and row == rows[2] and row.tolist() == rows[2] and len(row) == 4
+assert row[0] == "Book C" and list(row) == rows[2]
+try:
+    table[3]
+    assert False, "index out of range"
+except IndexError:
+    pass
+
+# Slices are tables; extending from a table copies it column by column
+assert isinstance(table[1:], ResultTable) and table[1:] == rows[1:] and table[::2] == rows[::2]
+assert table[5:] == [] and not table[5:]
+both = ResultTable()
+both.extend(table)
+both.extend(rows)
+both.append(["Book D", "Travel", 2.0, False])
+assert both == rows + rows + [["Book D", "Travel", 2.0, False]]
+try:
+    both.append(["too", "short"])
+    assert False, "accepted a row of another width"
+except ValueError:
+    pass
+
+# Repeated values are stored once; mostly distinct columns fall back to plain lists
+many = ResultTable.from_rows([f"Product {n}", f"Category {n % 10}"] for n in range(5000))
+assert many.encodings() == ['list', 'dict'] and many[4321] == ["Product 4321", "Category 1"]
+assert len(many._columns[1].values) == 10
+assert ResultTable.from_rows([]) == [] and list(ResultTable()) == []
+assert pickle.loads(pickle.dumps(many)) == many
+
+# Less memory than the same rows as lists (the benchmark measures how much)
+import benchmark
+_, list_mb = benchmark._traced_mb(lambda: list(benchmark.synthetic_rows(20000)))
+_, table_mb = benchmark._traced_mb(lambda: ResultTable.from_rows(benchmark.synthetic_rows(20000)))
+assert table_mb < list_mb * 0.8, (table_mb, list_mb)
+
+# The savers take a table like any rows (Parquet reads its columns directly)
+received = []
+SAVER_REGISTRY['spy'] = lambda results, filepath, columns: received.append(results)
+try:
+    save_data(table, 'spy', 'unused')
+    save_data(iter([["x"]]), 'spy', 'unused')
+finally:
+    del SAVER_REGISTRY['spy']
+assert received[0] is table and list(received[1]) == [["x"]] # The table itself, not an iterator over it
+try:
+    save_data(ResultTable(), 'csv', 'unused')
+    assert False, "empty table saved"
+except ValueError:
+    pass
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "out.csv")
+    save_data(table, 'csv', path)
+    with open(path) as f:
+        assert f.read().splitlines() == ["Book A,Travel,1.5,", "Book B,Travel,1,True", "Book C,Poetry,1.0,"]
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow not installed: Parquet skipped")
+    else:
+        path = os.path.join(directory, "out.parquet")
+        save_data(many, 'parquet', path, ["title", "category"])
+        assert pq.read_table(path).to_pylist()[4321] == {"title": "Product 4321", "category": "Category 1"}
+        # A column first seen as None takes its type from a later batch
+        late = [["a", None]] * ROW_GROUP_SIZE + [["b", 3]]
+        for fmt in ('parquet', 'arrow'):
+            path = os.path.join(directory, f"late.{fmt}")
+            save_data(iter(late), fmt, path, ["name", "count"])
+            saved = pq.read_table(path) if fmt == 'parquet' else pa.ipc.open_file(path).read_all()
+            assert str(saved.schema.field("count").type) == "int64", fmt
+            assert saved.num_rows == len(late) and saved.to_pylist()[-1] == {"name": "b", "count": 3}
+        # A failed write leaves no file behind
+        path = os.path.join(directory, "mixed.parquet")
+        try:
+            save_data(iter([[1.5]] * ROW_GROUP_SIZE + [["x"]]), 'parquet', path)
+            assert False, "float column took a string"
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+        assert not os.path.exists(path)
+
+# execute_scraping sends its batches as tables
+items = "".join(f'<h3>Item {n}</h3>' for n in range(5))
+with StubServer({"/list": html_page(items)}) as server:
+    q = Queue()
+    sl.execute_scraping(GUIRef(f"{server.base_url}/list", 'csv', [TagSelector('h3')]), q, batch_size=2)
+    batches = []
+    while not batches or not batches[-1].done:
+        batches.append(q.get())
+assert all(isinstance(b, RowBatch) and isinstance(b.rows, ResultTable) for b in batches)
+assert [len(b.rows) for b in batches] == [2, 2, 1, 0]
+kept = ResultTable()
+for batch in batches:
+    kept.extend(batch.rows)
+assert kept == [[f"Item {n}"] for n in range(5)]
+
+print("OK: result table")
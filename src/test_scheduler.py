@@ -0,0 +1,108 @@
+# Non-GUI test for scheduler.py against a local server injecting 429s, 503s and slow pages
+import threading
+import time
+from queue import Queue
+import scraper_logic as sl
+from class_selectors import TagSelector, PageResult
+from jobs import CancelToken, ScrapeCancelled
+from scheduler import HostScheduler, TokenBucket, parse_retry_after
+from stub_server import StubServer
+
+calls = {"throttled": 0, "flaky": 0}
+lock = threading.Lock()
+
+def throttled(handler):
+    # First two calls answer 429 with Retry-After: 1
+    with lock:
+        calls["throttled"] += 1
+        count = calls["throttled"]
+    if count <= 2:
+        return 429, {"Retry-After": "1"}, b"slow down"
+    return 200, {}, b"<p>throttled ok</p>"
+
+def flaky(handler):
+    with lock:
+        calls["flaky"] += 1
+        count = calls["flaky"]
+    if count == 1:
+        return 503, {}, b"busy"
+    return 200, {}, b"<p>flaky ok</p>"
+
+def slow(handler):
+    time.sleep(0.3)
+    return 200, {}, b"<p>slow ok</p>"
+
+def fast(handler):
+    return 200, {}, b"<p>fast</p>"
+
+routes = {"/throttled": throttled, "/flaky": flaky, "/slow": slow, "/fast": fast}
+selectors = [TagSelector('p')]
+
+with StubServer(routes) as server:
+    base = server.base_url
+
+    # Retry-After is honored: two 429s with "1" second each
+    scheduler = HostScheduler(per_host_limit=2, backoff_base=0.01)
+    q = Queue()
+    started = time.monotonic()
+    summary = sl.execute_batch_scraping([f"{base}/throttled", f"{base}/flaky"], selectors, q, scheduler=scheduler)
+    elapsed = time.monotonic() - started
+    pages = {m.url: m for m in iter(q.get, summary) if isinstance(m, PageResult)}
+    assert summary.failed == 0, [repr(p.error) for p in pages.values()]
+    assert pages[f"{base}/throttled"].rows == [["throttled ok"]]
+    assert pages[f"{base}/flaky"].rows == [["flaky ok"]]
+    assert elapsed >= 2.0, elapsed
+    # Throttling halved the host rate
+    assert scheduler.host_rate(base) < scheduler.rate
+
+    # Retries run out: the error is reported for that URL only
+    scheduler = HostScheduler(max_retries=1, backoff_base=0.01)
+    calls["throttled"] = 0
+    q = Queue()
+    summary = sl.execute_batch_scraping([f"{base}/throttled", f"{base}/fast"], selectors, q, scheduler=scheduler)
+    assert summary.total == 2 and summary.failed == 1
+
+    # Token bucket: 10 requests at 20/s with a burst of 2 take about 0.4 s
+    scheduler = HostScheduler(rate=20, max_rate=20, burst=2, per_host_limit=10)
+    q = Queue()
+    started = time.monotonic()
+    sl.execute_batch_scraping([f"{base}/fast"] * 10, selectors, q, scheduler=scheduler)
+    assert time.monotonic() - started >= 0.35
+
+    # A latency spike lowers the rate
+    scheduler = HostScheduler(rate=10, per_host_limit=1)
+    for _ in range(3):
+        scheduler.call(f"{base}/fast", lambda: sl.fetch_page(f"{base}/fast"))
+    before = scheduler.host_rate(base)
+    for _ in range(3):
+        scheduler.call(f"{base}/slow", lambda: sl.fetch_page(f"{base}/slow"))
+    assert scheduler.host_rate(base) < before, (scheduler.host_rate(base), before)
+
+# The token bucket waits through the injected sleep, and a cancel ends the wait
+slept = []
+bucket = TokenBucket(rate=2, capacity=1, sleep=slept.append)
+bucket.acquire()
+bucket.acquire()
+bucket.acquire()
+assert len(slept) == 2 and 0.4 < slept[0] <= 0.5 and 0.9 < slept[1] <= 1.0, slept # Reserved in turn
+token = CancelToken()
+token.cancel()
+try:
+    TokenBucket(rate=0.1, capacity=0).acquire(token) # Would wait 10 s
+    assert False, "cancelled wait"
+except ScrapeCancelled:
+    pass
+
+# One fast response does not become the baseline: steady latencies keep the rate growing
+scheduler = HostScheduler(rate=1, max_rate=10)
+state = scheduler._state("http://example.com/")
+scheduler._on_success(state, 0.001) # e.g. a 304
+for _ in range(20):
+    scheduler._on_success(state, 0.1)
+assert scheduler.host_rate("http://example.com/") > 1, scheduler.host_rate("http://example.com/")
+
+assert parse_retry_after("120") == 120.0
+assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+assert parse_retry_after("soon") is None
+
+print('OK: scheduler')
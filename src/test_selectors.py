@@ -0,0 +1,35 @@
+# Non-GUI test for the compiled CSS selector cache (class_selectors.compile_selector)
+import soupsieve
+import scraper_logic as sl
+from class_selectors import TagSelector, AttributeSelector, compile_selector, selector_cache_info
+
+QUERY = "div.card > h3.test-selector-cache"
+
+# The first compilation is a miss, the same query again a hit returning the same object
+before = selector_cache_info()
+first = compile_selector(QUERY)
+middle = selector_cache_info()
+assert isinstance(first, soupsieve.SoupSieve)
+assert middle.misses == before.misses + 1 and middle.currsize == before.currsize + 1
+assert compile_selector(QUERY) is first
+after = selector_cache_info()
+assert after.hits == middle.hits + 1 and after.misses == middle.misses
+
+# Selector instances share the cache: a new instance compiles nothing, every page is a hit
+TagSelector(QUERY)
+AttributeSelector('href', QUERY)
+assert selector_cache_info().misses == after.misses
+
+soup = sl.soupify('<div class="card"><h3 class="test-selector-cache">Title</h3></div>')
+hits = selector_cache_info().hits
+assert [tag.get_text() for tag in TagSelector(QUERY).find_elements(soup)] == ["Title"]
+assert selector_cache_info().hits > hits and selector_cache_info().misses == after.misses
+
+# Invalid CSS fails when the selector is created, not on the first page
+try:
+    TagSelector("div[")
+    raise AssertionError("invalid CSS must be rejected")
+except soupsieve.SelectorSyntaxError:
+    pass
+
+print('OK: selector cache')
@@ -0,0 +1,61 @@
+# Non-GUI test for streaming.py (incremental parsing) against a local server
+from queue import Queue
+import streaming
+from class_selectors import GUIRef, TagSelector, AttributeSelector, RowBatch
+from stub_server import StubServer, html_page
+
+CARD = ('<article class="product_pod"><h3><a href="item_{n}.html">Book {n} &amp; co</a></h3>'
+        '<p class="price_color">{n}.00</p><br></article>')
+# Card 3 has no title: its row must get None instead of shifting the others
+cards = [CARD.format(n=n) for n in range(1000)]
+cards[3] = '<article class="product_pod"><p class="price_color">3.00</p></article>'
+PAGE = "<html><body><ol>" + "".join(f"<li>{card}" for card in cards) + "</ol></body></html>"
+
+selectors = [TagSelector('h3 a'), TagSelector('p.price_color'), AttributeSelector('href', 'h3 a')]
+
+with StubServer({"/catalogue/": html_page(PAGE)}) as server:
+    url = f"{server.base_url}/catalogue/"
+    gui_ref = GUIRef(url=url, format='csv', selectors=selectors)
+
+    # Tiny chunks: records are split across many feed() calls
+    rows = list(streaming.stream_scraping(gui_ref, 'article.product_pod', chunk_size=97))
+    assert len(rows) == 1000, len(rows)
+    assert rows[2] == ['Book 2 & co', '2.00', f"{url}item_2.html"], rows[2]
+    assert rows[3] == [None, '3.00', None], rows[3]
+    assert rows[999][1] == '999.00'
+
+    q = Queue()
+    streaming.execute_streaming_scraping(gui_ref, 'article.product_pod', q, batch_size=300)
+    batches = [q.get() for _ in range(4)]
+    assert all(isinstance(batch, RowBatch) for batch in batches)
+    assert [len(batch.rows) for batch in batches] == [300, 300, 300, 100]
+    assert [batch.done for batch in batches] == [False, False, False, True]
+
+def collect(record_selector: str, html: str) -> list:
+    collector = streaming.RecordCollector(record_selector)
+    for n in range(0, len(html), 7): # Chunk boundaries anywhere
+        collector.feed(html[n:n + 7])
+    collector.close()
+    return collector.records
+
+# Records whose end tag is left out close at the next sibling or at the parent's end
+assert collect('li', "<ul><li>a<li>b <b>c</b></ul><p>after") == ["<li>a</li>", "<li>b <b>c</b></li>"]
+assert collect('li', "<ol><li>a<ul><li>x<li>y</ul><li>b</ol>") == \
+    ["<li>a<ul><li>x</li><li>y</li></ul></li>", "<li>b</li>"] # Nested list items stay inside
+assert collect('tr.row', "<table><tr class=row><td>1<td>2<tr class=row><td>3</table><tr class=row>") == \
+    ['<tr class=row><td>1</td><td>2</td></tr>', '<tr class=row><td>3</td></tr>', '<tr class=row></tr>']
+assert collect('p', "<div><p>one<p>two<div>x</div></div>") == ["<p>one</p>", "<p>two</p>"]
+assert collect('article', "<article><p>a</span></article><article>b") == \
+    ["<article><p>a</p></article>", "<article>b</article>"] # Stray end tag ignored, truncated page closed
+
+with StubServer({"/list": html_page("<ul>" + "".join(f"<li><p>{n}" for n in range(500)) + "</ul>")}) as server:
+    rows = list(streaming.stream_rows(f"{server.base_url}/list", 'li', [TagSelector('p')], chunk_size=64))
+    assert rows == [[str(n)] for n in range(500)], rows[:3]
+
+try:
+    streaming.parse_record_selector('ol > li')
+    raise AssertionError("combinators must be rejected")
+except ValueError:
+    pass
+
+print('OK: streaming')
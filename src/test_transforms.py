@@ -0,0 +1,119 @@
+# Non-GUI test for transforms.py: per-column cleaning and type coercion
+import json
+import os
+import pickle
+import tempfile
+from datetime import date, datetime
+import scraper_logic as sl
+import transforms
+from class_selectors import TagSelector, AttributeSelector, selector_from_dict
+from config import TRANSFORM_VECTOR_MIN_ROWS
+from data_handler import save_data
+from transforms import ColumnTransform, apply_transforms
+
+BASE = "http://example.com/shop/list"
+
+# Every step on its own (plain Python path)
+def run(specs, values):
+    return ColumnTransform(specs).apply(values, BASE)
+
+assert run('strip', ["  a \n b ", None]) == ["a b", None]
+assert run('normalize', [" 12  €", "ＡＢ"]) == ["12 €", "AB"]
+assert run('lower', ["AbC"]) == ["abc"]
+assert run({'op': 'regex', 'pattern': r'[\d.,]+'}, ["£1,234.50 incl.", "n/a"]) == ["1,234.50", None]
+assert run({'op': 'regex', 'pattern': r'(\d+) of (\d+)', 'group': 2}, ["3 of 12"]) == ["12"]
+assert run({'op': 'replace', 'pattern': r'\s*\(.*\)', 'replacement': ''}, ["Book (used)"]) == ["Book"]
+assert run('number', ["1,234.50", " 7 ", "free"]) == [1234.5, 7.0, None]
+assert run('number', ["nan", "inf", "-Infinity"]) == [None, None, None] # Not numbers, like on the pandas path
+assert run({'op': 'number', 'decimal': ',', 'thousands': '.'}, ["1.234,50"]) == [1234.5]
+assert run('int', ["1,000", "2.5", "x"]) == [1000, None, None]
+assert run('date', ["2024-03-01", "soon"]) == [date(2024, 3, 1), None]
+assert run({'op': 'date', 'format': '%d/%m/%Y'}, ["01/03/2024"]) == [date(2024, 3, 1)]
+assert run('datetime', ["2024-03-01T10:30:00"]) == [datetime(2024, 3, 1, 10, 30)]
+assert run('url', ["../img/a.png", "https://cdn.example.com/b.png"]) == \
+    ["http://example.com/img/a.png", "https://cdn.example.com/b.png"]
+
+# Steps chain; a missing value stays missing through all of them
+price = ['normalize', {'op': 'regex', 'pattern': r'[\d.,]+'}, 'number']
+assert run(price, ["  £ 51.77 ", "Sold out", None]) == [51.77, None, None]
+
+# Invalid declarations fail early, with ValueError
+for bad in (['trim'], [{'op': 'regex'}], [{'op': 'regex', 'pattern': '('}], [{'op': 'strip', 'x': 1}],
+            [{'op': 'regex', 'pattern': 'a', 'group': 1}], [{'pattern': 'a'}]):
+    try:
+        ColumnTransform(bad)
+        assert False, f"accepted {bad}"
+    except ValueError:
+        pass
+
+# On the selectors: round trip through to_dict, and picklable (parse process pool)
+columns = [
+    TagSelector('h3 a', name='title', transforms=['strip']),
+    TagSelector('p.price', name='price', transforms=price),
+    AttributeSelector('data-src', 'img', name='image', transforms=['url']),
+    TagSelector('span.stock', name='stock', transforms=[{'op': 'regex', 'pattern': r'(\d+)'}, 'int']),
+    AttributeSelector('href', 'h3 a', name='link'),
+]
+for column in columns:
+    copy = selector_from_dict(column.to_dict())
+    assert copy.to_dict() == column.to_dict()
+    assert pickle.loads(pickle.dumps(column)).to_dict() == column.to_dict()
+assert columns[4].transforms is None and 'transforms' not in columns[4].to_dict()
+
+# In the pipeline: both modes, typed columns
+PAGE = """
+<article><h3><a href="../a"> Book  A </a></h3><p class="price">£51.77</p>
+  <img data-src="../img/a.jpg"><span class="stock">In stock (22 available)</span></article>
+<article><h3><a href="../b">Book B</a></h3><p class="price">Sold out</p>
+  <img data-src="/img/b.jpg"><span class="stock">In stock (3 available)</span></article>
+"""
+expected = [
+    ["Book A", 51.77, "http://example.com/img/a.jpg", 22, "http://example.com/a"],
+    ["Book B", None, "http://example.com/img/b.jpg", 3, "http://example.com/b"],
+]
+soup = sl.soupify(PAGE)
+assert sl.build_rows(soup, columns, BASE) == expected
+assert sl.build_rows(soup, columns, BASE, TagSelector('article')) == expected
+assert sl.parse_rows(PAGE.encode(), columns, BASE) == expected
+
+# Typed values reach the savers (dates as ISO 8601 in JSON)
+rows = [["a", 1.5, date(2024, 3, 1)], ["b", None, None]]
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "out.jsonl")
+    save_data(rows, 'jsonl', path)
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == [["a", 1.5, "2024-03-01"], ["b", None, None]]
+
+# Vectorized path: same results as the plain Python one
+if transforms.HAS_PANDAS:
+    values = [" £1,234.50 ", "Sold out", None, "2024-03-01", " 7 ", "nan", "inf", "-Infinity", "1_000", "\u0663", " In Stock ", "a\u2003\u2003b"] * 300
+    for specs in (price, ['strip'], ['lower'], ['normalize', 'int'], ['date'], ['datetime'],
+                  [{'op': 'number', 'decimal': ',', 'thousands': '.'}], [{'op': 'regex', 'pattern': r'(\d+)'}],
+                  [{'op': 'regex', 'pattern': r'\d+'}], [{'op': 'replace', 'pattern': r'\d', 'replacement': '#'}],
+                  [{'op': 'regex', 'pattern': r'(?i)in stock'}], [{'op': 'regex', 'pattern': r'(?i)(\w+) stock'}],
+                  ['url']):
+        transform = ColumnTransform(specs)
+        python = transform.apply(values[:24], BASE)
+        vectorized = transform._apply_pandas(values[:24], BASE)
+        assert python == vectorized, (specs, python, vectorized)
+        assert [type(v) for v in python] == [type(v) for v in vectorized], (specs, vectorized)
+    table = [[value] for value in values * 3]
+    apply_transforms(table, [ColumnTransform(price)], BASE) # Long enough for pandas
+    assert table[0] == [1234.5] and table[1] == [None]
+
+    def value_by_value(transform, values):
+        for step in transform.steps:
+            values = [None if value is None else step.apply(value, BASE) for value in values]
+        return values
+
+    # UTC offsets that differ across a column (a DST change): each value keeps its own date
+    stamps = ["2024-03-30T23:30:00+01:00", "2024-04-02T00:30:00+02:00", "2024-04-02", None, "never"]
+    stamps *= TRANSFORM_VECTOR_MIN_ROWS // len(stamps) + 1
+    for specs in (['date'], ['datetime']):
+        transform = ColumnTransform(specs)
+        assert transform.apply(stamps, BASE) == value_by_value(transform, stamps), specs # Vectorized path
+    assert ColumnTransform('date').apply(stamps, BASE)[:2] == [date(2024, 3, 30), date(2024, 4, 2)]
+else:
+    print("pandas not installed: vectorized path skipped")
+
+print("OK: column transforms")
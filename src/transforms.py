@@ -0,0 +1,326 @@
+# Per-column cleaning and type coercion, declared on the selectors
+# A selector's `transforms` is a list of steps, each a name or a dict:
+#     [strip, {op: regex, pattern: "[\d.,]+"}, {op: number, thousands: ","}]
+# The steps run after extraction, over a whole column of a page at once:
+# with pandas installed (and enough rows) every step is one vectorized call,
+# otherwise a plain Python loop applies the same steps value by value.
+# Steps are small classes (not closures) so selectors still pickle for the
+# parse process pool.
+import importlib.util
+import math
+import re
+import unicodedata
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+from config import TRANSFORM_VECTOR_MIN_ROWS
+
+HAS_PANDAS = importlib.util.find_spec('pandas') is not None
+
+_SPACES = re.compile(r'\s+')
+# Inline global flags at the start of a pattern, e.g. "(?i)" or "(?i)(?s)"
+_GLOBAL_FLAGS = re.compile(r'^(?:\(\?[aiLmsux]+\))+')
+
+
+class TransformStep:
+    """
+    One step of a column transform. `apply` handles a single value,
+    `apply_series` a whole pandas Series. Missing values (None) stay missing.
+    """
+    op = ''
+
+    def __init__(self, **options):
+        if options:
+            raise ValueError(f"Unknown options for transform '{self.op}': {', '.join(sorted(options))}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'op': self.op}
+
+    def apply(self, value: Any, base_url: str) -> Any:
+        raise NotImplementedError
+
+    def apply_series(self, series, base_url: str):
+        # Default: element-wise, for steps with no vectorized equivalent
+        import pandas as pd
+        present = series.notna().tolist()
+        return pd.Series([self.apply(value, base_url) if ok else None
+                          for value, ok in zip(series.tolist(), present)], index=series.index, dtype=object)
+
+
+class Strip(TransformStep):
+    """Trim and collapse whitespace runs to one space."""
+    op = 'strip'
+
+    def apply(self, value, base_url):
+        return _SPACES.sub(' ', str(value)).strip()
+
+    def apply_series(self, series, base_url):
+        return series.str.replace(_SPACES, ' ', regex=True).str.strip()
+
+
+class Normalize(Strip):
+    """Unicode NFKC (e.g. non-breaking spaces, full-width digits), then strip."""
+    op = 'normalize'
+
+    def apply(self, value, base_url):
+        return super().apply(unicodedata.normalize('NFKC', str(value)), base_url)
+
+    def apply_series(self, series, base_url):
+        return super().apply_series(series.str.normalize('NFKC'), base_url)
+
+
+class Lower(TransformStep):
+    op = 'lower'
+
+    def apply(self, value, base_url):
+        return str(value).lower()
+
+    def apply_series(self, series, base_url):
+        return series.str.lower()
+
+
+class Regex(TransformStep):
+    """First match of `pattern`: capture `group` (default 1, or 0 without groups), None without a match."""
+    op = 'regex'
+
+    def __init__(self, pattern: str, group: Optional[int] = None, **options):
+        super().__init__(**options)
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.group = group if group is not None else (1 if self.regex.groups else 0)
+        if self.group > self.regex.groups:
+            raise ValueError(f"Transform 'regex': no group {self.group} in {pattern!r}")
+
+    def to_dict(self):
+        return {'op': self.op, 'pattern': self.pattern, 'group': self.group}
+
+    def apply(self, value, base_url):
+        match = self.regex.search(str(value))
+        return match.group(self.group) if match else None
+
+    def apply_series(self, series, base_url):
+        # One capture group: a single str.extract call; several: element-wise
+        # (extracting them all into a DataFrame costs more than re.search per value)
+        if self.group == 0 and not self.regex.groups:
+            # Wrapped in a group to extract the whole match; inline global flags such as
+            # "(?i)" must stay at the start, so they are passed as flags instead
+            body = _GLOBAL_FLAGS.sub('', self.pattern, count=1)
+            return series.str.extract(f"({body})", flags=self.regex.flags, expand=False)
+        if self.group == 1 and self.regex.groups == 1:
+            return series.str.extract(self.pattern, expand=False)
+        return super().apply_series(series, base_url)
+
+
+class Replace(TransformStep):
+    """re.sub(pattern, replacement)."""
+    op = 'replace'
+
+    def __init__(self, pattern: str, replacement: str = '', **options):
+        super().__init__(**options)
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = re.compile(pattern)
+
+    def to_dict(self):
+        return {'op': self.op, 'pattern': self.pattern, 'replacement': self.replacement}
+
+    def apply(self, value, base_url):
+        return self.regex.sub(self.replacement, str(value))
+
+    def apply_series(self, series, base_url):
+        return series.str.replace(self.regex, self.replacement, regex=True)
+
+
+class Number(TransformStep):
+    """
+    Float from text like "1,234.50" (thousands / decimal separators are
+    options, e.g. "1.234,50" with thousands=".", decimal=","). None when not a
+    number, "nan" and "inf" included.
+    """
+    op = 'number'
+
+    def __init__(self, decimal: str = '.', thousands: str = ',', **options):
+        super().__init__(**options)
+        if decimal == thousands:
+            raise ValueError(f"Transform '{self.op}': decimal and thousands separators must differ")
+        self.decimal = decimal
+        self.thousands = thousands
+
+    def to_dict(self):
+        return {'op': self.op, 'decimal': self.decimal, 'thousands': self.thousands}
+
+    def _text(self, value) -> str:
+        text = str(value).strip().replace(self.thousands, '')
+        return text.replace(self.decimal, '.') if self.decimal != '.' else text
+
+    @staticmethod
+    def _float(text) -> Optional[float]:
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None # "nan", "inf": not a number either
+
+    def apply(self, value, base_url):
+        return self._float(value if isinstance(value, (int, float)) else self._text(value))
+
+    def apply_series(self, series, base_url):
+        import pandas as pd
+        text = series.astype('string').str.strip().str.replace(self.thousands, '', regex=False)
+        if self.decimal != '.':
+            text = text.str.replace(self.decimal, '.', regex=False)
+        numbers = pd.to_numeric(text, errors='coerce').astype('Float64') # float even when all are whole
+        # What to_numeric rejects but float() reads ("1_000", non-ASCII digits): value by value, like apply()
+        retry = (numbers.isna() & text.notna()).to_numpy(dtype=bool)
+        if retry.any():
+            numbers[retry] = pd.array([self._float(value) for value in text[retry].tolist()], dtype='Float64')
+        return numbers.mask(numbers.abs() == float('inf')) # Like apply(): None for "inf"
+
+
+class Integer(Number):
+    """Like number, but only whole values (None otherwise)."""
+    op = 'int'
+
+    def apply(self, value, base_url):
+        number = super().apply(value, base_url)
+        return int(number) if number is not None and number.is_integer() else None
+
+    def apply_series(self, series, base_url):
+        numbers = super().apply_series(series, base_url)
+        return numbers.where(numbers % 1 == 0).astype('Int64')
+
+
+class Date(TransformStep):
+    """datetime.date parsed with `format` (strptime codes; ISO 8601 by default)."""
+    op = 'date'
+
+    def __init__(self, format: Optional[str] = None, **options):
+        super().__init__(**options)
+        self.format = format
+
+    def to_dict(self):
+        return {'op': self.op, 'format': self.format}
+
+    def _parse(self, value) -> Optional[datetime]:
+        text = str(value).strip()
+        try:
+            return datetime.strptime(text, self.format) if self.format else datetime.fromisoformat(text)
+        except ValueError:
+            return None
+
+    def apply(self, value, base_url):
+        if isinstance(value, date):
+            return value.date() if isinstance(value, datetime) else value
+        parsed = self._parse(value)
+        return parsed.date() if parsed is not None else None
+
+    def _series(self, series):
+        """Parsed column, or None when pandas cannot parse it as one column."""
+        import pandas as pd
+        try:
+            # 'ISO8601' needs pandas >= 2.0; without a format pandas would guess one per value
+            return pd.to_datetime(series.astype('string').str.strip(), format=self.format or 'ISO8601',
+                                  errors='coerce')
+        except (TypeError, ValueError): # e.g. UTC offsets that differ (a DST change): one column, one zone
+            return None
+
+    def apply_series(self, series, base_url):
+        parsed = self._series(series)
+        if parsed is None:
+            return TransformStep.apply_series(self, series, base_url) # Value by value, each in its own zone
+        return parsed.dt.date
+
+
+class DateTime(Date):
+    """datetime.datetime parsed with `format` (ISO 8601 by default)."""
+    op = 'datetime'
+
+    def apply(self, value, base_url):
+        if isinstance(value, datetime):
+            return value
+        return self._parse(value)
+
+    def apply_series(self, series, base_url):
+        parsed = self._series(series)
+        if parsed is None:
+            return TransformStep.apply_series(self, series, base_url)
+        return parsed.dt.to_pydatetime()
+
+
+class Url(TransformStep):
+    """Resolve a relative URL against the page URL (any attribute, e.g. data-src)."""
+    op = 'url'
+
+    def apply(self, value, base_url):
+        value = str(value)
+        if value.startswith(('https://', 'http://')): # Already absolute: urljoin is costly
+            return value
+        return urljoin(base_url, value)
+
+
+# Available steps, by name (register new ones here)
+TRANSFORM_REGISTRY: Dict[str, type] = {
+    step.op: step for step in (Strip, Normalize, Lower, Regex, Replace, Number, Integer, Date, DateTime, Url)
+}
+
+StepSpec = Union[str, Dict[str, Any]]
+
+
+def build_step(spec: StepSpec) -> TransformStep:
+    """A step from its name or its dict ({"op": name, **options}); ValueError if invalid."""
+    if isinstance(spec, str):
+        spec = {'op': spec}
+    if not isinstance(spec, dict) or 'op' not in spec:
+        raise ValueError(f"Invalid transform: {spec!r}")
+    options = dict(spec)
+    op = options.pop('op')
+    step_class = TRANSFORM_REGISTRY.get(op)
+    if step_class is None:
+        raise ValueError(f"Transform not supported: {op} (available: {', '.join(TRANSFORM_REGISTRY)})")
+    try:
+        return step_class(**options)
+    except TypeError as e: # Missing required option
+        raise ValueError(f"Invalid transform {spec!r}: {e}")
+    except re.error as e:
+        raise ValueError(f"Invalid transform {spec!r}: bad pattern: {e}")
+
+
+class ColumnTransform:
+    """The steps of one column, applied in order to whole columns."""
+
+    def __init__(self, specs: List[StepSpec]):
+        if isinstance(specs, (str, dict)):
+            specs = [specs]
+        self.steps = [build_step(spec) for spec in specs]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [step.to_dict() for step in self.steps]
+
+    def apply(self, values: List[Any], base_url: str) -> List[Any]:
+        """Transformed column (same length); pandas is used from TRANSFORM_VECTOR_MIN_ROWS values."""
+        if HAS_PANDAS and len(values) >= TRANSFORM_VECTOR_MIN_ROWS:
+            return self._apply_pandas(values, base_url)
+        for step in self.steps:
+            values = [None if value is None else step.apply(value, base_url) for value in values]
+        return values
+
+    def _apply_pandas(self, values: List[Any], base_url: str) -> List[Any]:
+        import pandas as pd
+        series = pd.Series(values, dtype='string') # Extracted values: str or None
+        for step in self.steps:
+            series = step.apply_series(series, base_url)
+            if not isinstance(series, pd.Series): # e.g. to_pydatetime() returns an array
+                series = pd.Series(series, dtype=object)
+        # Back to plain Python values, missing ones (NaN, NaT, NA) as None
+        return series.astype(object).where(series.notna(), None).tolist()
+
+
+def apply_transforms(rows: List[List[Any]], transforms: List[Optional[ColumnTransform]], base_url: str):
+    """Run every column's transform over the rows of a page (in place, column by column)."""
+    for column, transform in enumerate(transforms):
+        if transform is None or not rows:
+            continue
+        values = transform.apply([row[column] for row in rows], base_url)
+        for row, value in zip(rows, values):
+            row[column] = value
@@ -1,15 +1,184 @@
 import csv
+import gzip
+import importlib.util
+import io
 import json
-from typing import List, Any
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional
+
+from result_table import ResultTable
+
+# Optional dependencies: the formats using them are only registered when installed.
+# They are imported on first use, so importing this module (CLI start-up) stays fast.
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+
+# Rows are written as they come (Iterable, not only lists),
+# so a saver never needs the whole result set in memory.
+# Every saver takes (results, filepath, columns=None); `columns` holds the
+# column names from the selectors, used by the formats that store a schema.
+WRITE_BUFFER_SIZE = 1024 * 1024 # Bytes buffered before each write to disk
+ROW_GROUP_SIZE = 50_000         # Rows held in memory per Parquet/Arrow batch
+SCHEMA_BUFFER_GROUPS = 10       # Batches held at most while waiting for a column's first value
+
+def json_default(value: Any) -> Any:
+    """json.dumps fallback for typed cells (see transforms.py): dates as ISO 8601."""
+    if isinstance(value, date): # datetime included
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+@contextmanager
+def _open_text(filepath: str, compression: Optional[str] = None):
+    """Buffered text file, optionally gzip/zstd compressed. "-" is stdout (uncompressed only)."""
+    if filepath == '-':
+        if compression is not None:
+            raise ValueError("Compressed formats cannot be written to stdout.")
+        yield sys.stdout
+        sys.stdout.flush()
+    elif compression is None:
+        with open(filepath, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            yield f
+    elif compression == 'gzip':
+        with gzip.open(filepath, 'wt', newline='', encoding='utf-8') as f:
+            yield f
+    elif compression == 'zstd':
+        import zstandard
+        with open(filepath, 'wb') as raw:
+            with zstandard.ZstdCompressor().stream_writer(raw) as compressor:
+                with io.TextIOWrapper(io.BufferedWriter(compressor, WRITE_BUFFER_SIZE),
+                                      encoding='utf-8', newline='') as f:
+                    yield f
+    else:
+        raise ValueError(f"Compression not supported: {compression}")
+
+def _write_csv(results: Iterable[List[Any]], f):
+    writer = csv.writer(f)
+    writer.writerows(results)
+
+def _write_jsonl(results: Iterable[List[Any]], f):
+    for row in results:
+        f.write(json.dumps(row, default=json_default))
+        f.write('\n')
+
+def _column_chunks(results: Iterable[List[Any]], columns: Optional[List[str]]) -> Iterator[Dict[str, List[Any]]]:
+    """Batches of at most ROW_GROUP_SIZE rows, as {column name: values}."""
+    if isinstance(results, ResultTable): # Already stored column by column
+        names = columns or [f"column_{i}" for i in range(results.width or 0)]
+        for start in range(0, len(results), ROW_GROUP_SIZE):
+            yield {name: results.column(i, start, start + ROW_GROUP_SIZE) for i, name in enumerate(names)}
+        return
+    rows = iter(results)
+    while True:
+        chunk = list(islice(rows, ROW_GROUP_SIZE))
+        if not chunk:
+            return
+        names = columns or [f"column_{i}" for i in range(len(chunk[0]))]
+        # Transpose the batch: Arrow stores data column by column
+        yield {name: [row[i] for row in chunk] for i, name in enumerate(names)}
+
+def _row_groups(results: Iterable[List[Any]], columns: Optional[List[str]]):
+    """Yield pyarrow tables of at most ROW_GROUP_SIZE rows, all with the same schema."""
+    import pyarrow as pa
+    schema = None
+    pending = [] # Batches held back while a column has no value yet, so has no type
+    for data in _column_chunks(results, columns):
+        table = pa.Table.from_pydict(data)
+        if schema is None:
+            pending.append(table)
+            merged = pa.unify_schemas([t.schema for t in pending]) # None then int: int
+            if any(pa.types.is_null(field.type) for field in merged) and len(pending) < SCHEMA_BUFFER_GROUPS:
+                continue
+            schema = _typed(merged)
+            for held in pending:
+                yield held.cast(schema)
+            pending = None
+        else:
+            yield table.cast(schema) # A column typed as strings takes later numbers as text
+    if pending: # Fewer batches than SCHEMA_BUFFER_GROUPS
+        schema = _typed(pa.unify_schemas([t.schema for t in pending]))
+        for held in pending:
+            yield held.cast(schema)
+
+def _typed(schema):
+    """Columns still without a value default to strings."""
+    import pyarrow as pa
+    return pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ])
 
 # private functions for specific data formats
-def _save_as_csv(results: List[List[Any]], filepath: str):
-    """Writes data to a CSV file."""
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerows(results)
-
-def _save_as_json(results: List[List[Any]], filepath: str):
-    """Writes data to a JSON file."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=4)
\ No newline at end of file
+def _save_as_csv(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a CSV file, row by row."""
+    with _open_text(filepath) as f:
+        _write_csv(results, f)
+
+def _save_as_json(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """
+    Writes data to a JSON file as a streamed array.
+    The output is the same as json.dump(results, f, indent=4).
+    """
+    with _open_text(filepath) as f:
+        f.write('[')
+        empty = True
+        for row in results:
+            f.write('\n    ' if empty else ',\n    ')
+            f.write(json.dumps(row, indent=4, default=json_default).replace('\n', '\n    '))
+            empty = False
+        f.write(']' if empty else '\n]')
+
+def _save_as_jsonl(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a JSON Lines file (one JSON array per line)."""
+    with _open_text(filepath) as f:
+        _write_jsonl(results, f)
+
+def _save_as_csv_gz(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a gzip-compressed CSV file."""
+    with _open_text(filepath, 'gzip') as f:
+        _write_csv(results, f)
+
+def _save_as_jsonl_gz(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a gzip-compressed JSON Lines file."""
+    with _open_text(filepath, 'gzip') as f:
+        _write_jsonl(results, f)
+
+def _save_as_csv_zst(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a zstd-compressed CSV file (requires zstandard)."""
+    with _open_text(filepath, 'zstd') as f:
+        _write_csv(results, f)
+
+def _save_as_jsonl_zst(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a zstd-compressed JSON Lines file (requires zstandard)."""
+    with _open_text(filepath, 'zstd') as f:
+        _write_jsonl(results, f)
+
+def _write_tables(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]], new_writer):
+    """Writes the row groups with new_writer(filepath, schema); a failed write leaves no file behind."""
+    writer = None
+    try:
+        for table in _row_groups(results, columns):
+            if writer is None:
+                writer = new_writer(filepath, table.schema)
+            writer.write_table(table)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(filepath) # Half a file would read as a complete, shorter one
+        raise
+    if writer is not None:
+        writer.close()
+
+def _save_as_parquet(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to a Parquet file, one row group per batch (requires pyarrow)."""
+    import pyarrow.parquet as pq
+    _write_tables(results, filepath, columns,
+                  lambda path, schema: pq.ParquetWriter(path, schema, compression='zstd'))
+
+def _save_as_arrow(results: Iterable[List[Any]], filepath: str, columns: Optional[List[str]] = None):
+    """Writes data to an Arrow IPC file, one record batch per group (requires pyarrow)."""
+    import pyarrow as pa
+    _write_tables(results, filepath, columns, pa.ipc.new_file)